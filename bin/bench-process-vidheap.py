@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+Benchmark rmlog parsing throughput of process-vidheap.py.
+Generates a synthetic rmlog (or uses an existing one) and reports lines/sec
+for the legacy trial-parser loop and the current process_rmlog.
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_process_vidheap():
+    """Import process-vidheap.py as a module"""
+    path = os.path.join(SCRIPT_DIR, 'process-vidheap.py')
+    spec = importlib.util.spec_from_file_location('process_vidheap', path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so that worker processes can unpickle references to it
+    sys.modules['process_vidheap'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def alloc_size_block(owner, h_memory, mem_type, size, attr, attr2, flags, offset):
+    return (f"AllocSize={{owner=0x{owner:x}, hMemory=0x{h_memory:x}, type=0x{mem_type:x}, "
+            f"flags=0x{flags:x}, attr=0x{attr:x}, format=0x0, comprCovg=0x0, zcullCovg=0x0, width=0x0, "
+            f"height=0x0, size=0x{size:x}, alignment=0x1000, offset=0x{offset:x}, limit=0x{offset + size - 1:x}, "
+            f"address=(nil), rangeBegin=0x0, rangeEnd=0xffffffffffffffff, attr2=0x{attr2:x}, ctagOffset=0x0, numaNode=0}}")
+
+
+def vidheap_line(rng, h_client, h_memory, function=2):
+    size = rng.choice((0x1000, 0x10000, 0x200000, 0x1000000))
+    attr = rng.choice((0x11800000, 0x01800000, 0x02000000, 0x5a800000))
+    attr2 = rng.choice((0x0, 0x100004, 0x40))
+    flags = rng.choice((0x1c101, 0x3c101, 0x0))
+    offset = rng.randrange(1 << 20) << 12
+    status = '0x0' if rng.random() > 0.01 else '0x51'
+    head = (f"hRoot=0x{h_client:x}, hObjectParent=0x{h_client + 1:x}, function=0x{function:x}, hVASpace=0x0, "
+            f"ivcHeapNumber=0x0, status=0x0, total=0x{24 << 30:x}, free=0x{rng.randrange(24 << 30):x}")
+    owner = rng.randrange(1 << 32)
+    mem_type = rng.randrange(18)
+    before = alloc_size_block(owner, h_memory, mem_type, size, attr, attr2, flags, 0)
+    after = alloc_size_block(owner, h_memory, mem_type, size, attr, attr2, flags, offset)
+    return (f"RM: vidHeapControl(vidHeapControlParms={{{head}, {before}}}, alloc=(nil), bl=(nil)) -> "
+            f"status={status}, duration={rng.randrange(500, 200000)}ns, vidHeapControlParms={{{head}, {after}}}")
+
+
+def mapmemory_line(rng, h_client, h_memory):
+    length = rng.choice((0x1000, 0x10000, 0x200000))
+    flags = rng.choice((0x0, 0x4, 0x100, 0x200, 0x8100))
+    parms = (f"hClient=0x{h_client:x}, hDevice=0x{h_client + 1:x}, hDma=0x{h_client + 2:x}, "
+             f"hMemory=0x{h_memory:x}, offset=0x0, length=0x{length:x}, flags=0x{flags:x}, flags2=0x0, "
+             f"kindOverride=0x0")
+    dma_offset = rng.randrange(1 << 24) << 16
+    return (f"RM: mapMemoryDma2(parms={{{parms}, dmaOffset=0x0}}) -> status=0x0, "
+            f"duration={rng.randrange(500, 50000)}ns, parms={{{parms}, dmaOffset=0x{dma_offset:x}}}")
+
+
+def dupobject_line(rng, h_client, h_src, h_dest):
+    return (f"RM: dupObject2(hClient=0x{h_client:x}, hParent=0x{h_client + 1:x}, hObjectDest=0x0, "
+            f"hClientSrc=0x{h_client:x}, hObjectSrc=0x{h_src:x}, flags=0x0) -> status=0x0, "
+            f"duration={rng.randrange(500, 5000)}ns, hObjectDest=0x{h_dest:x}")
+
+
+def noise_line(rng):
+    return rng.choice((
+        f"RM: control(hClient=0xc1d0{rng.randrange(1 << 16):04x}, hObject=0x5c000001, cmd=0x20800a0a, "
+        f"params=0x7ffd{rng.randrange(1 << 32):08x}, paramsSize=0x8) -> status=0x0, duration={rng.randrange(100, 9000)}ns",
+        f"RM: alloc(hRoot=0xc1d00001, hObjectParent=0x5c000001, hObjectNew=0x{rng.randrange(1 << 32):x}, "
+        f"hClass=0x90f1) -> status=0x0, duration={rng.randrange(100, 9000)}ns",
+        f"RM: free(hRoot=0xc1d00001, hObjectParent=0x5c000001, hObjectOld=0x{rng.randrange(1 << 32):x}) "
+        f"-> status=0x0, duration={rng.randrange(100, 9000)}ns",
+        "# frame boundary",
+    ))
+
+
+def generate_rmlog(filename: str, size_bytes: int, call_ratio: float, seed: int = 1):
+    """Write a synthetic rmlog of roughly size_bytes bytes"""
+    rng = random.Random(seed)
+    h_client = 0xc1d00001
+    next_handle = 0xcaf00000
+    live = []
+    written = 0
+    with open(filename, 'w') as f:
+        while written < size_bytes:
+            chunk = []
+            for _ in range(4096):
+                if rng.random() >= call_ratio:
+                    chunk.append(noise_line(rng))
+                    continue
+                roll = rng.random()
+                if roll < 0.45 or not live:
+                    next_handle += 1
+                    live.append(next_handle)
+                    chunk.append(vidheap_line(rng, h_client, next_handle))
+                elif roll < 0.55:
+                    h_memory = live.pop(rng.randrange(len(live)))
+                    chunk.append(vidheap_line(rng, h_client, h_memory, function=3))
+                elif roll < 0.9:
+                    chunk.append(mapmemory_line(rng, h_client, rng.choice(live)))
+                else:
+                    next_handle += 1
+                    chunk.append(dupobject_line(rng, h_client, rng.choice(live), next_handle))
+            text = '\n'.join(chunk) + '\n'
+            f.write(text)
+            written += len(text)
+
+
+# The original regex-based parsers and records of process-vidheap.py, vendored
+# unchanged so that the legacy case keeps measuring the original code however
+# the current parsers evolve.
+
+@dataclass
+class AllocSize:
+    """Represents the AllocSize structure from vidHeapControl"""
+    owner: str
+    hMemory: str
+    type: str
+    flags: str
+    attr: str
+    format: str
+    comprCovg: str
+    zcullCovg: str
+    width: str
+    height: str
+    size: str
+    alignment: str
+    offset: str
+    limit: str
+    address: str
+    rangeBegin: str
+    rangeEnd: str
+    attr2: str
+    ctagOffset: str
+    numaNode: str
+
+
+@dataclass
+class VidHeapControlCall:
+    """Represents a complete vidHeapControl call"""
+    line_number: int
+    hRoot: str
+    hObjectParent: str
+    function: str
+    hVASpace: str
+    ivcHeapNumber: str
+    status_before: str
+    total: str
+    free: str
+    alloc_size_before: AllocSize
+    alloc_ptr: Optional[str]
+    bl_ptr: Optional[str]
+    status_after: str
+    duration_ns: int
+    alloc_size_after: AllocSize
+
+
+@dataclass
+class MapMemoryDmaCall:
+    """Represents a mapMemoryDma2 call"""
+    line_number: int
+    hClient: str
+    hDevice: str
+    hDma: str
+    hMemory: str
+    offset: str
+    length: str
+    flags: str
+    flags2: str
+    kindOverride: str
+    dmaOffset_before: str
+    status: str
+    duration_ns: int
+    dmaOffset_after: str
+
+
+@dataclass
+class DupObjectCall:
+    """Represents a dupObject2 call that creates an alias"""
+    line_number: int
+    hClient: str
+    hParent: str
+    hClientSrc: str
+    hObjectSrc: str
+    hObjectDest: str
+    flags: str
+    status: str
+    duration_ns: int
+
+
+def parse_alloc_size(alloc_str: str) -> AllocSize:
+    """Parse AllocSize structure from string"""
+    # Remove 'AllocSize={' and trailing '}'
+    alloc_str = alloc_str.strip()
+    if alloc_str.startswith('AllocSize={'):
+        alloc_str = alloc_str[11:]
+    if alloc_str.endswith('}'):
+        alloc_str = alloc_str[:-1]
+    
+    # Parse key=value pairs
+    params = {}
+    # Use regex to handle complex values including (nil)
+    pattern = r'(\w+)=((?:\([^)]+\)|0x[0-9a-f]+|0|-?\d+))'
+    matches = re.finditer(pattern, alloc_str)
+    
+    for match in matches:
+        key, value = match.groups()
+        params[key] = value
+    
+    return AllocSize(
+        owner=params.get('owner', '0x0'),
+        hMemory=params.get('hMemory', '0x0'),
+        type=params.get('type', '0x0'),
+        flags=params.get('flags', '0x0'),
+        attr=params.get('attr', '0x0'),
+        format=params.get('format', '0x0'),
+        comprCovg=params.get('comprCovg', '0x0'),
+        zcullCovg=params.get('zcullCovg', '0x0'),
+        width=params.get('width', '0x0'),
+        height=params.get('height', '0x0'),
+        size=params.get('size', '0x0'),
+        alignment=params.get('alignment', '0x0'),
+        offset=params.get('offset', '0x0'),
+        limit=params.get('limit', '0x0'),
+        address=params.get('address', '(nil)'),
+        rangeBegin=params.get('rangeBegin', '0x0'),
+        rangeEnd=params.get('rangeEnd', '0x0'),
+        attr2=params.get('attr2', '0x0'),
+        ctagOffset=params.get('ctagOffset', '0x0'),
+        numaNode=params.get('numaNode', '0')
+    )
+
+
+def parse_vidheap_control_line(line: str, line_number: int) -> Optional[VidHeapControlCall]:
+    """Parse a single vidHeapControl line"""
+    if 'vidHeapControl' not in line:
+        return None
+    
+    try:
+        # Split into before -> after
+        parts = line.split(' -> ')
+        if len(parts) != 2:
+            return None
+        
+        before_part = parts[0]
+        after_part = parts[1]
+        
+        # Extract parameters from before part
+        # Pattern: RM: vidHeapControl(vidHeapControlParms={...}, alloc=..., bl=...)
+        before_match = re.search(r'vidHeapControl\(vidHeapControlParms=\{([^}]+(?:\{[^}]+\})?[^}]*)\}, alloc=([^,]+), bl=([^)]+)\)', before_part)
+        if not before_match:
+            return None
+        
+        params_str = before_match.group(1)
+        alloc_ptr = before_match.group(2)
+        bl_ptr = before_match.group(3)
+        
+        # Extract main parameters
+        param_pattern = r'(\w+)=((?:0x[0-9a-f]+|0x0|\d+|AllocSize=\{[^}]+\}))'
+        main_params = {}
+        
+        # Find AllocSize first (it's a nested structure)
+        alloc_size_match = re.search(r'AllocSize=\{([^}]+)\}', params_str)
+        if alloc_size_match:
+            alloc_size_str = alloc_size_match.group(0)
+            alloc_size_before = parse_alloc_size(alloc_size_str)
+            # Remove AllocSize from params_str to parse other parameters
+            params_without_alloc = params_str.replace(alloc_size_str, '')
+        else:
+            return None
+        
+        # Parse other parameters
+        for match in re.finditer(r'(\w+)=(0x[0-9a-f]+|0x0|\d+)', params_without_alloc):
+            key, value = match.groups()
+            main_params[key] = value
+        
+        # Extract after part
+        # Pattern: status=..., duration=...ns, vidHeapControlParms={...}
+        status_match = re.search(r'status=(0x[0-9a-f]+)', after_part)
+        duration_match = re.search(r'duration=(\d+)ns', after_part)
+        after_params_match = re.search(r'vidHeapControlParms=\{[^}]*AllocSize=\{([^}]+)\}', after_part)
+        
+        if not (status_match and duration_match):
+            return None
+        
+        status_after = status_match.group(1)
+        duration_ns = int(duration_match.group(1))
+        
+        # Parse after AllocSize
+        if after_params_match:
+            # Find the full AllocSize in after part
+            after_alloc_match = re.search(r'AllocSize=\{([^}]+)\}', after_part)
+            if after_alloc_match:
+                alloc_size_after = parse_alloc_size(after_alloc_match.group(0))
+            else:
+                alloc_size_after = alloc_size_before
+        else:
+            alloc_size_after = alloc_size_before
+        
+        return VidHeapControlCall(
+            line_number=line_number,
+            hRoot=main_params.get('hRoot', '0x0'),
+            hObjectParent=main_params.get('hObjectParent', '0x0'),
+            function=main_params.get('function', '0x0'),
+            hVASpace=main_params.get('hVASpace', '0x0'),
+            ivcHeapNumber=main_params.get('ivcHeapNumber', '0x0'),
+            status_before=main_params.get('status', '0x0'),
+            total=main_params.get('total', '0x0'),
+            free=main_params.get('free', '0x0'),
+            alloc_size_before=alloc_size_before,
+            alloc_ptr=alloc_ptr if alloc_ptr != '(nil)' else None,
+            bl_ptr=bl_ptr if bl_ptr != '(nil)' else None,
+            status_after=status_after,
+            duration_ns=duration_ns,
+            alloc_size_after=alloc_size_after
+        )
+    
+    except Exception as e:
+        print(f"Error parsing line {line_number}: {e}", file=sys.stderr)
+        return None
+
+
+def parse_mapmemory_dma_line(line: str, line_number: int) -> Optional[MapMemoryDmaCall]:
+    """Parse a single mapMemoryDma2 line"""
+    if 'mapMemoryDma' not in line:
+        return None
+    
+    try:
+        # Split into before -> after
+        parts = line.split(' -> ')
+        if len(parts) != 2:
+            return None
+        
+        before_part = parts[0]
+        after_part = parts[1]
+        
+        # Extract parameters from before part
+        # Pattern: RM: mapMemoryDma2(parms={...})
+        before_match = re.search(r'mapMemoryDma\d?\(parms=\{([^}]+)\}\)', before_part)
+        if not before_match:
+            return None
+        
+        params_str = before_match.group(1)
+        
+        # Parse parameters
+        params = {}
+        param_pattern = r'(\w+)=(0x[0-9a-f]+|0x0|\d+)'
+        for match in re.finditer(param_pattern, params_str):
+            key, value = match.groups()
+            params[key] = value
+        
+        # Extract after part
+        status_match = re.search(r'status=(0x[0-9a-f]+)', after_part)
+        duration_match = re.search(r'duration=(\d+)ns', after_part)
+        after_params_match = re.search(r'parms=\{([^}]+)\}', after_part)
+        
+        if not (status_match and duration_match and after_params_match):
+            return None
+        
+        status = status_match.group(1)
+        duration_ns = int(duration_match.group(1))
+        
+        # Parse after parameters to get updated dmaOffset
+        after_params_str = after_params_match.group(1)
+        after_params = {}
+        for match in re.finditer(param_pattern, after_params_str):
+            key, value = match.groups()
+            after_params[key] = value
+        
+        return MapMemoryDmaCall(
+            line_number=line_number,
+            hClient=params.get('hClient', '0x0'),
+            hDevice=params.get('hDevice', '0x0'),
+            hDma=params.get('hDma', '0x0'),
+            hMemory=params.get('hMemory', '0x0'),
+            offset=params.get('offset', '0x0'),
+            length=params.get('length', '0x0'),
+            flags=params.get('flags', '0x0'),
+            flags2=params.get('flags2', '0x0'),
+            kindOverride=params.get('kindOverride', '0x0'),
+            dmaOffset_before=params.get('dmaOffset', '0x0'),
+            status=status,
+            duration_ns=duration_ns,
+            dmaOffset_after=after_params.get('dmaOffset', params.get('dmaOffset', '0x0'))
+        )
+    
+    except Exception as e:
+        print(f"Error parsing mapMemoryDma line {line_number}: {e}", file=sys.stderr)
+        return None
+
+
+def parse_dupobject_line(line: str, line_number: int) -> Optional[DupObjectCall]:
+    """Parse a single dupObject2 line"""
+    if 'dupObject' not in line:
+        return None
+    
+    try:
+        # Split into before -> after
+        parts = line.split(' -> ')
+        if len(parts) != 2:
+            return None
+        
+        before_part = parts[0]
+        after_part = parts[1]
+        
+        # Extract parameters from before part
+        # Pattern: RM: dupObject2(hClient=..., hParent=..., hObjectDest=..., hClientSrc=..., hObjectSrc=..., flags=...)
+        params = {}
+        param_pattern = r'(\w+)=(0x[0-9a-f]+|0x0|\d+|\(nil\))'
+        for match in re.finditer(param_pattern, before_part):
+            key, value = match.groups()
+            params[key] = value
+        
+        # Extract after part
+        status_match = re.search(r'status=(0x[0-9a-f]+)', after_part)
+        duration_match = re.search(r'duration=(\d+)ns', after_part)
+        dest_match = re.search(r'hObjectDest=(0x[0-9a-f]+)', after_part)
+        
+        if not (status_match and duration_match and dest_match):
+            return None
+        
+        status = status_match.group(1)
+        duration_ns = int(duration_match.group(1))
+        hObjectDest = dest_match.group(1)
+        
+        return DupObjectCall(
+            line_number=line_number,
+            hClient=params.get('hClient', '0x0'),
+            hParent=params.get('hParent', '0x0'),
+            hClientSrc=params.get('hClientSrc', '0x0'),
+            hObjectSrc=params.get('hObjectSrc', '0x0'),
+            hObjectDest=hObjectDest,
+            flags=params.get('flags', '0x0'),
+            status=status,
+            duration_ns=duration_ns
+        )
+    
+    except Exception as e:
+        print(f"Error parsing dupObject line {line_number}: {e}", file=sys.stderr)
+        return None
+
+
+def legacy_process_rmlog(filename: str):
+    """The original process_rmlog loop: every line goes through all three trial parsers"""
+    vidheap_calls, mapmemory_calls, dupobject_calls = [], [], []
+    with open(filename, 'r') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            call = parse_vidheap_control_line(line, line_num)
+            if call:
+                vidheap_calls.append(call)
+                continue
+            call = parse_mapmemory_dma_line(line, line_num)
+            if call:
+                mapmemory_calls.append(call)
+                continue
+            call = parse_dupobject_line(line, line_num)
+            if call:
+                dupobject_calls.append(call)
+    return vidheap_calls, mapmemory_calls, dupobject_calls
+
+
+def count_lines(filename: str) -> int:
+    lines = 0
+    with open(filename, 'rb') as f:
+        while True:
+            block = f.read(1 << 24)
+            if not block:
+                return lines
+            lines += block.count(b'\n')
+
+
+def run_case(name: str, func, total_lines: int, size_bytes: int):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    counts = '/'.join(str(len(calls)) for calls in result)
+    print(f"  {name:<24} {elapsed:8.2f} s  {total_lines/elapsed:12,.0f} lines/s  "
+          f"{size_bytes/elapsed/(1024*1024):8.1f} MB/s  calls(vidheap/mapmemory/dupobject)={counts}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rmlog parsing in process-vidheap.py')
+    parser.add_argument('rmlog_file', nargs='?',
+                        help='Existing rmlog to benchmark (default: generate a synthetic one)')
+    parser.add_argument('--size-mb', type=int, default=2048,
+                        help='Size of the synthetic rmlog in MB (default: 2048)')
+    parser.add_argument('--call-ratio', type=float, default=0.1,
+                        help='Fraction of synthetic lines that are tracked calls (default: 0.1)')
+    parser.add_argument('--output', default='bench-rmlog.txt',
+                        help='Where to write the synthetic rmlog (default: bench-rmlog.txt)')
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='Do not time the legacy trial-parser loop')
+    parser.add_argument('--jobs', '-j', type=int, nargs='*', default=[], metavar='N',
+                        help='Also time process_rmlog with each given worker count')
+    args = parser.parse_args()
+
+    pv = load_process_vidheap()
+
+    filename = args.rmlog_file
+    if not filename:
+        filename = args.output
+        print(f"Generating {args.size_mb} MB synthetic rmlog at {filename}...")
+        generate_rmlog(filename, args.size_mb * 1024 * 1024, args.call_ratio)
+
+    size_bytes = os.path.getsize(filename)
+    total_lines = count_lines(filename)
+    print(f"{filename}: {size_bytes/(1024*1024):.1f} MB, {total_lines} lines")
+
+    if not args.skip_legacy:
+        run_case('legacy trial parsers', lambda: legacy_process_rmlog(filename), total_lines, size_bytes)
+    run_case('process_rmlog', lambda: pv.process_rmlog(filename), total_lines, size_bytes)
+    for jobs in args.jobs:
+        run_case(f'process_rmlog --jobs {jobs}', lambda: pv.process_rmlog(filename, jobs), total_lines, size_bytes)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Regression checks for process-vidheap.py.
+Each check writes a small synthetic rmlog, either reproducing a past bug or
+split into several chunks, and verifies that the batch, --jobs, --stream and
+--cache paths agree on it. Exits non-zero if any check fails.
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import sys
+import tempfile
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+H_CLIENT = 0xc1d00001
+
+
+def load_script(name: str, module_name: str):
+    """Import a script from this directory as a module"""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SCRIPT_DIR, name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_rmlog(directory: str, name: str, lines) -> str:
+    filename = os.path.join(directory, name)
+    with open(filename, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return filename
+
+
+def store_columns(pv, stores) -> dict:
+    """Every column of every store, for comparing parse results"""
+    return {kind: {column: store.column(column) for column in store.COLUMNS}
+            for kind, store in zip(pv.CALL_KINDS, stores)}
+
+
+def compare_stores(pv, label: str, expected, actual) -> list:
+    """Describe the first differing column of each store kind"""
+    errors = []
+    expected, actual = store_columns(pv, expected), store_columns(pv, actual)
+    for kind in pv.CALL_KINDS:
+        for column, values in expected[kind].items():
+            if actual[kind][column] != values:
+                errors.append(f"{label}: {kind} column {column} differs "
+                              f"({len(values)} vs {len(actual[kind][column])} rows)")
+                break
+    return errors
+
+
+def write_chunked_rmlog(bench, directory: str, name: str, size_bytes: int = 1 << 20) -> str:
+    """A synthetic rmlog of a few thousand lines, enough for several chunks per worker"""
+    filename = os.path.join(directory, name)
+    bench.generate_rmlog(filename, size_bytes, call_ratio=0.5, seed=7)
+    return filename
+
+
+def check_jobs_match_serial(pv, bench, directory: str) -> list:
+    """--jobs N parses the same calls, with the same line numbers, as the serial path"""
+    filename = write_chunked_rmlog(bench, directory, 'chunked.log')
+    errors = []
+    with open(filename, 'rb') as f:
+        data = f.read()
+    jobs = 3
+    # split_rmlog_chunks aims at evenly spaced offsets; some must fall inside a line
+    num_chunks = len(pv._rmlog_chunk_tasks(filename, jobs))
+    chunk_size = len(data) // num_chunks
+    if all(data[offset - 1:offset] == b'\n' for offset in range(chunk_size, len(data), chunk_size)):
+        errors.append("no chunk boundary falls inside a line")
+    chunks = pv.split_rmlog_chunks(filename, num_chunks)
+    if chunks[0][0] != 0 or chunks[-1][1] != len(data) or any(
+            end != start or data[start - 1:start] != b'\n' for (_, end), (start, _) in zip(chunks, chunks[1:])):
+        errors.append(f"chunks {chunks} do not tile the log at line starts")
+    
+    serial = pv.process_rmlog(filename)
+    if not all(serial):
+        errors.append(f"serial parse found {[len(store) for store in serial]} calls")
+    errors += compare_stores(pv, f"--jobs {jobs}", serial, pv.process_rmlog(filename, jobs))
+    return errors
+
+
+def check_stream_matches_batch(pv, bench, directory: str) -> list:
+    """--stream yields every call of the batch stores, in line order, serially and with --jobs"""
+    filename = write_chunked_rmlog(bench, directory, 'chunked.log')
+    batch = pv.process_rmlog(filename)
+    errors = []
+    for jobs in (1, 3):
+        streamed = pv.new_call_stores()
+        sinks = pv.store_sinks(streamed)
+        for kind, call in pv.iter_rmlog_calls(filename, jobs):
+            sinks[kind](call)
+        errors += compare_stores(pv, f"--stream --jobs {jobs}", batch,
+                                 [streamed[kind] for kind in pv.CALL_KINDS])
+    return errors
+
+
+def check_cache_matches_fresh_parse(pv, bench, directory: str) -> list:
+    """--cache reloads and extends by an appended tail to the same stores as a fresh parse"""
+    source = write_chunked_rmlog(bench, directory, 'chunked.log')
+    with open(source, 'rb') as f:
+        data = f.read()
+    # Cut at a line start about two thirds in; the rest is appended later
+    cut = data.index(b'\n', len(data) * 2 // 3) + 1
+    filename = os.path.join(directory, 'growing.log')
+    cache_file = os.path.join(directory, 'growing.log.vhcache')
+    with open(filename, 'wb') as f:
+        f.write(data[:cut])
+    errors = []
+    
+    def cached(expected_message: str, jobs: int = 1):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            stores = pv.process_rmlog_cached(filename, jobs, cache_file)
+        if expected_message not in output.getvalue():
+            errors.append(f"expected '{expected_message}', got {output.getvalue().strip()!r}")
+        return stores
+    
+    cached('')
+    errors += compare_stores(pv, "--cache reload", pv.process_rmlog(filename), cached('Loaded parsed calls'))
+    with open(filename, 'ab') as f:
+        f.write(data[cut:])
+    errors += compare_stores(pv, "--cache extension", pv.process_rmlog(filename), cached('Extending', jobs=3))
+    errors += compare_stores(pv, "--cache reload after extension", pv.process_rmlog(filename),
+                             cached('Loaded parsed calls'))
+    return errors
+
+
+def check_dup_of_alias_after_free(pv, bench, directory: str) -> list:
+    """A allocated, B = dup(A), A freed, C = dup(B): B and C still name A's allocation"""
+    rng = random.Random(1)
+    filename = write_rmlog(directory, 'dup-after-free.log', (
+        bench.vidheap_line(rng, H_CLIENT, 0xa),
+        bench.dupobject_line(rng, H_CLIENT, 0xa, 0xb),
+        bench.vidheap_line(rng, H_CLIENT, 0xa, function=3),
+        bench.dupobject_line(rng, H_CLIENT, 0xb, 0xc),
+        bench.mapmemory_line(rng, H_CLIENT, 0xb),
+        bench.mapmemory_line(rng, H_CLIENT, 0xc),
+    ))
+    errors = []
+
+    vidheap_calls, mapmemory_calls, dupobject_calls = pv.process_rmlog(filename)
+    alias_map = pv.build_alias_map(dupobject_calls, vidheap_calls)
+    alloc_map = pv.build_allocation_map(vidheap_calls, dupobject_calls)
+    resolved = sum(pv.find_related_allocations(call, alloc_map, alias_map)[0] is not None for call in mapmemory_calls)
+    if resolved != 2:
+        errors.append(f"batch resolved {resolved} of 2 mappings")
+
+    processor = pv.StreamProcessor()
+    sinks = processor.sinks()
+    for kind, call in pv.iter_rmlog_calls(filename):
+        sinks[kind](call)
+    if processor.mappings_with_hmemory != 2:
+        errors.append(f"--stream resolved {processor.mappings_with_hmemory} of 2 mappings")
+    return errors
+
+
+CHECKS = (
+    check_dup_of_alias_after_free,
+    check_jobs_match_serial,
+    check_stream_matches_batch,
+    check_cache_matches_fresh_parse,
+)
+
+
+def main():
+    pv = load_script('process-vidheap.py', 'process_vidheap')
+    bench = load_script('bench-process-vidheap.py', 'bench_process_vidheap')
+    failed = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for check in CHECKS:
+            errors = check(pv, bench, directory)
+            print(f"{'FAIL' if errors else 'ok':<6}{check.__name__}")
+            for error in errors:
+                print(f"      {error}")
+            failed += bool(errors)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
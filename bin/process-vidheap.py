@@ -5,10 +5,42 @@ Parses and analyzes memory allocation operations.
 """
 
 import re
+import os
+import bisect
+import csv
+import functools
+import gzip
+import hashlib
+import heapq
+import io
 import json
-from dataclasses import dataclass, asdict
-from typing import Optional, List, Dict
+import math
+import mmap
+import multiprocessing as mp
+from array import array
+from dataclasses import dataclass, fields
+from fractions import Fraction
+from typing import Callable, Dict, Iterator, List, Optional
+from itertools import islice
 import sys
+import time
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 
 
 # NVOS32 Memory Type Definitions
@@ -33,6 +65,19 @@ NVOS32_TYPE = {
     17: "SYNCPOINT",
 }
 
+# NVOS32 vidHeapControl Function Codes
+NVOS32_FUNCTION = {
+    1: "ALLOC_DEPTH_WIDTH_HEIGHT",
+    2: "ALLOC_SIZE",
+    3: "FREE",
+    5: "INFO",
+    6: "ALLOC_TILED_PITCH_HEIGHT",
+    14: "ALLOC_SIZE_RANGE",
+}
+NVOS32_FUNCTION_FREE = 3
+# Functions that create the allocation named by AllocSize.hMemory
+NVOS32_ALLOC_FUNCTIONS = frozenset((1, 2, 6, 14))
+
 # NVOS32 Allocation Flags
 NVOS32_ALLOC_FLAGS = {
     0x00000001: "IGNORE_BANK_PLACEMENT",
@@ -76,6 +121,29 @@ def extract_bitfield(value: int, high: int, low: int) -> int:
     return (value >> low) & mask
 
 
+# A log has few distinct attr/flags values compared to its calls, so the
+# bitfield decoders below are memoized on the raw value
+_DECODE_CACHE_SIZE = 4096
+
+
+def memoize_decoder(decoder):
+    """Memoize a decode_* function in a bounded LRU cache keyed by the raw value
+
+    Each caller gets its own copy of the cached dict or list, so changing a
+    result cannot corrupt the cache.
+    """
+    cached = functools.lru_cache(maxsize=_DECODE_CACHE_SIZE)(decoder)
+    
+    @functools.wraps(decoder)
+    def decode(value: int):
+        return cached(value).copy()
+    
+    decode.cache_info = cached.cache_info
+    decode.cache_clear = cached.cache_clear
+    return decode
+
+
+@memoize_decoder
 def decode_attr(attr_val: int) -> Dict[str, str]:
     """Decode NVOS32_ATTR bitfield"""
     result = {}
@@ -153,6 +221,7 @@ def decode_attr(attr_val: int) -> Dict[str, str]:
     return result
 
 
+@memoize_decoder
 def decode_attr2(attr2_val: int) -> Dict[str, str]:
     """Decode NVOS32_ATTR2 bitfield"""
     result = {}
@@ -255,6 +324,7 @@ def decode_attr2(attr2_val: int) -> Dict[str, str]:
     return result
 
 
+@memoize_decoder
 def decode_flags(flags_val: int) -> List[str]:
     """Decode allocation flags bitmask"""
     active_flags = []
@@ -269,6 +339,12 @@ def decode_type(type_val: int) -> str:
     return NVOS32_TYPE.get(type_val, f"UNKNOWN({type_val})")
 
 
+def decode_function(function_val: int) -> str:
+    """Decode vidHeapControl function code"""
+    return NVOS32_FUNCTION.get(function_val, f"UNKNOWN({function_val})")
+
+
+@memoize_decoder
 def decode_nvos46_flags(flags_val: int) -> Dict[str, str]:
     """Decode NVOS46_FLAGS bitfield for mapMemoryDma"""
     result = {}
@@ -363,6 +439,7 @@ def decode_nvos46_flags(flags_val: int) -> Dict[str, str]:
     return result
 
 
+@memoize_decoder
 def decode_nvos46_flags2(flags2_val: int) -> Dict[str, str]:
     """Decode NVOS46_FLAGS2 bitfield for mapMemoryDma"""
     result = {}
@@ -375,47 +452,184 @@ def decode_nvos46_flags2(flags2_val: int) -> Dict[str, str]:
     return result
 
 
+# Bit positions (high, low) of the fields named by the decode_* functions,
+# used to split whole columns at once in decode_bitfield_columns
+NVOS32_ATTR_BITFIELDS = {
+    'depth': (2, 0),
+    'compr_covg': (3, 3),
+    'aa_samples': (7, 4),
+    'gpu_cache_snoop': (9, 8),
+    'zcull': (11, 10),
+    'compr': (13, 12),
+    'reserved_heap': (14, 14),
+    'format': (17, 16),
+    'z_type': (18, 18),
+    'zs_packing': (21, 19),
+    'page_size': (24, 23),
+    'location': (26, 25),
+    'physicality': (28, 27),
+    'coherency': (31, 29),
+}
+
+NVOS32_ATTR2_BITFIELDS = {
+    'zbc': (1, 0),
+    'gpu_cacheable': (3, 2),
+    'p2p_gpu_cacheable': (5, 4),
+    '32bit_pointer': (6, 6),
+    'fixed_numa': (7, 7),
+    'smmu_on_gpu': (9, 8),
+    'scanout_carveout': (10, 10),
+    'compcacheline_align': (11, 11),
+    'priority': (13, 12),
+    'internal': (14, 14),
+    'prefer_2c': (15, 15),
+    'niso_display': (16, 16),
+    'zbc_skip_refcount': (17, 17),
+    'iso': (18, 18),
+    'page_offlining': (19, 19),
+    'page_size_huge': (21, 20),
+    'protection_user': (22, 22),
+    'protection_device': (23, 23),
+    'memory_protection': (26, 25),
+    'allocate_from_subheap': (27, 27),
+    'localized_memory': (30, 29),
+    'register_memdesc': (31, 31),
+}
+
+NVOS46_FLAGS_BITFIELDS = {
+    'access': (1, 0),
+    '32bit_pointer': (2, 2),
+    'page_kind': (3, 3),
+    'cache_snoop': (4, 4),
+    'kernel_mapping': (5, 5),
+    'shader_access': (7, 6),
+    'page_size': (11, 8),
+    'system_l3_alloc': (13, 13),
+    'dma_offset_grows': (14, 14),
+    'dma_offset_fixed': (15, 15),
+    'disable_encryption': (16, 16),
+    'gpu_cacheable': (18, 17),
+    'page_kind_override': (19, 19),
+    'p2p_enable': (21, 20),
+    'p2p_subdev_src': (24, 22),
+    'p2p_subdev_tgt': (27, 25),
+    'tlb_lock': (28, 28),
+    'dma_unicast_reuse': (29, 29),
+    'force_compressed': (30, 30),
+    'defer_tlb_inval': (31, 31),
+}
+
+NVOS46_FLAGS2_BITFIELDS = {
+    'gpu_cache_snoop': (1, 0),
+}
+
+# Raw column -> (bitfields, per-value decoder that names a field's code)
+BITFIELD_DECODERS = {
+    'attr': (NVOS32_ATTR_BITFIELDS, decode_attr),
+    'attr2': (NVOS32_ATTR2_BITFIELDS, decode_attr2),
+    'nvos46_flags': (NVOS46_FLAGS_BITFIELDS, decode_nvos46_flags),
+    'nvos46_flags2': (NVOS46_FLAGS2_BITFIELDS, decode_nvos46_flags2),
+}
+
+
+def _as_uint64(values):
+    """View an array('Q') column as a uint64 ndarray without copying"""
+    if isinstance(values, array):
+        return np.frombuffer(values, dtype=np.uint64)
+    return np.asarray(values, dtype=np.uint64)
+
+
+def decode_bitfield_columns(values, bitfields: Dict[str, tuple[int, int]], names=None) -> Dict[str, object]:
+    """Split a column of raw bitfield values into one code column per field
+
+    values is an array('Q') store column or any sequence of ints. With NumPy
+    each field is a single shift-and-mask over the whole column and comes
+    back as a uint8 ndarray; without it, as a list of ints. Codes are turned
+    into names only for display, with bitfield_label.
+    """
+    names = names or bitfields
+    if np is not None:
+        raw = _as_uint64(values)
+        return {name: ((raw >> np.uint64(bitfields[name][1]))
+                       & np.uint64((1 << (bitfields[name][0] - bitfields[name][1] + 1)) - 1)).astype(np.uint8)
+                for name in names}
+    return {name: [extract_bitfield(value, *bitfields[name]) for value in values] for name in names}
+
+
+def decode_flag_columns(values) -> Dict[str, object]:
+    """Split a column of raw NVOS32 allocation flags into one boolean column per flag in NVOS32_ALLOC_FLAGS"""
+    if np is not None:
+        raw = _as_uint64(values)
+        return {name: (raw & np.uint64(bit)) != 0 for bit, name in NVOS32_ALLOC_FLAGS.items()}
+    return {name: [bool(value & bit) for value in values] for bit, name in NVOS32_ALLOC_FLAGS.items()}
+
+
+def bitfield_label(column: str, field: str, code: int) -> str:
+    """Name a field code from decode_bitfield_columns the way the decode_* functions do"""
+    bitfields, decoder = BITFIELD_DECODERS[column]
+    return decoder(int(code) << bitfields[field][1]).get(field, str(code))
+
+
+def count_by_code(codes, weights=None) -> Dict[int, tuple[int, int]]:
+    """Return {code: (count, sum of weights)} for a code column from decode_bitfield_columns"""
+    if np is not None:
+        codes = np.asarray(codes, dtype=np.intp)
+        counts = np.bincount(codes)
+        if weights is None:
+            sums = counts
+        else:
+            # Exact integer sums; bincount would sum weights as float64
+            sums = np.zeros(len(counts), dtype=np.uint64)
+            np.add.at(sums, codes, _as_uint64(weights))
+        return {int(code): (int(counts[code]), int(sums[code])) for code in np.flatnonzero(counts)}
+    result = {}
+    for code, weight in zip(codes, weights if weights is not None else (1 for _ in codes)):
+        count, total = result.get(code, (0, 0))
+        result[code] = (count + 1, total + weight)
+    return result
+
+
 @dataclass
 class AllocSize:
     """Represents the AllocSize structure from vidHeapControl"""
-    owner: str
-    hMemory: str
-    type: str
-    flags: str
-    attr: str
-    format: str
-    comprCovg: str
-    zcullCovg: str
-    width: str
-    height: str
-    size: str
-    alignment: str
-    offset: str
-    limit: str
-    address: str
-    rangeBegin: str
-    rangeEnd: str
-    attr2: str
-    ctagOffset: str
-    numaNode: str
+    owner: int
+    hMemory: int
+    type: int
+    flags: int
+    attr: int
+    format: int
+    comprCovg: int
+    zcullCovg: int
+    width: int
+    height: int
+    size: int
+    alignment: int
+    offset: int
+    limit: int
+    address: int
+    rangeBegin: int
+    rangeEnd: int
+    attr2: int
+    ctagOffset: int
+    numaNode: int
 
 
 @dataclass
 class VidHeapControlCall:
     """Represents a complete vidHeapControl call"""
     line_number: int
-    hRoot: str
-    hObjectParent: str
-    function: str
-    hVASpace: str
-    ivcHeapNumber: str
-    status_before: str
-    total: str
-    free: str
+    hRoot: int
+    hObjectParent: int
+    function: int
+    hVASpace: int
+    ivcHeapNumber: int
+    status_before: int
+    total: int
+    free: int
     alloc_size_before: AllocSize
-    alloc_ptr: Optional[str]
-    bl_ptr: Optional[str]
-    status_after: str
+    alloc_ptr: Optional[int]
+    bl_ptr: Optional[int]
+    status_after: int
     duration_ns: int
     alloc_size_after: AllocSize
 
@@ -424,76 +638,214 @@ class VidHeapControlCall:
 class MapMemoryDmaCall:
     """Represents a mapMemoryDma2 call"""
     line_number: int
-    hClient: str
-    hDevice: str
-    hDma: str
-    hMemory: str
-    offset: str
-    length: str
-    flags: str
-    flags2: str
-    kindOverride: str
-    dmaOffset_before: str
-    status: str
+    hClient: int
+    hDevice: int
+    hDma: int
+    hMemory: int
+    offset: int
+    length: int
+    flags: int
+    flags2: int
+    kindOverride: int
+    dmaOffset_before: int
+    status: int
     duration_ns: int
-    dmaOffset_after: str
+    dmaOffset_after: int
 
 
 @dataclass
 class DupObjectCall:
     """Represents a dupObject2 call that creates an alias"""
     line_number: int
-    hClient: str
-    hParent: str
-    hClientSrc: str
-    hObjectSrc: str
-    hObjectDest: str
-    flags: str
-    status: str
+    hClient: int
+    hParent: int
+    hClientSrc: int
+    hObjectSrc: int
+    hObjectDest: int
+    flags: int
+    status: int
     duration_ns: int
 
 
+ALLOC_SIZE_FIELDS = tuple(field.name for field in fields(AllocSize))
+
+
+class CallStore:
+    """Columnar storage for the parsed calls of one type
+
+    Every field is an unsigned 64-bit array('Q') column, so a call costs
+    8 bytes per field instead of one Python object per field. Records are
+    materialized on demand when the store is indexed or iterated.
+    """
+    record_type = None
+    COLUMNS: tuple = ()
+
+    def __init__(self):
+        self.columns = {name: array('Q') for name in self.COLUMNS}
+        self._column_list = [self.columns[name] for name in self.COLUMNS]
+
+    def __len__(self) -> int:
+        return len(self.columns['line_number'])
+
+    def __getitem__(self, index: int):
+        return self._build([column[index] for column in self._column_list])
+
+    def __iter__(self):
+        for values in zip(*self._column_list):
+            yield self._build(values)
+
+    def column(self, name: str) -> array:
+        """Return the raw column for a field"""
+        return self.columns[name]
+
+    def append(self, call):
+        """Append one parsed call"""
+        for column, value in zip(self._column_list, self._flatten(call)):
+            column.append(value)
+
+    def select(self, mask) -> 'CallStore':
+        """Return a new store with the rows where mask (a bool per row) is true"""
+        selected = type(self)()
+        if np is not None:
+            mask = np.asarray(mask, dtype=bool)
+            for name, column in self.columns.items():
+                selected.columns[name].frombytes(_as_uint64(column)[mask].tobytes())
+        else:
+            for name, column in self.columns.items():
+                selected.columns[name].extend(value for value, keep in zip(column, mask) if keep)
+        return selected
+
+    def extend(self, other: 'CallStore', line_offset: int = 0):
+        """Append all calls of another store, shifting their line numbers by line_offset"""
+        for name, column in self.columns.items():
+            if name == 'line_number' and line_offset:
+                column.extend(line + line_offset for line in other.columns[name])
+            else:
+                column.extend(other.columns[name])
+
+    def _flatten(self, call) -> tuple:
+        return tuple(getattr(call, name) for name in self.COLUMNS)
+
+    def _build(self, values):
+        return self.record_type(*values)
+
+
+class VidHeapStore(CallStore):
+    """Columnar storage for vidHeapControl calls; AllocSize fields become before_*/after_* columns"""
+    record_type = VidHeapControlCall
+    HEAD_COLUMNS = ('line_number', 'hRoot', 'hObjectParent', 'function', 'hVASpace', 'ivcHeapNumber',
+                    'status_before', 'total', 'free', 'alloc_ptr', 'bl_ptr', 'status_after', 'duration_ns')
+    COLUMNS = (HEAD_COLUMNS
+               + tuple('before_' + name for name in ALLOC_SIZE_FIELDS)
+               + tuple('after_' + name for name in ALLOC_SIZE_FIELDS))
+
+    def _flatten(self, call: VidHeapControlCall) -> tuple:
+        before = call.alloc_size_before
+        after = call.alloc_size_after
+        return ((call.line_number, call.hRoot, call.hObjectParent, call.function, call.hVASpace,
+                 call.ivcHeapNumber, call.status_before, call.total, call.free, call.alloc_ptr or 0,
+                 call.bl_ptr or 0, call.status_after, call.duration_ns)
+                + tuple(getattr(before, name) for name in ALLOC_SIZE_FIELDS)
+                + tuple(getattr(after, name) for name in ALLOC_SIZE_FIELDS))
+
+    def _build(self, values) -> VidHeapControlCall:
+        head = len(self.HEAD_COLUMNS)
+        middle = head + len(ALLOC_SIZE_FIELDS)
+        return VidHeapControlCall(
+            line_number=values[0],
+            hRoot=values[1],
+            hObjectParent=values[2],
+            function=values[3],
+            hVASpace=values[4],
+            ivcHeapNumber=values[5],
+            status_before=values[6],
+            total=values[7],
+            free=values[8],
+            alloc_size_before=AllocSize(*values[head:middle]),
+            alloc_ptr=values[9] or None,
+            bl_ptr=values[10] or None,
+            status_after=values[11],
+            duration_ns=values[12],
+            alloc_size_after=AllocSize(*values[middle:]),
+        )
+
+
+class MapMemoryStore(CallStore):
+    """Columnar storage for mapMemoryDma calls"""
+    record_type = MapMemoryDmaCall
+    COLUMNS = tuple(field.name for field in fields(MapMemoryDmaCall))
+
+
+class DupObjectStore(CallStore):
+    """Columnar storage for dupObject calls"""
+    record_type = DupObjectCall
+    COLUMNS = tuple(field.name for field in fields(DupObjectCall))
+
+
+# One token of an rmlog call line: key=value, key={ (opens a nested block),
+# } (closes it) or the ' -> ' separating the call from its result. A whole
+# line is tokenized by a single findall instead of one search per field.
+_PARM_TOKEN_RE = re.compile(r'(\w+)=(?:(\{)|(\([^)]*\)|[^,\s{}()]+))|(\})|( -> )')
+
+# Negative values in the log wrap to the unsigned 64-bit field they print
+_U64_MASK = (1 << 64) - 1
+
+
+def _parse_field(value: Optional[str]) -> int:
+    """Parse a logged field value into an unsigned integer; (nil) and missing fields are 0"""
+    if not value:
+        return 0
+    try:
+        # Fast path for the usual 0x... and plain decimal notation
+        return int(value, 0) & _U64_MASK
+    except ValueError:
+        return parse_hex_or_int(value) & _U64_MASK
+
+
+def parse_parms(text: str) -> List[Dict]:
+    """Tokenize a call line into key=value trees in one pass
+
+    Nested blocks such as vidHeapControlParms={...} and AllocSize={...}
+    become nested dicts. The line is split at ' -> ', so a complete call
+    yields two trees: the parameters before the call and the result after it.
+    """
+    sides = [{}]
+    stack = [sides[0]]
+    for key, opened, value, closed, arrow in _PARM_TOKEN_RE.findall(text):
+        if value:
+            stack[-1][key] = value
+        elif opened:
+            block = {}
+            stack[-1][key] = block
+            stack.append(block)
+        elif closed:
+            if len(stack) > 1:
+                stack.pop()
+        else:
+            side = {}
+            sides.append(side)
+            stack = [side]
+    return sides
+
+
+def _parse_duration(value: Optional[str]) -> Optional[int]:
+    """Parse a 'duration=<N>ns' value"""
+    if not value or not value.endswith('ns') or not value[:-2].isdigit():
+        return None
+    return int(value[:-2])
+
+
+def _alloc_size_from_parms(params: Dict) -> AllocSize:
+    """Build an AllocSize from a tokenized AllocSize={...} block"""
+    return AllocSize(*map(_parse_field, map(params.get, ALLOC_SIZE_FIELDS)))
+
+
 def parse_alloc_size(alloc_str: str) -> AllocSize:
     """Parse AllocSize structure from string"""
-    # Remove 'AllocSize={' and trailing '}'
-    alloc_str = alloc_str.strip()
-    if alloc_str.startswith('AllocSize={'):
-        alloc_str = alloc_str[11:]
-    if alloc_str.endswith('}'):
-        alloc_str = alloc_str[:-1]
-    
-    # Parse key=value pairs
-    params = {}
-    # Use regex to handle complex values including (nil)
-    pattern = r'(\w+)=((?:\([^)]+\)|0x[0-9a-f]+|0|-?\d+))'
-    matches = re.finditer(pattern, alloc_str)
-    
-    for match in matches:
-        key, value = match.groups()
-        params[key] = value
-    
-    return AllocSize(
-        owner=params.get('owner', '0x0'),
-        hMemory=params.get('hMemory', '0x0'),
-        type=params.get('type', '0x0'),
-        flags=params.get('flags', '0x0'),
-        attr=params.get('attr', '0x0'),
-        format=params.get('format', '0x0'),
-        comprCovg=params.get('comprCovg', '0x0'),
-        zcullCovg=params.get('zcullCovg', '0x0'),
-        width=params.get('width', '0x0'),
-        height=params.get('height', '0x0'),
-        size=params.get('size', '0x0'),
-        alignment=params.get('alignment', '0x0'),
-        offset=params.get('offset', '0x0'),
-        limit=params.get('limit', '0x0'),
-        address=params.get('address', '(nil)'),
-        rangeBegin=params.get('rangeBegin', '0x0'),
-        rangeEnd=params.get('rangeEnd', '0x0'),
-        attr2=params.get('attr2', '0x0'),
-        ctagOffset=params.get('ctagOffset', '0x0'),
-        numaNode=params.get('numaNode', '0')
-    )
+    params = parse_parms(alloc_str)[0]
+    # Accept both 'AllocSize={...}' and the bare key=value list
+    params = params.get('AllocSize', params)
+    return _alloc_size_from_parms(params)
 
 
 def parse_vidheap_control_line(line: str, line_number: int) -> Optional[VidHeapControlCall]:
@@ -502,80 +854,51 @@ def parse_vidheap_control_line(line: str, line_number: int) -> Optional[VidHeapC
         return None
     
     try:
-        # Split into before -> after
-        parts = line.split(' -> ')
-        if len(parts) != 2:
-            return None
-        
-        before_part = parts[0]
-        after_part = parts[1]
-        
-        # Extract parameters from before part
         # Pattern: RM: vidHeapControl(vidHeapControlParms={...}, alloc=..., bl=...)
-        before_match = re.search(r'vidHeapControl\(vidHeapControlParms=\{([^}]+(?:\{[^}]+\})?[^}]*)\}, alloc=([^,]+), bl=([^)]+)\)', before_part)
-        if not before_match:
+        #          -> status=..., duration=...ns, vidHeapControlParms={...}
+        sides = parse_parms(line)
+        if len(sides) != 2:
             return None
+        before, after = sides
         
-        params_str = before_match.group(1)
-        alloc_ptr = before_match.group(2)
-        bl_ptr = before_match.group(3)
-        
-        # Extract main parameters
-        param_pattern = r'(\w+)=((?:0x[0-9a-f]+|0x0|\d+|AllocSize=\{[^}]+\}))'
-        main_params = {}
-        
-        # Find AllocSize first (it's a nested structure)
-        alloc_size_match = re.search(r'AllocSize=\{([^}]+)\}', params_str)
-        if alloc_size_match:
-            alloc_size_str = alloc_size_match.group(0)
-            alloc_size_before = parse_alloc_size(alloc_size_str)
-            # Remove AllocSize from params_str to parse other parameters
-            params_without_alloc = params_str.replace(alloc_size_str, '')
-        else:
+        main_params = before.get('vidHeapControlParms')
+        if not isinstance(main_params, dict) or 'alloc' not in before or 'bl' not in before:
             return None
-        
-        # Parse other parameters
-        for match in re.finditer(r'(\w+)=(0x[0-9a-f]+|0x0|\d+)', params_without_alloc):
-            key, value = match.groups()
-            main_params[key] = value
-        
-        # Extract after part
-        # Pattern: status=..., duration=...ns, vidHeapControlParms={...}
-        status_match = re.search(r'status=(0x[0-9a-f]+)', after_part)
-        duration_match = re.search(r'duration=(\d+)ns', after_part)
-        after_params_match = re.search(r'vidHeapControlParms=\{[^}]*AllocSize=\{([^}]+)\}', after_part)
-        
-        if not (status_match and duration_match):
+        alloc_size_before = main_params.get('AllocSize')
+        if not isinstance(alloc_size_before, dict):
             return None
+        alloc_size_before = _alloc_size_from_parms(alloc_size_before)
         
-        status_after = status_match.group(1)
-        duration_ns = int(duration_match.group(1))
+        after_params = after.get('vidHeapControlParms')
+        if not isinstance(after_params, dict):
+            after_params = {}
+        status_after = after.get('status') or after_params.get('status')
+        duration_ns = _parse_duration(after.get('duration'))
+        if not status_after or duration_ns is None:
+            return None
         
-        # Parse after AllocSize
-        if after_params_match:
-            # Find the full AllocSize in after part
-            after_alloc_match = re.search(r'AllocSize=\{([^}]+)\}', after_part)
-            if after_alloc_match:
-                alloc_size_after = parse_alloc_size(after_alloc_match.group(0))
-            else:
-                alloc_size_after = alloc_size_before
+        alloc_size_after = after_params.get('AllocSize')
+        if isinstance(alloc_size_after, dict):
+            alloc_size_after = _alloc_size_from_parms(alloc_size_after)
         else:
             alloc_size_after = alloc_size_before
         
+        alloc_ptr = before['alloc']
+        bl_ptr = before['bl']
         return VidHeapControlCall(
             line_number=line_number,
-            hRoot=main_params.get('hRoot', '0x0'),
-            hObjectParent=main_params.get('hObjectParent', '0x0'),
-            function=main_params.get('function', '0x0'),
-            hVASpace=main_params.get('hVASpace', '0x0'),
-            ivcHeapNumber=main_params.get('ivcHeapNumber', '0x0'),
-            status_before=main_params.get('status', '0x0'),
-            total=main_params.get('total', '0x0'),
-            free=main_params.get('free', '0x0'),
+            hRoot=_parse_field(main_params.get('hRoot')),
+            hObjectParent=_parse_field(main_params.get('hObjectParent')),
+            function=_parse_field(main_params.get('function')),
+            hVASpace=_parse_field(main_params.get('hVASpace')),
+            ivcHeapNumber=_parse_field(main_params.get('ivcHeapNumber')),
+            status_before=_parse_field(main_params.get('status')),
+            total=_parse_field(main_params.get('total')),
+            free=_parse_field(main_params.get('free')),
             alloc_size_before=alloc_size_before,
-            alloc_ptr=alloc_ptr if alloc_ptr != '(nil)' else None,
-            bl_ptr=bl_ptr if bl_ptr != '(nil)' else None,
-            status_after=status_after,
+            alloc_ptr=_parse_field(alloc_ptr) or None,
+            bl_ptr=_parse_field(bl_ptr) or None,
+            status_after=_parse_field(status_after),
             duration_ns=duration_ns,
             alloc_size_after=alloc_size_after
         )
@@ -591,62 +914,37 @@ def parse_mapmemory_dma_line(line: str, line_number: int) -> Optional[MapMemoryD
         return None
     
     try:
-        # Split into before -> after
-        parts = line.split(' -> ')
-        if len(parts) != 2:
+        # Pattern: RM: mapMemoryDma2(parms={...}) -> status=..., duration=...ns, parms={...}
+        sides = parse_parms(line)
+        if len(sides) != 2:
             return None
+        before, after = sides
         
-        before_part = parts[0]
-        after_part = parts[1]
-        
-        # Extract parameters from before part
-        # Pattern: RM: mapMemoryDma2(parms={...})
-        before_match = re.search(r'mapMemoryDma\d?\(parms=\{([^}]+)\}\)', before_part)
-        if not before_match:
+        params = before.get('parms')
+        after_params = after.get('parms')
+        if not isinstance(params, dict) or not isinstance(after_params, dict):
             return None
         
-        params_str = before_match.group(1)
-        
-        # Parse parameters
-        params = {}
-        param_pattern = r'(\w+)=(0x[0-9a-f]+|0x0|\d+)'
-        for match in re.finditer(param_pattern, params_str):
-            key, value = match.groups()
-            params[key] = value
-        
-        # Extract after part
-        status_match = re.search(r'status=(0x[0-9a-f]+)', after_part)
-        duration_match = re.search(r'duration=(\d+)ns', after_part)
-        after_params_match = re.search(r'parms=\{([^}]+)\}', after_part)
-        
-        if not (status_match and duration_match and after_params_match):
+        status = after.get('status')
+        duration_ns = _parse_duration(after.get('duration'))
+        if not status or duration_ns is None:
             return None
         
-        status = status_match.group(1)
-        duration_ns = int(duration_match.group(1))
-        
-        # Parse after parameters to get updated dmaOffset
-        after_params_str = after_params_match.group(1)
-        after_params = {}
-        for match in re.finditer(param_pattern, after_params_str):
-            key, value = match.groups()
-            after_params[key] = value
-        
         return MapMemoryDmaCall(
             line_number=line_number,
-            hClient=params.get('hClient', '0x0'),
-            hDevice=params.get('hDevice', '0x0'),
-            hDma=params.get('hDma', '0x0'),
-            hMemory=params.get('hMemory', '0x0'),
-            offset=params.get('offset', '0x0'),
-            length=params.get('length', '0x0'),
-            flags=params.get('flags', '0x0'),
-            flags2=params.get('flags2', '0x0'),
-            kindOverride=params.get('kindOverride', '0x0'),
-            dmaOffset_before=params.get('dmaOffset', '0x0'),
-            status=status,
+            hClient=_parse_field(params.get('hClient')),
+            hDevice=_parse_field(params.get('hDevice')),
+            hDma=_parse_field(params.get('hDma')),
+            hMemory=_parse_field(params.get('hMemory')),
+            offset=_parse_field(params.get('offset')),
+            length=_parse_field(params.get('length')),
+            flags=_parse_field(params.get('flags')),
+            flags2=_parse_field(params.get('flags2')),
+            kindOverride=_parse_field(params.get('kindOverride')),
+            dmaOffset_before=_parse_field(params.get('dmaOffset')),
+            status=_parse_field(status),
             duration_ns=duration_ns,
-            dmaOffset_after=after_params.get('dmaOffset', params.get('dmaOffset', '0x0'))
+            dmaOffset_after=_parse_field(after_params.get('dmaOffset', params.get('dmaOffset')))
         )
     
     except Exception as e:
@@ -660,43 +958,28 @@ def parse_dupobject_line(line: str, line_number: int) -> Optional[DupObjectCall]
         return None
     
     try:
-        # Split into before -> after
-        parts = line.split(' -> ')
-        if len(parts) != 2:
-            return None
-        
-        before_part = parts[0]
-        after_part = parts[1]
-        
-        # Extract parameters from before part
         # Pattern: RM: dupObject2(hClient=..., hParent=..., hObjectDest=..., hClientSrc=..., hObjectSrc=..., flags=...)
-        params = {}
-        param_pattern = r'(\w+)=(0x[0-9a-f]+|0x0|\d+|\(nil\))'
-        for match in re.finditer(param_pattern, before_part):
-            key, value = match.groups()
-            params[key] = value
-        
-        # Extract after part
-        status_match = re.search(r'status=(0x[0-9a-f]+)', after_part)
-        duration_match = re.search(r'duration=(\d+)ns', after_part)
-        dest_match = re.search(r'hObjectDest=(0x[0-9a-f]+)', after_part)
-        
-        if not (status_match and duration_match and dest_match):
+        #          -> status=..., duration=...ns, hObjectDest=...
+        sides = parse_parms(line)
+        if len(sides) != 2:
             return None
+        params, after = sides
         
-        status = status_match.group(1)
-        duration_ns = int(duration_match.group(1))
-        hObjectDest = dest_match.group(1)
+        status = after.get('status')
+        duration_ns = _parse_duration(after.get('duration'))
+        hObjectDest = after.get('hObjectDest')
+        if not status or duration_ns is None or not hObjectDest:
+            return None
         
         return DupObjectCall(
             line_number=line_number,
-            hClient=params.get('hClient', '0x0'),
-            hParent=params.get('hParent', '0x0'),
-            hClientSrc=params.get('hClientSrc', '0x0'),
-            hObjectSrc=params.get('hObjectSrc', '0x0'),
-            hObjectDest=hObjectDest,
-            flags=params.get('flags', '0x0'),
-            status=status,
+            hClient=_parse_field(params.get('hClient')),
+            hParent=_parse_field(params.get('hParent')),
+            hClientSrc=_parse_field(params.get('hClientSrc')),
+            hObjectSrc=_parse_field(params.get('hObjectSrc')),
+            hObjectDest=_parse_field(hObjectDest),
+            flags=_parse_field(params.get('flags')),
+            status=_parse_field(status),
             duration_ns=duration_ns
         )
     
@@ -716,37 +999,76 @@ def parse_hex_or_int(value_str: str) -> int:
         return 0
 
 
-def format_size(size_str: str) -> str:
+def format_size(size: int) -> str:
     """Format size in human-readable format"""
-    try:
-        if size_str.startswith('0x'):
-            size = int(size_str, 16)
-        else:
-            size = int(size_str)
-        
-        if size >= 1024*1024*1024:
-            return f"{size/(1024*1024*1024):.2f} GB ({size_str})"
-        elif size >= 1024*1024:
-            return f"{size/(1024*1024):.2f} MB ({size_str})"
-        elif size >= 1024:
-            return f"{size/1024:.2f} KB ({size_str})"
+    if size >= 1024*1024*1024:
+        return f"{size/(1024*1024*1024):.2f} GB ({hex(size)})"
+    elif size >= 1024*1024:
+        return f"{size/(1024*1024):.2f} MB ({hex(size)})"
+    elif size >= 1024:
+        return f"{size/1024:.2f} KB ({hex(size)})"
+    else:
+        return f"{size} B ({hex(size)})"
+
+
+class AliasMap(dict):
+    """Map from alias handles (hObjectDest) to the original handle they resolve to
+
+    Aliases are added in line order and stored already resolved: a dup of a
+    dup points straight at the original, as the union-find root with full
+    path compression, so resolving is one dict lookup however deep the dup
+    chain. A handle that is freed or allocated again leaves the map, so a
+    reused handle number never resolves through a stale alias.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.added = 0
+
+    def add(self, alias: int, source: int):
+        """Record a successful dupObject of source as alias"""
+        self.added += 1
+        root = self.get(source, source)
+        if root == alias:
+            self.pop(alias, None)
         else:
-            return f"{size} B ({size_str})"
-    except:
-        return size_str
+            self[alias] = root
+
+    def resolve(self, handle: int) -> int:
+        """Return the original handle behind an alias, or the handle itself"""
+        return self.get(handle, handle)
+
+    def discard(self, handle: int):
+        """Forget a handle that was freed or now names a new allocation"""
+        self.pop(handle, None)
+
 
+def build_alias_map(dupobject_calls: DupObjectStore, vidheap_calls: VidHeapStore = None) -> AliasMap:
+    """Build a map from alias handles (hObjectDest) to their original handles
 
-def build_alias_map(dupobject_calls: List[DupObjectCall]) -> Dict[str, str]:
-    """Build a map from alias handles (hObjectDest) to source handles (hObjectSrc)"""
-    alias_map = {}
-    for call in dupobject_calls:
-        if call.status == '0x0':  # Only track successful dupObject calls
-            alias_map[call.hObjectDest] = call.hObjectSrc
+    With vidheap_calls, successful NVOS32 FREEs and allocations are applied
+    in line order so that reused handle numbers drop their old alias.
+    """
+    alias_map = AliasMap()
+    stores = {'dupobject': dupobject_calls}
+    if vidheap_calls is not None:
+        stores['vidheap'] = vidheap_calls
+        functions, statuses, h_memories = (vidheap_calls.column(name)
+                                           for name in ('function', 'status_after', 'after_hMemory'))
+    dup_statuses, h_dests, h_srcs = (dupobject_calls.column(name) for name in ('status', 'hObjectDest', 'hObjectSrc'))
+    for _, kind, row in iter_line_order(stores):
+        if kind == 'dupobject':
+            if dup_statuses[row] == 0:  # Only track successful dupObject calls
+                alias_map.add(h_dests[row], h_srcs[row])
+        elif statuses[row] == 0 and (functions[row] == NVOS32_FUNCTION_FREE or functions[row] in NVOS32_ALLOC_FUNCTIONS):
+            alias_map.discard(h_memories[row])
     return alias_map
 
 
-def resolve_alias(handle: str, alias_map: Dict[str, str]) -> str:
+def resolve_alias(handle: int, alias_map: Dict[int, int]) -> int:
     """Resolve a handle through the alias chain to get the original handle"""
+    if isinstance(alias_map, AliasMap):
+        return alias_map.resolve(handle)
     seen = set()
     current = handle
     while current in alias_map:
@@ -758,29 +1080,144 @@ def resolve_alias(handle: str, alias_map: Dict[str, str]) -> str:
     return current
 
 
-def build_allocation_map(vidheap_calls: List[VidHeapControlCall], alias_map: Dict[str, str]) -> Dict[str, VidHeapControlCall]:
-    """Build a map from hMemory handles (including aliases) to their allocation calls"""
-    alloc_map = {}
-    
-    # First, build map for original allocations
-    for call in vidheap_calls:
-        h_memory = call.alloc_size_after.hMemory
-        if h_memory and h_memory != '0x0':
-            alloc_map[h_memory] = call
+class AllocationMap:
+    """Generation-tagged index from hMemory handles (including aliases) to allocation rows of a VidHeapStore
+
+    Every allocation, dup and FREE of a handle starts a new generation at its
+    line, so a handle number reused later in the log does not replace the
+    earlier allocation: lookups with a line return the generation live at
+    that line. Generations sit in flat arrays sorted by (handle, line) and
+    are found with bisect; only row indices are kept, and get()
+    materializes the allocation on demand.
+    """
+    FREED = -1
+
+    def __init__(self, store: VidHeapStore):
+        self.store = store
+        self.handles = array('Q')
+        self.lines = array('Q')
+        self.rows = array('q')
+        self.starts: Optional[Dict[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __contains__(self, handle: int) -> bool:
+        return handle in self._index()
+
+    def add(self, handle: int, line_number: int, row: int):
+        """Start a generation of handle at line_number; row is FREED when the handle was freed
+
+        Generations must be added in line order.
+        """
+        self.handles.append(handle)
+        self.lines.append(line_number)
+        self.rows.append(row)
+        self.starts = None
+
+    def _index(self) -> Dict[int, int]:
+        """Sort the generations by handle once after adding and map each handle to its first one"""
+        if self.starts is None:
+            # A stable sort by handle keeps each handle's generations in line order
+            if np is not None:
+                handles = _as_uint64(self.handles)
+                order = np.argsort(handles, kind='stable')
+                handles = handles[order]
+                self.lines = array('Q', _as_uint64(self.lines)[order].tobytes())
+                self.rows = array('q', np.frombuffer(self.rows, dtype=np.int64)[order].tobytes())
+                self.handles = array('Q', handles.tobytes())
+                first_handles, first_indices = np.unique(handles, return_index=True)
+                self.starts = dict(zip(first_handles.tolist(), first_indices.tolist()))
+                return self.starts
+            order = sorted(range(len(self.handles)), key=self.handles.__getitem__)
+            self.handles = array('Q', (self.handles[i] for i in order))
+            self.lines = array('Q', (self.lines[i] for i in order))
+            self.rows = array('q', (self.rows[i] for i in order))
+            self.starts = {}
+            for i in range(len(self.handles) - 1, -1, -1):
+                self.starts[self.handles[i]] = i
+        return self.starts
+
+    def _span(self, handle: int) -> Optional[tuple[int, int]]:
+        """Return the [start, end) range of a handle's generations, or None"""
+        start = self._index().get(handle)
+        if start is None:
+            return None
+        return start, bisect.bisect_right(self.handles, handle, start)
+
+    def row(self, handle: int, line_number: int = None) -> Optional[int]:
+        """Return the store row of the allocation behind a handle at a line (default: end of log)"""
+        span = self._span(handle)
+        if span is None:
+            return None
+        start, end = span
+        if line_number is None:
+            i = end - 1
+        else:
+            i = bisect.bisect_right(self.lines, line_number, start, end) - 1
+            if i < start:
+                return None
+        row = self.rows[i]
+        return None if row == self.FREED else row
+
+    def get(self, handle: int, line_number: int = None) -> Optional[VidHeapControlCall]:
+        """Return the allocation call behind a handle at a line (default: end of log)"""
+        row = self.row(handle, line_number)
+        return None if row is None else self.store[row]
+
+
+def lookup_allocation(alloc_map, handle: int, line_number: int) -> Optional[VidHeapControlCall]:
+    """Return the allocation behind a handle at a line from an AllocationMap or a dict of live allocations"""
+    if isinstance(alloc_map, AllocationMap):
+        return alloc_map.get(handle, line_number)
+    return alloc_map.get(handle)
+
+
+def build_allocation_map(vidheap_calls: VidHeapStore, dupobject_calls: DupObjectStore) -> AllocationMap:
+    """Build a map from hMemory handles (including aliases) to their allocation calls
+
+    Successful allocations, dups and NVOS32 FREEs are replayed in line
+    order, so each alias gets the allocation its source handle had at the
+    dup's line and generations are added in line order.
+    """
+    alloc_map = AllocationMap(vidheap_calls)
+    stores = {'vidheap': vidheap_calls, 'dupobject': dupobject_calls}
+    dup_statuses, h_dests, h_srcs = (dupobject_calls.column(name) for name in ('status', 'hObjectDest', 'hObjectSrc'))
+    functions, statuses, h_memories = (vidheap_calls.column(name) for name in ('function', 'status_after', 'after_hMemory'))
     
-    # Then, add entries for all aliases
-    for alias_handle, source_handle in alias_map.items():
-        # Resolve the source handle through any alias chain
-        original_handle = resolve_alias(source_handle, alias_map)
-        if original_handle in alloc_map:
-            alloc_map[alias_handle] = alloc_map[original_handle]
+    live: Dict[int, int] = {}
+    aliases = AliasMap()
+    for line_number, kind, row in iter_line_order(stores):
+        if kind == 'vidheap':
+            h_memory = h_memories[row]
+            if statuses[row] != 0 or not h_memory:
+                continue
+            if functions[row] in NVOS32_ALLOC_FUNCTIONS:
+                live[h_memory] = row
+                aliases.discard(h_memory)
+                alloc_map.add(h_memory, line_number, row)
+            elif functions[row] == NVOS32_FUNCTION_FREE and live.pop(h_memory, None) is not None:
+                aliases.discard(h_memory)
+                alloc_map.add(h_memory, line_number, AllocationMap.FREED)
+        elif dup_statuses[row] == 0:
+            aliases.add(h_dests[row], h_srcs[row])
+            # live holds aliases too, so the source stays valid after the handle it was duped from is freed
+            source_row = live.get(h_srcs[row])
+            if source_row is None:
+                source_row = live.get(aliases.resolve(h_srcs[row]))
+            if source_row is not None:
+                live[h_dests[row]] = source_row
+                alloc_map.add(h_dests[row], line_number, source_row)
     
     return alloc_map
 
 
-def find_related_allocations(mapmemory_call: MapMemoryDmaCall, alloc_map: Dict[str, VidHeapControlCall], alias_map: Dict[str, str] = None) -> tuple[Optional[VidHeapControlCall], Optional[VidHeapControlCall], Optional[str], Optional[str]]:
+def find_related_allocations(mapmemory_call: MapMemoryDmaCall, alloc_map: AllocationMap, alias_map: Dict[int, int] = None) -> tuple[Optional[VidHeapControlCall], Optional[VidHeapControlCall], Optional[int], Optional[int]]:
     """Find related allocations for a mapMemoryDma call
     
+    Handles resolve to the allocation live at the mapping's line. alloc_map
+    may also be a plain dict of live handle -> allocation call.
+    
     Returns:
         (alloc_from_hMemory, alloc_from_hDma, resolved_hMemory, resolved_hDma)
         resolved handles show the original handle if found via alias, None if direct match
@@ -788,8 +1225,8 @@ def find_related_allocations(mapmemory_call: MapMemoryDmaCall, alloc_map: Dict[s
     if alias_map is None:
         alias_map = {}
     
-    alloc_from_hmemory = alloc_map.get(mapmemory_call.hMemory)
-    alloc_from_hdma = alloc_map.get(mapmemory_call.hDma)
+    alloc_from_hmemory = lookup_allocation(alloc_map, mapmemory_call.hMemory, mapmemory_call.line_number)
+    alloc_from_hdma = lookup_allocation(alloc_map, mapmemory_call.hDma, mapmemory_call.line_number)
     
     # Check if handles were resolved via aliases
     resolved_hmemory = None
@@ -802,462 +1239,3452 @@ def find_related_allocations(mapmemory_call: MapMemoryDmaCall, alloc_map: Dict[s
         resolved_hdma = resolve_alias(mapmemory_call.hDma, alias_map)
     
     # Avoid returning the same allocation twice
-    if alloc_from_hmemory and alloc_from_hdma and alloc_from_hmemory == alloc_from_hdma:
+    if alloc_from_hmemory and alloc_from_hdma and alloc_from_hmemory.line_number == alloc_from_hdma.line_number:
         return alloc_from_hmemory, None, resolved_hmemory, None
     
     return alloc_from_hmemory, alloc_from_hdma, resolved_hmemory, resolved_hdma
 
 
-def process_rmlog(filename: str) -> tuple[List[VidHeapControlCall], List[MapMemoryDmaCall], List[DupObjectCall]]:
-    """Process the rmlog file and extract all vidHeapControl, mapMemoryDma, and dupObject calls"""
-    vidheap_calls = []
-    mapmemory_calls = []
-    dupobject_calls = []
-    
-    with open(filename, 'r') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.split('#', 1)[0]
-            line_stripped = line.strip()
-            
-            # Try parsing as vidHeapControl
-            vidheap_call = parse_vidheap_control_line(line_stripped, line_num)
-            if vidheap_call:
-                vidheap_calls.append(vidheap_call)
-                continue
+# Call names recognized by the line classifier, in the order the old trial
+# parsers were tried. Plain substring tests are used rather than a regex
+# alternation: CPython's re tries the alternation at every offset, while `in`
+# is a single fast C scan per needle, which matters when almost every line of
+# the log is unrelated RM traffic.
+CALL_KINDS = ('vidheap', 'mapmemory', 'dupobject')
+CALL_STORES = {
+    'vidheap': VidHeapStore,
+    'mapmemory': MapMemoryStore,
+    'dupobject': DupObjectStore,
+}
+_CALL_NEEDLES = (
+    ('vidHeapControl', 'vidheap'),
+    ('mapMemoryDma', 'mapmemory'),
+    ('dupObject', 'dupobject'),
+)
+_CALL_PARSERS = {
+    'vidheap': parse_vidheap_control_line,
+    'mapmemory': parse_mapmemory_dma_line,
+    'dupobject': parse_dupobject_line,
+}
+
+
+def classify_line(line: str) -> Optional[str]:
+    """Return the call kind of an rmlog line, or None if it is not a tracked call
+
+    Text after '#' is a comment and never classifies a line.
+    """
+    if '#' in line:
+        line = line.split('#', 1)[0]
+    for needle, kind in _CALL_NEEDLES:
+        if needle in line:
+            return kind
+    return None
+
+
+def parse_line(line: str, line_number: int):
+    """Classify and parse one rmlog line
+
+    Returns:
+        (kind, call) for a parsed call, None for anything else
+    """
+    kind = classify_line(line)
+    if kind is None:
+        return None
+    line = line.split('#', 1)[0].strip()
+    call = _CALL_PARSERS[kind](line, line_number)
+    if call is None:
+        return None
+    return kind, call
+
+
+# Byte needles for the mmap scanner; only lines containing one are decoded
+_CALL_NEEDLES_BYTES = tuple(needle.encode() for needle, _ in _CALL_NEEDLES)
+# Bytes of the mapping copied out and searched at a time
+_SCAN_WINDOW = 64 * 1024 * 1024
+
+
+def _open_rmlog_mmap(f) -> Optional[mmap.mmap]:
+    """Map an rmlog read-only, or return None for an empty file"""
+    if os.fstat(f.fileno()).st_size == 0:
+        return None
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+
+def new_call_stores() -> Dict[str, CallStore]:
+    """Return one empty store per call kind"""
+    return {kind: store_type() for kind, store_type in CALL_STORES.items()}
+
+
+def store_sinks(stores: Dict[str, CallStore]) -> Dict[str, Callable]:
+    """Return scanner sinks that append each call kind to its store"""
+    return {kind: store.append for kind, store in stores.items()}
+
+
+def _scan_rmlog_range(mm: mmap.mmap, start: int, end: int, sinks: Dict[str, Callable], line_base: int = 0,
+                      offsets: Dict[str, array] = None) -> int:
+    """Parse the calls in bytes [start, end) of a mapped rmlog, passing each to sinks[kind]
+
+    start must be at a line start. The line at start is numbered
+    line_base + 1, and only lines containing a call name are decoded and parsed.
+    With offsets, the byte offset of each call's line is appended to offsets[kind].
+
+    Returns:
+        the number of lines in the range
+    """
+    needles = _CALL_NEEDLES_BYTES
+    line_num = line_base + 1
+    pos = start
+    while pos < end:
+        # Cut the window at a newline so no line straddles two windows
+        win_end = min(end, pos + _SCAN_WINDOW)
+        if win_end < end:
+            newline = mm.rfind(b'\n', pos, win_end)
+            if newline == -1:
+                newline = mm.find(b'\n', win_end, end)
+            win_end = end if newline == -1 else newline + 1
+        window = mm[pos:win_end]
+        
+        # Next occurrence of each needle; refreshed only once it falls behind
+        hits = [window.find(needle) for needle in needles]
+        cursor = 0
+        while True:
+            found = [hit for hit in hits if hit != -1]
+            if not found:
+                break
+            hit = min(found)
+            line_start = window.rfind(b'\n', 0, hit) + 1
+            line_end = window.find(b'\n', hit)
+            if line_end == -1:
+                line_end = len(window)
+            line_num += window.count(b'\n', cursor, line_start)
+            cursor = line_start
             
-            # Try parsing as mapMemoryDma
-            mapmemory_call = parse_mapmemory_dma_line(line_stripped, line_num)
-            if mapmemory_call:
-                mapmemory_calls.append(mapmemory_call)
-                continue
+            parsed = parse_line(window[line_start:line_end].decode('utf-8', errors='replace'), line_num)
+            if parsed:
+                kind, call = parsed
+                sinks[kind](call)
+                if offsets is not None:
+                    offsets[kind].append(pos + line_start)
             
-            # Try parsing as dupObject
-            dupobject_call = parse_dupobject_line(line_stripped, line_num)
-            if dupobject_call:
-                dupobject_calls.append(dupobject_call)
+            for i, needle in enumerate(needles):
+                if hits[i] != -1 and hits[i] < line_end:
+                    hits[i] = window.find(needle, line_end)
+        
+        line_num += window.count(b'\n', cursor)
+        pos = win_end
     
-    return vidheap_calls, mapmemory_calls, dupobject_calls
+    # A final line without a trailing newline still counts
+    if end > start and mm[end - 1:end] != b'\n':
+        line_num += 1
+    return line_num - 1 - line_base
 
 
-def print_summary(calls: List[VidHeapControlCall]):
-    """Print summary statistics for vidHeapControl calls"""
-    print(f"\n{'='*80}")
-    print(f"VidHeapControl Summary")
-    print(f"{'='*80}")
-    print(f"Total calls: {len(calls)}")
+def split_rmlog_chunks(filename: str, num_chunks: int, start: int = 0) -> List[tuple[int, int]]:
+    """Split a file from byte start on into about num_chunks (start, end) byte ranges aligned to line starts"""
+    file_size = os.path.getsize(filename)
+    if file_size <= start:
+        return []
+    chunk_size = max(1, (file_size - start) // max(1, num_chunks))
+    bounds = [start]
+    with open(filename, 'rb') as f:
+        while bounds[-1] < file_size:
+            f.seek(min(bounds[-1] + chunk_size, file_size))
+            # Move to the start of the next line
+            f.readline()
+            bounds.append(min(f.tell(), file_size))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_rmlog_chunk(task: tuple[str, int, int, Optional[str]]) -> tuple[Dict[str, CallStore], int]:
+    """Worker: parse one byte range, with line numbers relative to the range
+
+    Calls not matching the task's --where expression, if any, are dropped
+    before they are stored.
+    """
+    filename, start, end, where = task
+    results = new_call_stores()
+    sinks = store_sinks(results)
+    if where:
+        sinks = compile_record_filter(where).wrap_sinks(sinks)
+    with open(filename, 'rb') as f:
+        mm = _open_rmlog_mmap(f)
+        if mm is None:
+            return results, 0
+        with mm:
+            line_count = _scan_rmlog_range(mm, start, end, sinks)
+    return results, line_count
+
+
+def _parse_rmlog_chunk_by_client(task: tuple[str, int, int, Optional[str]]) -> tuple[Dict[str, CallStore], 'ClientBreakdown', int]:
+    """Worker: like _parse_rmlog_chunk, also aggregating the chunk's calls per client"""
+    results, line_count = _parse_rmlog_chunk(task)
+    clients = ClientBreakdown()
+    clients.add_columns(results)
+    return results, clients, line_count
+
+
+def _index_rmlog_chunk(task: tuple[str, int, int, Optional[str]]) -> tuple[Dict[str, CallStore], Dict[str, array], int]:
+    """Worker: like _parse_rmlog_chunk (without filtering), also returning the byte offset of every call per kind"""
+    filename, start, end, _ = task
+    results = new_call_stores()
+    offsets = {kind: array('Q') for kind in CALL_KINDS}
+    with open(filename, 'rb') as f:
+        mm = _open_rmlog_mmap(f)
+        if mm is None:
+            return results, offsets, 0
+        with mm:
+            line_count = _scan_rmlog_range(mm, start, end, store_sinks(results), offsets=offsets)
+    return results, offsets, line_count
+
+
+# Upper bound on the bytes handed to one worker task; keeps per-chunk results
+# small when they are streamed
+_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _rmlog_chunk_tasks(filename: str, jobs: int, start: int = 0, where: str = None) -> List[tuple[str, int, int, Optional[str]]]:
+    """Return the (filename, start, end, where) worker tasks for the rmlog from byte start on"""
+    file_size = os.path.getsize(filename)
+    # Several chunks per worker keep the pool busy when call density varies
+    num_chunks = max(jobs * 4, -(-(file_size - start) // _CHUNK_BYTES))
+    return [(filename, chunk_start, chunk_end, where)
+            for chunk_start, chunk_end in split_rmlog_chunks(filename, num_chunks, start)]
+
+
+def iter_rmlog_chunks(filename: str, jobs: int = 1, start: int = 0, line_base: int = 0,
+                      where: str = None) -> Iterator[tuple[Dict[str, CallStore], int]]:
+    """Parse an rmlog chunk by chunk, in file order, from byte start (a line start) on
+
+    With where, only the calls matching that --where expression are kept.
+
+    Yields:
+        (stores, line_base): the calls of one newline-aligned chunk, with
+        line numbers relative to the chunk, and the number of lines before it
+    """
+    tasks = _rmlog_chunk_tasks(filename, jobs, start, where)
+    if jobs <= 1:
+        for task in tasks:
+            stores, line_count = _parse_rmlog_chunk(task)
+            yield stores, line_base
+            line_base += line_count
+        return
+    with mp.Pool(processes=jobs) as pool:
+        # imap keeps chunk order, so merged results stay sorted by line number
+        for stores, line_count in pool.imap(_parse_rmlog_chunk, tasks):
+            yield stores, line_base
+            line_base += line_count
+
+
+def iter_line_order(stores: Dict[str, Optional[CallStore]]):
+    """Yield (line_number, kind, row) over several stores, merged in line order
+
+    Each store is already sorted by line number, so this is a lazy merge and
+    taking the first N calls does not touch the rest.
+    """
+    def rows(kind, store):
+        for row, line_number in enumerate(store.column('line_number')):
+            yield line_number, kind, row
     
-    # Calculate total allocated size
-    total_allocated = 0
-    successful_allocs = 0
-    failed_allocs = 0
+    return heapq.merge(*(rows(kind, store) for kind, store in stores.items() if store))
+
+
+def iter_rmlog_calls(filename: str, jobs: int = 1, where: str = None) -> Iterator[tuple[str, object]]:
+    """Yield (kind, call) for every call in the rmlog (matching where, if given), in line order
+
+    Only one chunk of parsed calls per worker is held at a time.
+    """
+    for stores, line_base in iter_rmlog_chunks(filename, jobs, where=where):
+        for _, kind, row in iter_line_order(stores):
+            call = stores[kind][row]
+            call.line_number += line_base
+            yield kind, call
+
+
+def parse_rmlog_into(results: Dict[str, CallStore], filename: str, jobs: int = 1, start: int = 0, line_base: int = 0,
+                     offsets: Dict[str, array] = None, where: str = None,
+                     clients: 'ClientBreakdown' = None) -> tuple[int, int]:
+    """Append the calls from byte start (a line start) to the end of the rmlog to results
+
+    Lines are numbered from line_base + 1 at start. With offsets, the byte
+    offset of every call's line is appended to offsets[kind] as well. With
+    where, only calls matching that --where expression are appended. With
+    clients, the appended calls are also aggregated per client: as they are
+    scanned, or by every worker for its chunks, merged as they come back.
+
+    Returns:
+        (line_count, end): the number of lines parsed and the byte offset
+        parsing stopped at, which is behind the file size if the log grew meanwhile
+    """
+    if jobs <= 1:
+        with open(filename, 'rb') as f:
+            mm = _open_rmlog_mmap(f)
+            if mm is None:
+                return 0, start
+            with mm:
+                sinks = store_sinks(results)
+                if clients is not None:
+                    sinks = clients.wrap_sinks(sinks)
+                if where:
+                    sinks = compile_record_filter(where).wrap_sinks(sinks)
+                return _scan_rmlog_range(mm, start, len(mm), sinks, line_base, offsets), len(mm)
     
-    for call in calls:
-        if call.status_after == '0x0':
-            successful_allocs += 1
-            try:
-                size_str = call.alloc_size_after.size
-                if size_str.startswith('0x'):
-                    size = int(size_str, 16)
-                else:
-                    size = int(size_str)
-                total_allocated += size
-            except:
-                pass
+    tasks = _rmlog_chunk_tasks(filename, jobs, start, where)
+    line_end = line_base
+    with mp.Pool(processes=jobs) as pool:
+        if offsets is not None:
+            chunks = pool.imap(_index_rmlog_chunk, tasks)
+        elif clients is not None:
+            chunks = pool.imap(_parse_rmlog_chunk_by_client, tasks)
         else:
-            failed_allocs += 1
+            chunks = ((stores, None, line_count) for stores, line_count in pool.imap(_parse_rmlog_chunk, tasks))
+        for stores, chunk_extra, line_count in chunks:
+            if clients is not None:
+                clients.merge(chunk_extra)
+            for kind, store in stores.items():
+                results[kind].extend(store, line_end)
+                if offsets is not None:
+                    offsets[kind].extend(chunk_extra[kind])
+            line_end += line_count
+    return line_end - line_base, tasks[-1][2] if tasks else start
+
+
+def process_rmlog(filename: str, jobs: int = 1, where: str = None,
+                  clients: 'ClientBreakdown' = None) -> tuple[VidHeapStore, MapMemoryStore, DupObjectStore]:
+    """Process the rmlog file and extract all vidHeapControl, mapMemoryDma, and dupObject calls
+
+    The log is memory-mapped and scanned as bytes; lines that mention none
+    of the tracked calls are never decoded. With jobs > 1 the file is split
+    into newline-aligned byte ranges that are parsed in a process pool;
+    results are identical to the serial path. With where, calls that do not
+    match the --where expression are dropped as they are parsed. With
+    clients, the calls are aggregated per client while they are parsed.
+    """
+    results = new_call_stores()
+    parse_rmlog_into(results, filename, jobs, where=where, clients=clients)
+    return results['vidheap'], results['mapmemory'], results['dupobject']
+
+
+# Parsed-rmlog cache: a JSON header line followed by the raw bytes of every
+# store column, in CALL_KINDS and COLUMNS order
+RMLOG_CACHE_SUFFIX = '.vhcache'
+_CACHE_FORMAT = 'process-vidheap-cache/1'
+# Bytes hashed at each end of the cached part of the log
+_CACHE_SAMPLE_BYTES = 1024 * 1024
+
+
+def rmlog_fingerprint(filename: str, size: int) -> str:
+    """Hash the first size bytes of a file by their head and tail samples
+
+    Size and mtime catch almost every rewrite; the sampled hash guards
+    against a regenerated log of the same size and checks that an appended
+    log still starts with the cached bytes, without re-reading the whole file.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(filename, 'rb') as f:
+        digest.update(f.read(min(size, _CACHE_SAMPLE_BYTES)))
+        if size > _CACHE_SAMPLE_BYTES:
+            f.seek(max(_CACHE_SAMPLE_BYTES, size - _CACHE_SAMPLE_BYTES))
+            digest.update(f.read(size - f.tell()))
+    return digest.hexdigest()
+
+
+def _ends_with_newline(filename: str, size: int) -> bool:
+    """Check that the first size bytes of a file end at a line boundary"""
+    if size == 0:
+        return True
+    with open(filename, 'rb') as f:
+        f.seek(size - 1)
+        return f.read(1) == b'\n'
+
+
+def load_rmlog_cache(cache_file: str) -> Optional[tuple[Dict, Dict[str, CallStore]]]:
+    """Read a parsed-rmlog cache, or return None if it is missing or unreadable
+
+    Returns:
+        (header, stores)
+    """
+    try:
+        with open(cache_file, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('format') != _CACHE_FORMAT or header.get('byteorder') != sys.byteorder:
+                return None
+            stores = new_call_stores()
+            for kind in CALL_KINDS:
+                rows = header['rows'][kind]
+                for column in stores[kind]._column_list:
+                    column.fromfile(f, rows)
+            return header, stores
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, EOFError) as e:
+        print(f"Ignoring rmlog cache {cache_file}: {e}", file=sys.stderr)
+        return None
+
+
+def save_rmlog_cache(cache_file: str, header: Dict, stores: Dict[str, CallStore]):
+    """Write a parsed-rmlog cache atomically; failures only print a warning"""
+    header = dict(header, format=_CACHE_FORMAT, byteorder=sys.byteorder,
+                  rows={kind: len(stores[kind]) for kind in CALL_KINDS})
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(json.dumps(header).encode() + b'\n')
+            for kind in CALL_KINDS:
+                for column in stores[kind]._column_list:
+                    column.tofile(f)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        print(f"Could not write rmlog cache {cache_file}: {e}", file=sys.stderr)
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def process_rmlog_cached(filename: str, jobs: int = 1, cache_file: str = None) -> tuple[VidHeapStore, MapMemoryStore, DupObjectStore]:
+    """process_rmlog backed by an on-disk cache of the parsed stores next to the log
+
+    An unchanged log (same size, mtime and fingerprint) is loaded without
+    parsing. A log that has only grown, and whose cached part ended at a
+    line boundary, is parsed from the cached size on and the cache extended.
+    Anything else is parsed from scratch and the cache rewritten.
+    """
+    cache_file = cache_file or filename + RMLOG_CACHE_SUFFIX
+    stat = os.stat(filename)
+    cached = load_rmlog_cache(cache_file)
     
-    print(f"Successful allocations: {successful_allocs}")
-    print(f"Failed allocations: {failed_allocs}")
-    print(f"Total memory allocated: {format_size(hex(total_allocated))}")
+    if cached is not None:
+        header, stores = cached
+        size = header.get('size', -1)
+        if (size == stat.st_size and header.get('mtime_ns') == stat.st_mtime_ns
+                and header.get('fingerprint') == rmlog_fingerprint(filename, size)):
+            print(f"Loaded parsed calls from {cache_file}")
+            return stores['vidheap'], stores['mapmemory'], stores['dupobject']
+        
+        if (0 <= size < stat.st_size and _ends_with_newline(filename, size)
+                and header.get('fingerprint') == rmlog_fingerprint(filename, size)):
+            print(f"Extending {cache_file} with {stat.st_size - size} appended bytes")
+            new_lines, size = parse_rmlog_into(stores, filename, jobs, size, header['line_count'])
+            line_count = header['line_count'] + new_lines
+        else:
+            cached = None
     
-    # Average duration
-    avg_duration = sum(call.duration_ns for call in calls) / len(calls) if calls else 0
-    print(f"Average duration: {avg_duration:.0f} ns ({avg_duration/1000:.2f} µs)")
+    if cached is None:
+        stores = new_call_stores()
+        line_count, size = parse_rmlog_into(stores, filename, jobs)
     
-    # Min/Max duration
-    if calls:
-        min_duration = min(call.duration_ns for call in calls)
-        max_duration = max(call.duration_ns for call in calls)
-        print(f"Min duration: {min_duration} ns ({min_duration/1000:.2f} µs)")
-        print(f"Max duration: {max_duration} ns ({max_duration/1000:.2f} µs)")
+    # size is where parsing stopped; a log that grew meanwhile is extended next time
+    save_rmlog_cache(cache_file, {
+        'size': size,
+        'mtime_ns': stat.st_mtime_ns,
+        'fingerprint': rmlog_fingerprint(filename, size),
+        'line_count': line_count,
+    }, stores)
+    return stores['vidheap'], stores['mapmemory'], stores['dupobject']
 
 
-def print_mapmemory_summary(calls: List[MapMemoryDmaCall]):
-    """Print summary statistics for mapMemoryDma calls"""
-    print(f"\n{'='*80}")
-    print(f"MapMemoryDma Summary")
-    print(f"{'='*80}")
-    print(f"Total calls: {len(calls)}")
-    
-    # Calculate total mapped size
-    total_mapped = 0
-    successful_maps = 0
-    failed_maps = 0
+# Sidecar index for random access to the calls of an rmlog: a JSON header
+# line padded to 8 bytes, followed by 8-byte aligned sections of raw array
+# data in RMLOG_INDEX_SECTIONS order. Sections are used straight from an mmap.
+RMLOG_INDEX_SUFFIX = '.vhindex'
+_INDEX_FORMAT = 'process-vidheap-index/1'
+# Section name -> array typecode
+RMLOG_INDEX_SECTIONS = {
+    # One row per call, in line order
+    'call_kind': 'B',
+    'call_line': 'Q',
+    'call_offset': 'Q',
+    # (handle, call row) for every handle a call names, sorted by handle
+    'handle_keys': 'Q',
+    'handle_rows': 'Q',
+    # AllocationMap generations sorted by (handle, line), rows being call rows
+    'alloc_handles': 'Q',
+    'alloc_lines': 'Q',
+    'alloc_rows': 'q',
+    # AliasMap at the end of the log, sorted by alias
+    'alias_keys': 'Q',
+    'alias_roots': 'Q',
+}
+# Store columns holding the handles a call is found by with --handle
+_INDEX_HANDLE_COLUMNS = {
+    'vidheap': ('after_hMemory',),
+    'mapmemory': ('hMemory', 'hDma'),
+    'dupobject': ('hObjectSrc', 'hObjectDest'),
+}
+
+
+def _sorted_pairs(keys: array, values: array, key_code: str = 'Q', value_code: str = 'Q') -> tuple[array, array]:
+    """Sort two parallel columns by key, stably"""
+    if np is not None and key_code == 'Q':
+        order = np.argsort(np.frombuffer(keys, dtype=np.uint64), kind='stable')
+        return (array(key_code, np.frombuffer(keys, dtype=np.uint64)[order].tobytes()),
+                array(value_code, np.frombuffer(values, dtype=np.dtype(value_code))[order].tobytes()))
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return array(key_code, (keys[i] for i in order)), array(value_code, (values[i] for i in order))
+
+
+def build_rmlog_index(filename: str, jobs: int = 1) -> tuple[Dict, Dict[str, array]]:
+    """Parse an rmlog once and build its sidecar index sections
+
+    Returns:
+        (header, sections)
+    """
+    stat = os.stat(filename)
+    stores = new_call_stores()
+    offsets = {kind: array('Q') for kind in CALL_KINDS}
+    line_count, size = parse_rmlog_into(stores, filename, jobs, offsets=offsets)
+    vidheap_calls, dupobject_calls = stores['vidheap'], stores['dupobject']
+    alias_map = build_alias_map(dupobject_calls, vidheap_calls)
+    alloc_map = build_allocation_map(vidheap_calls, dupobject_calls)
     
-    for call in calls:
-        if call.status == '0x0':
-            successful_maps += 1
-            try:
-                length_str = call.length
-                if length_str.startswith('0x'):
-                    length = int(length_str, 16)
-                else:
-                    length = int(length_str)
-                total_mapped += length
-            except:
-                pass
-        else:
-            failed_maps += 1
+    sections = {name: array(code) for name, code in RMLOG_INDEX_SECTIONS.items()}
+    call_rows = {kind: array('Q') for kind in CALL_KINDS}
+    for line_number, kind, row in iter_line_order(stores):
+        call_rows[kind].append(len(sections['call_line']))
+        sections['call_kind'].append(CALL_KINDS.index(kind))
+        sections['call_line'].append(line_number)
+        sections['call_offset'].append(offsets[kind][row])
+    
+    handle_keys = array('Q')
+    handle_rows = array('Q')
+    for kind, columns in _INDEX_HANDLE_COLUMNS.items():
+        for column in columns:
+            handle_keys.extend(stores[kind].column(column))
+            handle_rows.extend(call_rows[kind])
+    sections['handle_keys'], sections['handle_rows'] = _sorted_pairs(handle_keys, handle_rows)
+    
+    alloc_map._index()
+    vidheap_rows = call_rows['vidheap']
+    sections['alloc_handles'] = alloc_map.handles
+    sections['alloc_lines'] = alloc_map.lines
+    sections['alloc_rows'] = array('q', (row if row == AllocationMap.FREED else vidheap_rows[row]
+                                         for row in alloc_map.rows))
+    for alias, root in sorted(alias_map.items()):
+        sections['alias_keys'].append(alias)
+        sections['alias_roots'].append(root)
+    
+    header = {
+        'size': size,
+        'mtime_ns': stat.st_mtime_ns,
+        'fingerprint': rmlog_fingerprint(filename, size),
+        'line_count': line_count,
+        'allocation_map_entries': len(alloc_map),
+        'aliases': alias_map.added,
+    }
+    return header, sections
+
+
+def save_rmlog_index(index_file: str, header: Dict, sections: Dict[str, array]):
+    """Write a sidecar index atomically; failures only print a warning"""
+    header = dict(header, format=_INDEX_FORMAT, byteorder=sys.byteorder,
+                  lengths={name: len(section) for name, section in sections.items()})
+    line = json.dumps(header).encode()
+    line += b' ' * (-(len(line) + 1) % 8) + b'\n'
+    temp_file = f"{index_file}.{os.getpid()}.tmp"
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(line)
+            for name in RMLOG_INDEX_SECTIONS:
+                data = sections[name].tobytes()
+                f.write(data + b'\0' * (-len(data) % 8))
+        os.replace(temp_file, index_file)
+    except OSError as e:
+        print(f"Could not write rmlog index {index_file}: {e}", file=sys.stderr)
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+class SortedMapping:
+    """Read-only mapping over two parallel columns sorted by key, looked up with bisect"""
+
+    def __init__(self, keys, values):
+        self.keys = keys
+        self.values = values
+
+    def _find(self, key: int) -> int:
+        i = bisect.bisect_left(self.keys, key)
+        return i if i < len(self.keys) and self.keys[i] == key else -1
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: int) -> bool:
+        return self._find(key) != -1
+
+    def __getitem__(self, key: int) -> int:
+        i = self._find(key)
+        if i == -1:
+            raise KeyError(key)
+        return self.values[i]
+
+    def get(self, key: int, default=None):
+        i = self._find(key)
+        return default if i == -1 else self.values[i]
+
+
+class IndexedAllocationMap(AllocationMap):
+    """AllocationMap over the generations stored in an RmlogIndex
+
+    Rows are call rows of the index, and the allocation call is parsed from
+    its line when it is looked up.
+    """
+
+    def __init__(self, index: 'RmlogIndex'):
+        self.store = index
+        self.handles = index.sections['alloc_handles']
+        self.lines = index.sections['alloc_lines']
+        self.rows = index.sections['alloc_rows']
+        self.entries = index.header['allocation_map_entries']
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def __contains__(self, handle: int) -> bool:
+        return self._span(handle) is not None
+
+    def _span(self, handle: int) -> Optional[tuple[int, int]]:
+        start = bisect.bisect_left(self.handles, handle)
+        if start == len(self.handles) or self.handles[start] != handle:
+            return None
+        return start, bisect.bisect_right(self.handles, handle, start)
+
+
+class RmlogIndex:
+    """An rmlog's sidecar index, mapped read-only
+
+    Calls are found by line range or handle with bisect over the mapped
+    sections and parsed from their lines on demand, so a lookup costs the
+    same however long the log is. Holds the mapping and the open rmlog
+    until close(); use it as a context manager.
+    """
+
+    def __init__(self, filename: str, header: Dict, mm: mmap.mmap, data_start: int):
+        self.filename = filename
+        self.header = header
+        self.mm = mm
+        self.sections = {}
+        self.view = view = memoryview(mm)
+        pos = data_start
+        for name, code in RMLOG_INDEX_SECTIONS.items():
+            size = header['lengths'][name] * array(code).itemsize
+            self.sections[name] = view[pos:pos + size].cast(code)
+            pos += size + (-size % 8)
+        self.alias_map = SortedMapping(self.sections['alias_keys'], self.sections['alias_roots'])
+        self.alloc_map = IndexedAllocationMap(self)
+        self.rmlog = open(filename, 'rb')
+
+    def __len__(self) -> int:
+        return len(self.sections['call_line'])
+
+    def __enter__(self) -> 'RmlogIndex':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the section views, the mapping and the rmlog"""
+        if self.mm.closed:
+            return
+        # The mapping cannot be closed while views of it are alive
+        for section in self.sections.values():
+            section.release()
+        self.view.release()
+        self.mm.close()
+        self.rmlog.close()
+
+    def rows_in_lines(self, first: int = None, last: int = None) -> range:
+        """Call rows on lines first..last (inclusive; None for open ends)"""
+        lines = self.sections['call_line']
+        start = 0 if first is None else bisect.bisect_left(lines, first)
+        end = len(lines) if last is None else bisect.bisect_right(lines, last)
+        return range(start, end)
+
+    def rows_for_handle(self, handle: int) -> List[int]:
+        """Call rows naming a handle, in line order"""
+        keys = self.sections['handle_keys']
+        start = bisect.bisect_left(keys, handle)
+        end = bisect.bisect_right(keys, handle, start)
+        return sorted(self.sections['handle_rows'][start:end])
+
+    def kind(self, row: int) -> str:
+        return CALL_KINDS[self.sections['call_kind'][row]]
+
+    def call(self, row: int):
+        """Parse the call of a row from its line in the rmlog"""
+        self.rmlog.seek(self.sections['call_offset'][row])
+        line = self.rmlog.readline().decode('utf-8', errors='replace')
+        parsed = parse_line(line, self.sections['call_line'][row])
+        return None if parsed is None else parsed[1]
+
+    __getitem__ = call
+
+
+def open_rmlog_index(filename: str, jobs: int = 1, index_file: str = None) -> RmlogIndex:
+    """Map the sidecar index of an rmlog, building or rebuilding it first when missing or stale"""
+    index_file = index_file or filename + RMLOG_INDEX_SUFFIX
+    stat = os.stat(filename)
+    for attempt in range(2):
+        try:
+            with open(index_file, 'rb') as f:
+                header = json.loads(f.readline())
+                data_start = f.tell()
+                if (header.get('format') == _INDEX_FORMAT and header.get('byteorder') == sys.byteorder
+                        and header.get('size') == stat.st_size and header.get('mtime_ns') == stat.st_mtime_ns
+                        and header.get('fingerprint') == rmlog_fingerprint(filename, stat.st_size)):
+                    return RmlogIndex(filename, header, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), data_start)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring rmlog index {index_file}: {e}", file=sys.stderr)
+        if attempt == 0:
+            print(f"Indexing {filename} into {index_file}...")
+            save_rmlog_index(index_file, *build_rmlog_index(filename, jobs))
+    raise RuntimeError(f"could not create the rmlog index {index_file}")
+
+
+class CallSummary:
+    """Running count, byte and latency statistics for one call type
+
+    Updated one call at a time, so the same numbers can be produced from a
+    store or while streaming.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.successful = 0
+        self.total_bytes = 0
+        self.duration_total = 0
+        self.duration_min = None
+        self.duration_max = None
+
+    def add(self, status: int, size: int, duration_ns: int):
+        """Account one call; size only counts for successful calls"""
+        self.calls += 1
+        if status == 0:
+            self.successful += 1
+            self.total_bytes += size
+        self.duration_total += duration_ns
+        if self.duration_min is None or duration_ns < self.duration_min:
+            self.duration_min = duration_ns
+        if self.duration_max is None or duration_ns > self.duration_max:
+            self.duration_max = duration_ns
+
+    def add_columns(self, statuses: array, sizes: array, durations: array):
+        """Account every call of a store from its columns"""
+        for status, size, duration_ns in zip(statuses, sizes, durations):
+            self.add(status, size, duration_ns)
+
+    def merge(self, other: 'CallSummary'):
+        """Add the counts of another summary"""
+        self.calls += other.calls
+        self.successful += other.successful
+        self.total_bytes += other.total_bytes
+        self.duration_total += other.duration_total
+        if other.calls:
+            self.duration_min = other.duration_min if self.duration_min is None else min(self.duration_min, other.duration_min)
+            self.duration_max = other.duration_max if self.duration_max is None else max(self.duration_max, other.duration_max)
+
+    @property
+    def failed(self) -> int:
+        return self.calls - self.successful
+
+    @property
+    def duration_avg(self) -> float:
+        return self.duration_total / self.calls if self.calls else 0
+
+
+class LatencyHistogram:
+    """HDR-style log-bucketed histogram of durations in ns
+
+    Values below 2**SUB_BUCKET_BITS get exact buckets; above that every power
+    of two is split into 2**(SUB_BUCKET_BITS - 1) linear buckets, so a
+    percentile is reported within 1/64 of the true value while memory stays
+    a few thousand buckets at most, however many durations are added.
+    """
+    SUB_BUCKET_BITS = 7
+    PERCENTILES = (50, 90, 99, 99.9)
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value: int):
+        """Account one duration"""
+        shift = value.bit_length() - self.SUB_BUCKET_BITS
+        index = ((shift << self.SUB_BUCKET_BITS) + (value >> shift)) if shift > 0 else value
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add the counts of another histogram"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def _bucket_max(self, index: int) -> int:
+        """Highest value that falls into a bucket"""
+        shift = (index >> self.SUB_BUCKET_BITS) if index >= (1 << self.SUB_BUCKET_BITS) else 0
+        if shift == 0:
+            return index
+        mantissa = index - (shift << self.SUB_BUCKET_BITS)
+        return ((mantissa + 1) << shift) - 1
+
+    def percentile(self, percent: float) -> Optional[int]:
+        """Return the value at or below which percent of the durations fall"""
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self._bucket_max(index), self.max)
+        return self.max
+
+
+# Latency breakdowns: (name, column names, function from those column values
+# to a raw group key, function from a raw group key to its label). Groups are
+# keyed by raw bitfield values while streaming and decoded only for the report.
+VIDHEAP_LATENCY_GROUPS = (
+    ('function', ('function',), lambda function: function, decode_function),
+    ('type', ('after_type',), lambda mem_type: mem_type, decode_type),
+    ('page_size', ('after_attr',), lambda attr: extract_bitfield(attr, 24, 23),
+     lambda page: decode_attr(page << 23)['page_size']),
+    ('location', ('after_attr',), lambda attr: extract_bitfield(attr, 26, 25),
+     lambda loc: decode_attr(loc << 25)['location']),
+)
+MAPMEMORY_LATENCY_GROUPS = (
+    ('page_size', ('flags',), lambda flags: extract_bitfield(flags, 11, 8),
+     lambda page: decode_nvos46_flags(page << 8)['page_size']),
+)
+
+
+class LatencyBreakdown:
+    """Latency histograms for one call type, overall and per group"""
+
+    def __init__(self, groups: tuple):
+        self.groups = groups
+        self.overall = LatencyHistogram()
+        self.by_group: Dict[str, Dict[int, LatencyHistogram]] = {name: {} for name, _, _, _ in groups}
+
+    def add(self, duration_ns: int, values: Dict[str, int]):
+        """Account one call; values holds the columns named by the groups"""
+        self.overall.add(duration_ns)
+        for name, columns, key_of, _ in self.groups:
+            histograms = self.by_group[name]
+            key = key_of(*(values[column] for column in columns))
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = LatencyHistogram()
+            histogram.add(duration_ns)
+
+    def add_columns(self, store: CallStore):
+        """Account every call of a store from its columns"""
+        names = sorted({column for _, columns, _, _ in self.groups for column in columns})
+        for duration_ns, *row in zip(store.column('duration_ns'), *(store.column(name) for name in names)):
+            self.add(duration_ns, dict(zip(names, row)))
+
+    def merge(self, other: 'LatencyBreakdown'):
+        """Add the histograms of another breakdown over the same groups"""
+        self.overall.merge(other.overall)
+        for name, histograms in other.by_group.items():
+            mine = self.by_group[name]
+            for key, histogram in histograms.items():
+                mine.setdefault(key, LatencyHistogram()).merge(histogram)
+
+
+def print_latency_breakdown(title: str, breakdown: LatencyBreakdown):
+    """Print percentile tables (in µs) for a LatencyBreakdown"""
+    print(f"\n{'='*80}")
+    print(f"{title} Latency (µs)")
+    print(f"{'='*80}")
+    header = ''.join(f"{'p' + format(p, 'g'):>10}" for p in LatencyHistogram.PERCENTILES)
+    print(f"{'group':<34}{'calls':>10}{header}{'max':>10}")
     
-    print(f"Successful mappings: {successful_maps}")
-    print(f"Failed mappings: {failed_maps}")
-    print(f"Total memory mapped: {format_size(hex(total_mapped))}")
+    def row(label: str, histogram: LatencyHistogram):
+        values = ''.join(f"{histogram.percentile(p)/1000:>10.2f}" for p in LatencyHistogram.PERCENTILES)
+        print(f"{label:<34}{histogram.count:>10}{values}{histogram.max/1000:>10.2f}")
+    
+    if not breakdown.overall.count:
+        return
+    row('all', breakdown.overall)
+    for name, _, _, label_of in breakdown.groups:
+        histograms = breakdown.by_group[name]
+        for key in sorted(histograms, key=lambda key: histograms[key].count, reverse=True):
+            row(f"{name}={label_of(key)}", histograms[key])
+
+
+def print_call_summary(title: str, summary: CallSummary, noun: str, verb: str):
+    """Print a CallSummary; noun/verb name the operation, e.g. 'allocations'/'allocated'"""
+    print(f"\n{'='*80}")
+    print(f"{title} Summary")
+    print(f"{'='*80}")
+    print(f"Total calls: {summary.calls}")
+    print(f"Successful {noun}: {summary.successful}")
+    print(f"Failed {noun}: {summary.failed}")
+    print(f"Total memory {verb}: {format_size(summary.total_bytes)}")
     
     # Average duration
-    avg_duration = sum(call.duration_ns for call in calls) / len(calls) if calls else 0
+    avg_duration = summary.duration_avg
     print(f"Average duration: {avg_duration:.0f} ns ({avg_duration/1000:.2f} µs)")
     
-    # Min/Max duration
-    if calls:
-        min_duration = min(call.duration_ns for call in calls)
-        max_duration = max(call.duration_ns for call in calls)
-        print(f"Min duration: {min_duration} ns ({min_duration/1000:.2f} µs)")
-        print(f"Max duration: {max_duration} ns ({max_duration/1000:.2f} µs)")
+    # Min/Max duration
+    if summary.calls:
+        min_duration = summary.duration_min
+        max_duration = summary.duration_max
+        print(f"Min duration: {min_duration} ns ({min_duration/1000:.2f} µs)")
+        print(f"Max duration: {max_duration} ns ({max_duration/1000:.2f} µs)")
+
+
+def print_summary(calls: VidHeapStore):
+    """Print summary statistics for vidHeapControl calls"""
+    summary = CallSummary()
+    summary.add_columns(calls.column('status_after'), calls.column('after_size'), calls.column('duration_ns'))
+    print_call_summary('VidHeapControl', summary, 'allocations', 'allocated')
+    print_allocation_breakdown(allocation_breakdown(calls))
+    latency = LatencyBreakdown(VIDHEAP_LATENCY_GROUPS)
+    latency.add_columns(calls)
+    print_latency_breakdown('VidHeapControl', latency)
+
+
+# attr fields that successful allocations are grouped by in the summary
+ALLOCATION_BREAKDOWN_FIELDS = ('location', 'page_size', 'compr')
+
+
+def allocation_breakdown(calls: VidHeapStore, names=ALLOCATION_BREAKDOWN_FIELDS) -> Dict[str, Dict[int, tuple[int, int]]]:
+    """Group the successful allocations of a store by attr fields
+
+    Returns:
+        {field: {code: (allocations, bytes)}}
+    """
+    statuses = calls.column('status_after')
+    functions = calls.column('function')
+    if np is not None:
+        selected = ((_as_uint64(statuses) == 0)
+                    & np.isin(_as_uint64(functions), np.array(sorted(NVOS32_ALLOC_FUNCTIONS), dtype=np.uint64)))
+        attrs = _as_uint64(calls.column('after_attr'))[selected]
+        sizes = _as_uint64(calls.column('after_size'))[selected]
+    else:
+        rows = [status == 0 and function in NVOS32_ALLOC_FUNCTIONS for status, function in zip(statuses, functions)]
+        attrs = [attr for attr, row in zip(calls.column('after_attr'), rows) if row]
+        sizes = [size for size, row in zip(calls.column('after_size'), rows) if row]
+    codes = decode_bitfield_columns(attrs, NVOS32_ATTR_BITFIELDS, names)
+    return {name: count_by_code(codes[name], sizes) for name in names}
+
+
+class AllocationBreakdown:
+    """allocation_breakdown for calls that arrive one at a time
+
+    Successful allocations are buffered as attr and size columns, and every
+    BATCH_ROWS of them are decoded with decode_bitfield_columns and counted
+    with count_by_code, so streaming keeps the column-wise decode and holds
+    one batch at most.
+    """
+    BATCH_ROWS = 64 * 1024
+
+    def __init__(self, names=ALLOCATION_BREAKDOWN_FIELDS):
+        self.names = names
+        self.groups: Dict[str, Dict[int, tuple[int, int]]] = {name: {} for name in names}
+        self.attrs = array('Q')
+        self.sizes = array('Q')
+
+    def add(self, function: int, status: int, attr: int, size: int):
+        """Account one vidHeapControl call"""
+        if status == 0 and function in NVOS32_ALLOC_FUNCTIONS:
+            self.attrs.append(attr)
+            self.sizes.append(size)
+            if len(self.attrs) >= self.BATCH_ROWS:
+                self.flush()
+
+    def flush(self):
+        """Count the buffered allocations into groups"""
+        if not self.attrs:
+            return
+        codes = decode_bitfield_columns(self.attrs, NVOS32_ATTR_BITFIELDS, self.names)
+        for name in self.names:
+            groups = self.groups[name]
+            for code, (count, total) in count_by_code(codes[name], self.sizes).items():
+                previous_count, previous_total = groups.get(code, (0, 0))
+                groups[code] = (previous_count + count, previous_total + total)
+        # New buffers: NumPy views may still reference the old ones
+        self.attrs = array('Q')
+        self.sizes = array('Q')
+
+    def result(self) -> Dict[str, Dict[int, tuple[int, int]]]:
+        """Return {field: {code: (allocations, bytes)}} like allocation_breakdown"""
+        self.flush()
+        return self.groups
+
+
+def print_allocation_breakdown(breakdown: Dict[str, Dict[int, tuple[int, int]]]):
+    """Print successful allocations grouped by attr location, page size and compression"""
+    print("\nSuccessful allocations by attr:")
+    for name, groups in breakdown.items():
+        for code, (count, total) in sorted(groups.items(), key=lambda group: (-group[1][1], group[0])):
+            print(f"  {name + '=' + bitfield_label('attr', name, code):<34}{count:>10}  {format_size(total)}")
+
+
+def _call_column_getter(column: str) -> Callable[[VidHeapControlCall], int]:
+    """Return a function reading a VidHeapStore column from a VidHeapControlCall"""
+    if column.startswith('after_'):
+        name = column[len('after_'):]
+        return lambda call: getattr(call.alloc_size_after, name)
+    if column.startswith('before_'):
+        name = column[len('before_'):]
+        return lambda call: getattr(call.alloc_size_before, name)
+    return lambda call: getattr(call, column) or 0
+
+
+def resolve_group_field(name: str) -> tuple[str, Optional[tuple[int, int]], Callable[[int], str]]:
+    """Resolve a --group-by field name to (store column, bitfield or None, label function)
+
+    Accepts function, type, flags, the decode_attr/decode_attr2 field names
+    (optionally prefixed attr. or attr2.), and any VidHeapStore column or
+    AllocSize field, which are grouped by raw value.
+    """
+    if name == 'function':
+        return 'function', None, decode_function
+    if name == 'type':
+        return 'after_type', None, decode_type
+    if name == 'flags':
+        return 'after_flags', None, lambda flags: '|'.join(decode_flags(flags)) or 'NONE'
+    prefix, _, field = name.rpartition('.')
+    for column in ('attr', 'attr2'):
+        bitfields = BITFIELD_DECODERS[column][0]
+        if prefix in ('', column) and field in bitfields:
+            return 'after_' + column, bitfields[field], lambda code, column=column: bitfield_label(column, field, code)
+    if name == 'status':
+        name = 'status_after'
+    elif name in ALLOC_SIZE_FIELDS:
+        name = 'after_' + name
+    if name in VidHeapStore.COLUMNS:
+        return name, None, hex
+    raise ValueError(f"unknown --group-by field '{name}'")
+
+
+class GroupByAggregator:
+    """Hash aggregation of vidHeapControl calls by a list of decoded fields
+
+    Groups are keyed by the tuple of raw field codes; each keeps its call
+    count, successful allocations with their bytes, and a latency
+    histogram. Codes are named only when the table is printed.
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.fields = [resolve_group_field(name) for name in names]
+        self.getters = [_call_column_getter(column) for column, _, _ in self.fields]
+        self.groups: Dict[tuple, list] = {}
+
+    def _add(self, key: tuple, status: int, function: int, size: int, duration_ns: int):
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = [0, 0, 0, LatencyHistogram()]
+        group[0] += 1
+        if status == 0 and function in NVOS32_ALLOC_FUNCTIONS:
+            group[1] += 1
+            group[2] += size
+        group[3].add(duration_ns)
+
+    def add(self, call: VidHeapControlCall):
+        """Account one call"""
+        key = tuple(getter(call) if bitfield is None else extract_bitfield(getter(call), *bitfield)
+                    for getter, (_, bitfield, _) in zip(self.getters, self.fields))
+        self._add(key, call.status_after, call.function, call.alloc_size_after.size, call.duration_ns)
+
+    def add_columns(self, calls: VidHeapStore):
+        """Account every call of a store in one pass over its columns"""
+        key_columns = []
+        for column, bitfield, _ in self.fields:
+            values = calls.column(column)
+            if bitfield is not None:
+                values = decode_bitfield_columns(values, {column: bitfield})[column]
+                if np is not None:
+                    values = values.tolist()
+            key_columns.append(values)
+        for key, status, function, size, duration_ns in zip(zip(*key_columns), calls.column('status_after'),
+                                                            calls.column('function'), calls.column('after_size'),
+                                                            calls.column('duration_ns')):
+            self._add(key, status, function, size, duration_ns)
+
+
+def print_group_by(aggregator: GroupByAggregator):
+    """Print one row per group, largest total allocation first"""
+    print(f"\n{'='*80}")
+    print(f"VidHeapControl grouped by {', '.join(aggregator.names)}")
+    print(f"{'='*80}")
+    rows = []
+    for key, (calls, allocations, total, histogram) in sorted(
+            aggregator.groups.items(), key=lambda group: (group[1][2], group[1][0]), reverse=True):
+        labels = [label_of(code) for code, (_, _, label_of) in zip(key, aggregator.fields)]
+        average = format_size(total // allocations).split(' (')[0] if allocations else '-'
+        latencies = [f"{histogram.percentile(p)/1000:.2f}" for p in LatencyHistogram.PERCENTILES]
+        rows.append(labels + [str(calls), str(allocations), format_size(total).split(' (')[0], average]
+                    + latencies + [f"{histogram.max/1000:.2f}"])
+    header = (aggregator.names + ['calls', 'allocs', 'total size', 'avg size']
+              + ['p' + format(p, 'g') + ' µs' for p in LatencyHistogram.PERCENTILES] + ['max µs'])
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+    label_count = len(aggregator.names)
+    for row in [header] + rows:
+        print('  '.join(cell.ljust(width) if i < label_count else cell.rjust(width)
+                        for i, (cell, width) in enumerate(zip(row, widths))))
+
+
+# --where expressions: comparisons of call fields joined by and/or/not, e.g.
+# "size >= 64MiB and location == VIDMEM and status != 0x0". Numbers take
+# size (KiB..TiB, 1024-based) and time (ns, us, ms, s; in ns) suffixes.
+_FILTER_TOKEN_RE = re.compile(r"""\s*(?:
+    (?P<number>(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?)(?:[A-Za-zµ]+)?)
+    |(?P<operator>==|!=|<=|>=|&&|\|\||[=<>!()])
+    |'(?P<quoted>[^']*)'|"(?P<dquoted>[^"]*)"
+    |(?P<name>[A-Za-z_][\w.]*)
+    )""", re.VERBOSE)
+FILTER_UNITS = {
+    '': 1, 'b': 1,
+    'k': 1 << 10, 'kb': 1 << 10, 'kib': 1 << 10,
+    'm': 1 << 20, 'mb': 1 << 20, 'mib': 1 << 20,
+    'g': 1 << 30, 'gb': 1 << 30, 'gib': 1 << 30,
+    't': 1 << 40, 'tb': 1 << 40, 'tib': 1 << 40,
+    'ns': 1, 'us': 1000, 'µs': 1000, 'ms': 1000 ** 2, 's': 1000 ** 3,
+}
+_FILTER_KEYWORDS = {'and': 'and', '&&': 'and', 'or': 'or', '||': 'or', 'not': 'not', '!': 'not'}
+_FILTER_COMPARISONS = {'==': '==', '=': '==', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+# Comparison with its operands swapped, for "64MiB <= size"
+_FILTER_MIRRORED = {'==': '==', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+# Negated comparison, for pushing "not" down to the comparisons
+_FILTER_NEGATED = {'==': '!=', '!=': '==', '<': '>=', '<=': '>', '>': '<=', '>=': '<'}
+# Field names shared by every call kind
+_FILTER_ALIASES = {'duration': 'duration_ns', 'line': 'line_number'}
+# Raw columns whose values have names, as {NAME: code}
+_FILTER_VALUE_NAMES = {
+    'function': {name.upper(): code for code, name in NVOS32_FUNCTION.items()},
+    'after_type': {name.upper(): code for code, name in NVOS32_TYPE.items()},
+}
+
+
+def _filter_number(text: str) -> Optional[Fraction]:
+    """Exact value of a number token with an optional unit suffix, or None if the suffix is unknown"""
+    number = re.match(r'0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?', text).group()
+    unit = FILTER_UNITS.get(text[len(number):].lower())
+    if unit is None:
+        return None
+    if number[:2].lower() == '0x':
+        return Fraction(int(number, 16) * unit)
+    return Fraction(number) * unit
+
+
+def _filter_integer_comparison(op: str, value: Fraction) -> tuple[str, int]:
+    """Rewrite a comparison with an exact value as the same comparison of integer fields with an integer"""
+    if value.denominator == 1:
+        return op, int(value)
+    if op in ('>=', '<'):
+        return op, math.ceil(value)
+    if op in ('>', '<='):
+        return op, math.floor(value)
+    # No integer equals a fraction: == never holds and != always does
+    return ('<', 0) if op == '==' else ('>=', 0)
+
+
+class _FilterParser:
+    """Recursive-descent parser from a --where expression to a tree of tuples
+
+    ('or', [nodes]), ('and', [nodes]), ('not', node) and
+    ('cmp', op, field, (number or None, text)).
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = []
+        pos = 0
+        expression = expression.rstrip()
+        while pos < len(expression):
+            match = _FILTER_TOKEN_RE.match(expression, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"cannot parse --where at '{expression[pos:].strip()}'")
+            kind = match.lastgroup
+            text = match.group(kind)
+            if kind == 'name' and text.lower() in _FILTER_KEYWORDS:
+                kind, text = 'operator', text.lower()
+            elif kind == 'dquoted':
+                kind = 'quoted'
+            self.tokens.append((kind, text))
+            pos = match.end()
+        self.pos = 0
+
+    def parse(self):
+        node = self._or()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"unexpected '{self.tokens[self.pos][1]}' in --where")
+        return node
+
+    def _peek(self) -> tuple[Optional[str], Optional[str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _next(self) -> tuple[str, str]:
+        if self.pos == len(self.tokens):
+            raise ValueError(f"--where ends early: '{self.expression}'")
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+    def _joined(self, keyword: str, operand):
+        nodes = [operand()]
+        while self._peek()[0] == 'operator' and _FILTER_KEYWORDS.get(self._peek()[1]) == keyword:
+            self.pos += 1
+            nodes.append(operand())
+        return nodes[0] if len(nodes) == 1 else (keyword, nodes)
+
+    def _or(self):
+        return self._joined('or', self._and)
+
+    def _and(self):
+        return self._joined('and', self._not)
+
+    def _not(self):
+        kind, text = self._peek()
+        if kind == 'operator' and _FILTER_KEYWORDS.get(text) == 'not':
+            self.pos += 1
+            return ('not', self._not())
+        if kind == 'operator' and text == '(':
+            self.pos += 1
+            node = self._or()
+            if self._next() != ('operator', ')'):
+                raise ValueError("missing ')' in --where")
+            return node
+        return self._comparison()
+
+    def _comparison(self):
+        left = self._next()
+        kind, op = self._next()
+        if kind != 'operator' or op not in _FILTER_COMPARISONS:
+            raise ValueError(f"expected a comparison after '{left[1]}' in --where, got '{op}'")
+        op = _FILTER_COMPARISONS[op]
+        right = self._next()
+        if left[0] != 'name':
+            if right[0] != 'name':
+                raise ValueError(f"--where comparison '{left[1]} {op} {right[1]}' names no field")
+            left, right, op = right, left, _FILTER_MIRRORED[op]
+        if right[0] == 'operator':
+            raise ValueError(f"expected a value after '{left[1]} {op}' in --where")
+        value = _filter_number(right[1]) if right[0] == 'number' else None
+        if value is not None:
+            op, value = _filter_integer_comparison(op, value)
+        return ('cmp', op, left[1], (value, right[1]))
+
+
+def _filter_push_not(node, negate: bool = False):
+    """Return a --where tree without 'not' nodes, negating the comparisons below them instead
+
+    With De Morgan's laws a negated and/or becomes an or/and of negated
+    operands, so a comparison on a missing field can stay false under not.
+    """
+    if node[0] == 'not':
+        return _filter_push_not(node[1], not negate)
+    if node[0] in ('and', 'or'):
+        keyword = {'and': 'or', 'or': 'and'}[node[0]] if negate else node[0]
+        return (keyword, [_filter_push_not(child, negate) for child in node[1]])
+    if not negate:
+        return node
+    _, op, name, operand = node
+    return ('cmp', _FILTER_NEGATED[op], name, operand)
+
+
+def resolve_filter_field(kind: str, name: str) -> Optional[tuple[str, Optional[tuple[int, int]], Optional[Dict[str, int]]]]:
+    """Resolve a --where field for one call kind
+
+    vidHeapControl fields are the --group-by fields; the other kinds take
+    their raw columns, size (mapMemoryDma length) and, for mapMemoryDma,
+    the NVOS46 flags/flags2 field names (optionally prefixed flags.).
+
+    Returns:
+        (store column, bitfield or None, {value NAME: code} or None), or None
+        when the kind has no such field
+    """
+    name = _FILTER_ALIASES.get(name, name)
+    if kind == 'vidheap':
+        try:
+            column, bitfield, label_of = resolve_group_field(name)
+        except ValueError:
+            return None
+    else:
+        if kind == 'mapmemory' and name == 'size':
+            name = 'length'
+        prefix, _, field = name.rpartition('.')
+        for column, (decoder, _) in COLUMNAR_BITFIELD_COLUMNS[kind].items():
+            bitfields = BITFIELD_DECODERS[decoder][0]
+            if prefix in ('', column) and field in bitfields:
+                bitfield = bitfields[field]
+                label_of = lambda code, decoder=decoder: bitfield_label(decoder, field, code)
+                break
+        else:
+            if name not in CALL_STORES[kind].COLUMNS:
+                return None
+            return name, None, None
+    if bitfield is not None:
+        names = {label_of(code).upper(): code for code in range(1 << (bitfield[0] - bitfield[1] + 1))}
+    else:
+        names = _FILTER_VALUE_NAMES.get(column)
+    return column, bitfield, names
+
+
+def _filter_field_source(kind: str, column: str) -> str:
+    """Python expression reading a store column from a parsed call named call"""
+    if kind == 'vidheap':
+        for prefix, attribute in (('after_', 'alloc_size_after'), ('before_', 'alloc_size_before')):
+            if column.startswith(prefix):
+                return f"call.{attribute}.{column[len(prefix):]}"
+        if column in ('alloc_ptr', 'bl_ptr'):
+            return f"(call.{column} or 0)"
+    return f"call.{column}"
+
+
+class RecordFilter:
+    """A --where expression compiled for every call kind
+
+    The expression is parsed once. For each kind it becomes a Python lambda
+    over parsed calls, used to drop calls as they are scanned, and it can
+    be evaluated as NumPy masks over the columns of a whole store.
+    Comparisons on a field a call kind does not have are false; 'not' is
+    pushed down to the comparisons first, so they stay false under it.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tree = _filter_push_not(_FilterParser(expression).parse())
+        self.fields = {kind: {} for kind in CALL_KINDS}
+        self._resolve(self.tree)
+        self.predicates = {kind: eval(f"lambda call: {self._source(kind, self.tree)}", {})
+                           for kind in CALL_KINDS}
+
+    def _resolve(self, node):
+        """Resolve every field and value of the tree once per kind, rejecting unknown ones"""
+        if node[0] in ('and', 'or'):
+            for child in node[1]:
+                self._resolve(child)
+        else:
+            _, _, name, (number, text) = node
+            resolved = {kind: resolve_filter_field(kind, name) for kind in CALL_KINDS}
+            if not any(resolved.values()):
+                raise ValueError(f"unknown --where field '{name}'")
+            for kind, field in resolved.items():
+                if field is None:
+                    continue
+                column, bitfield, names = field
+                value = names.get(text.upper()) if names else None
+                if value is None:
+                    value = number
+                if value is None:
+                    raise ValueError(f"unknown value '{text}' for --where field '{name}'")
+                self.fields[kind][node] = (column, bitfield, value)
+
+    def _source(self, kind: str, node) -> str:
+        if node[0] in ('and', 'or'):
+            return '(' + f' {node[0]} '.join(self._source(kind, child) for child in node[1]) + ')'
+        field = self.fields[kind].get(node)
+        if field is None:
+            return 'False'
+        column, bitfield, value = field
+        source = _filter_field_source(kind, column)
+        if bitfield is not None:
+            high, low = bitfield
+            source = f"(({source} >> {low}) & {(1 << (high - low + 1)) - 1})"
+        return f"({source} {node[1]} {value})"
+
+    def matches(self, kind: str, call) -> bool:
+        return self.predicates[kind](call)
+
+    def wrap_sinks(self, sinks: Dict[str, Callable]) -> Dict[str, Callable]:
+        """Return scanner sinks that pass on only the calls matching the expression"""
+        def wrap(sink, predicate):
+            def add(call):
+                if predicate(call):
+                    sink(call)
+            return add
+        return {kind: wrap(sink, self.predicates[kind]) for kind, sink in sinks.items()}
+
+    def mask(self, kind: str, store: CallStore):
+        """Evaluate the expression over a whole store: a bool per row"""
+        if np is None:
+            return [self.predicates[kind](call) for call in store]
+        return self._mask(kind, store, self.tree)
+
+    def _mask(self, kind: str, store: CallStore, node):
+        if node[0] == 'and':
+            return np.logical_and.reduce([self._mask(kind, store, child) for child in node[1]])
+        if node[0] == 'or':
+            return np.logical_or.reduce([self._mask(kind, store, child) for child in node[1]])
+        field = self.fields[kind].get(node)
+        if field is None:
+            return np.zeros(len(store), dtype=bool)
+        column, bitfield, value = field
+        values = _as_uint64(store.column(column))
+        if bitfield is not None:
+            high, low = bitfield
+            values = (values >> np.uint64(low)) & np.uint64((1 << (high - low + 1)) - 1)
+        if value > _U64_MASK:
+            # Above every uint64 column value
+            return np.full(len(store), node[1] in ('!=', '<', '<='), dtype=bool)
+        return _FILTER_NUMPY_OPS[node[1]](values, np.uint64(value))
+
+    def apply(self, stores: Dict[str, CallStore]) -> Dict[str, CallStore]:
+        """Return the stores reduced to the matching calls"""
+        return {kind: store.select(self.mask(kind, store)) for kind, store in stores.items()}
+
+
+_FILTER_NUMPY_OPS = {'==': np.equal, '!=': np.not_equal, '<': np.less, '<=': np.less_equal,
+                     '>': np.greater, '>=': np.greater_equal} if np is not None else {}
+
+
+@functools.lru_cache(maxsize=None)
+def compile_record_filter(expression: str) -> RecordFilter:
+    """Compile a --where expression once per process"""
+    return RecordFilter(expression)
+
+
+def print_mapmemory_summary(calls: MapMemoryStore):
+    """Print summary statistics for mapMemoryDma calls"""
+    summary = CallSummary()
+    summary.add_columns(calls.column('status'), calls.column('length'), calls.column('duration_ns'))
+    print_call_summary('MapMemoryDma', summary, 'mappings', 'mapped')
+    latency = LatencyBreakdown(MAPMEMORY_LATENCY_GROUPS)
+    latency.add_columns(calls)
+    print_latency_breakdown('MapMemoryDma', latency)
+
+
+class LifetimeTracker:
+    """Live video memory over the log, from NVOS32 allocations and FREEs keyed by hMemory
+
+    Calls must arrive in line order. Live handles are indexed in a dict, and
+    every allocation's lifetime (allocating line, freeing line, size) is kept
+    in array columns, so the allocations live at the high-water mark are
+    found from those columns after one pass instead of by snapshotting the
+    live set at every new peak. The log has no timestamps; the summed
+    duration of the vidHeapControl calls seen so far serves as the time axis.
+    """
+
+    TIMELINE_COLUMNS = ('line_number', 'elapsed_ns', 'event', 'hMemory', 'size', 'live_bytes', 'live_allocations')
+
+    def __init__(self, keep_timeline: bool = False):
+        self.live: Dict[int, int] = {}
+        self.live_bytes = 0
+        self.elapsed_ns = 0
+        self.peak_bytes = 0
+        self.peak_line = 0
+        self.peak_elapsed_ns = 0
+        self.unmatched_frees = 0
+        self.reused_handles = 0
+        self.lifetime_handle = array('Q')
+        self.lifetime_line = array('Q')
+        self.lifetime_free_line = array('Q')
+        self.lifetime_size = array('Q')
+        self.timeline = [] if keep_timeline else None
+
+    def add(self, line_number: int, function: int, status: int, h_memory: int, size: int, duration_ns: int):
+        """Account one vidHeapControl call"""
+        self.elapsed_ns += duration_ns
+        if status != 0 or not h_memory:
+            return
+        if function in NVOS32_ALLOC_FUNCTIONS:
+            if h_memory in self.live:
+                # The handle was reused without a FREE in the log
+                self.reused_handles += 1
+                self._release(h_memory, line_number)
+            self.live[h_memory] = len(self.lifetime_line)
+            self.lifetime_handle.append(h_memory)
+            self.lifetime_line.append(line_number)
+            self.lifetime_free_line.append(0)
+            self.lifetime_size.append(size)
+            self.live_bytes += size
+            if self.live_bytes > self.peak_bytes:
+                self.peak_bytes = self.live_bytes
+                self.peak_line = line_number
+                self.peak_elapsed_ns = self.elapsed_ns
+            self._record(line_number, 'alloc', h_memory, size)
+        elif function == NVOS32_FUNCTION_FREE:
+            if h_memory not in self.live:
+                self.unmatched_frees += 1
+                return
+            size = self._release(h_memory, line_number)
+            self._record(line_number, 'free', h_memory, size)
+
+    def add_columns(self, calls: VidHeapStore):
+        """Account every call of a store from its columns"""
+        for values in zip(calls.column('line_number'), calls.column('function'), calls.column('status_after'),
+                          calls.column('after_hMemory'), calls.column('after_size'), calls.column('duration_ns')):
+            self.add(*values)
+
+    def _release(self, h_memory: int, line_number: int) -> int:
+        index = self.live.pop(h_memory)
+        self.lifetime_free_line[index] = line_number
+        size = self.lifetime_size[index]
+        self.live_bytes -= size
+        return size
+
+    def _record(self, line_number: int, event: str, h_memory: int, size: int):
+        if self.timeline is not None:
+            self.timeline.append((line_number, self.elapsed_ns, event, h_memory, size,
+                                  self.live_bytes, len(self.live)))
+
+    def live_at_peak(self) -> List[tuple[int, int, int, int]]:
+        """Return (line_number, free_line, hMemory, size) of the allocations live at the high-water mark, largest first
+
+        free_line is 0 for allocations that are never freed in the log.
+        """
+        peak = self.peak_line
+        if not peak:
+            return []
+        live = [(line, free_line, handle, size)
+                for line, free_line, handle, size in zip(self.lifetime_line, self.lifetime_free_line,
+                                                         self.lifetime_handle, self.lifetime_size)
+                if line <= peak and (free_line == 0 or free_line > peak)]
+        live.sort(key=lambda alloc: alloc[3], reverse=True)
+        return live
+
+
+def print_lifetime_summary(tracker: LifetimeTracker, top: int = 10):
+    """Print the live-memory high-water mark and the largest allocations live at it"""
+    print(f"\n{'='*80}")
+    print("Live Memory Summary")
+    print(f"{'='*80}")
+    print(f"Allocations tracked: {len(tracker.lifetime_line)}")
+    print(f"Live at end of log: {len(tracker.live)} allocations, {format_size(tracker.live_bytes)}")
+    print(f"FREEs of unknown handles: {tracker.unmatched_frees}")
+    print(f"Handles reallocated without FREE: {tracker.reused_handles}")
+    if not tracker.peak_line:
+        return
+    live = tracker.live_at_peak()
+    print(f"Peak live memory: {format_size(tracker.peak_bytes)} at line {tracker.peak_line} "
+          f"({tracker.peak_elapsed_ns/1000:.2f} µs into the vidHeapControl calls), {len(live)} allocations")
+    print("Largest allocations live at peak:")
+    for line, free_line, handle, size in live[:top]:
+        freed = f"freed at line {free_line}" if free_line else "never freed"
+        print(f"  line {line:>8}  hMemory={hex(handle)}  {format_size(size)}  {freed}")
+
+
+def export_lifetime_timeline(tracker: LifetimeTracker, filename: str, source_file: str = None):
+    """Export the live-memory timeline to CSV (for a .csv filename) or JSON"""
+    if filename.lower().endswith('.csv'):
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(LifetimeTracker.TIMELINE_COLUMNS)
+            for line_number, elapsed_ns, event, h_memory, size, live_bytes, live_allocations in tracker.timeline:
+                writer.writerow((line_number, elapsed_ns, event, hex(h_memory), size, live_bytes, live_allocations))
+    else:
+        output = {
+            'metadata': {
+                'source_file': source_file,
+                'allocations': len(tracker.lifetime_line),
+                'peak_bytes': tracker.peak_bytes,
+                'peak_line': tracker.peak_line,
+                'peak_elapsed_ns': tracker.peak_elapsed_ns,
+                'unmatched_frees': tracker.unmatched_frees,
+                'reused_handles': tracker.reused_handles,
+            },
+            'live_at_peak': [{'line': line, 'free_line': free_line or None, 'hMemory': hex(handle), 'size': size}
+                             for line, free_line, handle, size in tracker.live_at_peak()],
+            'timeline': [dict(zip(LifetimeTracker.TIMELINE_COLUMNS, point)) for point in tracker.timeline],
+        }
+        for point in output['timeline']:
+            point['hMemory'] = hex(point['hMemory'])
+        with open(filename, 'w') as f:
+            json.dump(output, f)
+    print(f"\nExported live-memory timeline ({len(tracker.timeline)} events) to {filename}")
+
+
+class HeapSeries:
+    """Free/total samples of one heap over log lines, downsampled in bounded memory
+
+    Samples fold into buckets of a fixed line width that keep their first,
+    last, lowest-free and highest-free sample. When there are more than
+    2 * points buckets the width doubles and neighbouring buckets merge, so
+    memory stays O(points) however many samples arrive. Those per-bucket
+    extremes are the candidates that points() reduces with min/max or LTTB.
+    """
+
+    def __init__(self, points: int):
+        self.points = points
+        self.width = 1
+        self.buckets: List[list] = []
+        self.samples = 0
+        self.min_free: Optional[tuple[int, int, int]] = None
+
+    def add(self, line_number: int, free: int, total: int):
+        """Account one (line, free, total) sample; lines must not decrease"""
+        self.samples += 1
+        sample = (line_number, free, total)
+        if self.min_free is None or free < self.min_free[1]:
+            self.min_free = sample
+        key = line_number // self.width
+        buckets = self.buckets
+        if buckets and buckets[-1][0] == key:
+            bucket = buckets[-1]
+            bucket[2] = sample
+            if free < bucket[3][1]:
+                bucket[3] = sample
+            if free > bucket[4][1]:
+                bucket[4] = sample
+            return
+        buckets.append([key, sample, sample, sample, sample])
+        if len(buckets) > 2 * self.points:
+            self._widen()
+
+    def _widen(self):
+        """Double the bucket width, merging the buckets that now share a key"""
+        self.width *= 2
+        merged = []
+        for key, first, last, low, high in self.buckets:
+            key //= 2
+            if merged and merged[-1][0] == key:
+                bucket = merged[-1]
+                bucket[2] = last
+                if low[1] < bucket[3][1]:
+                    bucket[3] = low
+                if high[1] > bucket[4][1]:
+                    bucket[4] = high
+            else:
+                merged.append([key, first, last, low, high])
+        self.buckets = merged
+
+    def candidates(self) -> List[tuple[int, int, int]]:
+        """First, lowest, highest and last sample of every bucket, in line order without repeats"""
+        points = []
+        for _, first, last, low, high in self.buckets:
+            for sample in sorted({first, last, low, high}):
+                points.append(sample)
+        return points
+
+    def downsample(self, method: str = 'lttb') -> List[tuple[int, int, int]]:
+        """Return at most self.points samples, keeping the shape of the free curve
+
+        minmax keeps the first and last sample and the lowest and highest
+        free sample of (points - 2) / 2 equal line ranges; lttb runs Largest-Triangle-Three-Buckets over the
+        per-bucket extremes.
+        """
+        candidates = self.candidates()
+        if len(candidates) <= self.points:
+            return candidates
+        if method == 'lttb':
+            return lttb(candidates, self.points)
+        buckets = max(1, (self.points - 2) // 2)
+        first_line, last_line = candidates[0][0], candidates[-1][0]
+        span = (last_line - first_line) / buckets or 1
+        extremes: Dict[int, list] = {}
+        for sample in candidates:
+            key = min(buckets - 1, int((sample[0] - first_line) / span))
+            pair = extremes.get(key)
+            if pair is None:
+                extremes[key] = [sample, sample]
+            elif sample[1] < pair[0][1]:
+                pair[0] = sample
+            elif sample[1] > pair[1][1]:
+                pair[1] = sample
+        kept = {sample for pair in extremes.values() for sample in pair}
+        kept.update((candidates[0], candidates[-1]))
+        return sorted(kept)
+
+
+def lttb(samples: List[tuple], threshold: int) -> List[tuple]:
+    """Largest-Triangle-Three-Buckets downsampling of (x, y, ...) samples sorted by x to threshold samples"""
+    count = len(samples)
+    if threshold >= count or threshold < 3:
+        return list(samples)
+    sampled = [samples[0]]
+    every = (count - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket, the third corner of the triangle
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, count)
+        next_bucket = samples[avg_start:avg_end]
+        avg_x = sum(sample[0] for sample in next_bucket) / len(next_bucket)
+        avg_y = sum(sample[1] for sample in next_bucket) / len(next_bucket)
+        ax, ay = samples[a][0], samples[a][1]
+        best_area = -1.0
+        best = int(i * every) + 1
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((ax - avg_x) * (samples[j][1] - ay) - (ax - samples[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best_area, best = area, j
+        sampled.append(samples[best])
+        a = best
+    sampled.append(samples[-1])
+    return sampled
+
+
+class HeapSeriesCollector:
+    """One HeapSeries per hVASpace, fed by vidHeapControl calls in line order"""
+
+    def __init__(self, points: int = 1000):
+        self.points = points
+        self.series: Dict[int, HeapSeries] = {}
+
+    def add(self, line_number: int, h_vaspace: int, free: int, total: int):
+        series = self.series.get(h_vaspace)
+        if series is None:
+            series = self.series[h_vaspace] = HeapSeries(self.points)
+        series.add(line_number, free, total)
+
+    def add_columns(self, calls: VidHeapStore):
+        """Account every call of a store from its columns"""
+        for values in zip(calls.column('line_number'), calls.column('hVASpace'),
+                          calls.column('free'), calls.column('total')):
+            self.add(*values)
+
+
+def export_heap_series(collector: HeapSeriesCollector, filename: str, method: str = 'lttb', source_file: str = None):
+    """Export the downsampled free/total series to CSV (for a .csv filename) or JSON"""
+    downsampled = {h_vaspace: series.downsample(method) for h_vaspace, series in sorted(collector.series.items())}
+    if filename.lower().endswith('.csv'):
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(('hVASpace', 'line_number', 'free', 'total'))
+            for h_vaspace, points in downsampled.items():
+                for line_number, free, total in points:
+                    writer.writerow((hex(h_vaspace), line_number, free, total))
+    else:
+        output = {
+            'metadata': {'source_file': source_file, 'method': method, 'max_points': collector.points},
+            'series': {
+                hex(h_vaspace): {
+                    'samples': collector.series[h_vaspace].samples,
+                    'min_free': dict(zip(('line_number', 'free', 'total'), collector.series[h_vaspace].min_free)),
+                    'points': [dict(zip(('line_number', 'free', 'total'), point)) for point in points],
+                }
+                for h_vaspace, points in downsampled.items()
+            },
+        }
+        with open(filename, 'w') as f:
+            json.dump(output, f)
+    samples = sum(series.samples for series in collector.series.values())
+    points = sum(len(points) for points in downsampled.values())
+    print(f"\nExported heap free/total series ({len(downsampled)} hVASpace, {samples} samples -> {points} points, "
+          f"{method}) to {filename}")
+
+
+class ChurnDetector:
+    """Allocation churn: blocks of the same size, type and attr freed and allocated again within a window
+
+    Calls arrive in line order. Live allocations remember their signature
+    (size, type, attr). Every successful FREE goes into a sliding-window
+    hash index: a deque of recent FREE lines per signature, plus one global
+    deque that expires entries older than window_lines. When an allocation
+    finds a FREE of its signature in the window, it consumes that block,
+    which a driver-side cache could have served. Both calls count as
+    avoidable RM time.
+    Memory follows the live handles and the FREEs inside the window, not
+    the length of the log.
+    """
+
+    def __init__(self, window_lines: int = 1000):
+        self.window_lines = window_lines
+        self.live: Dict[int, tuple[tuple, int]] = {}
+        self.recent_frees: Dict[tuple, deque] = {}
+        self.expiry = deque()
+        # signature -> [allocations, reuses, short-lived, avoidable ns, lifetime lines of short-lived]
+        self.signatures: Dict[tuple, List[int]] = {}
+        self.allocations = 0
+        self.reuses = 0
+        self.avoidable_ns = 0
+
+    def _expire(self, line_number: int):
+        expiry = self.expiry
+        while expiry and expiry[0][0] <= line_number - self.window_lines:
+            free_line, signature = expiry.popleft()
+            frees = self.recent_frees.get(signature)
+            # The FREE may already have been consumed by a reuse
+            if frees and frees[0][0] == free_line:
+                frees.popleft()
+                if not frees:
+                    del self.recent_frees[signature]
+
+    def add(self, line_number: int, function: int, status: int, h_memory: int, size: int, mem_type: int,
+            attr: int, duration_ns: int):
+        """Account one vidHeapControl call"""
+        if status != 0 or not h_memory:
+            return
+        self._expire(line_number)
+        if function in NVOS32_ALLOC_FUNCTIONS:
+            signature = (size, mem_type, attr)
+            stats = self.signatures.get(signature)
+            if stats is None:
+                stats = self.signatures[signature] = [0, 0, 0, 0, 0]
+            stats[0] += 1
+            self.allocations += 1
+            frees = self.recent_frees.get(signature)
+            if frees:
+                # Any freed block of the signature serves; the oldest is taken
+                _, free_ns = frees.popleft()
+                if not frees:
+                    del self.recent_frees[signature]
+                stats[1] += 1
+                stats[3] += free_ns + duration_ns
+                self.reuses += 1
+                self.avoidable_ns += free_ns + duration_ns
+            self.live[h_memory] = (signature, line_number)
+        elif function == NVOS32_FUNCTION_FREE:
+            allocated = self.live.pop(h_memory, None)
+            if allocated is None:
+                return
+            signature, allocated_line = allocated
+            lifetime = line_number - allocated_line
+            if lifetime <= self.window_lines:
+                stats = self.signatures[signature]
+                stats[2] += 1
+                stats[4] += lifetime
+            self.recent_frees.setdefault(signature, deque()).append((line_number, duration_ns))
+            self.expiry.append((line_number, signature))
+
+    def add_columns(self, calls: VidHeapStore):
+        """Account every call of a store from its columns"""
+        for values in zip(calls.column('line_number'), calls.column('function'), calls.column('status_after'),
+                          calls.column('after_hMemory'), calls.column('after_size'), calls.column('after_type'),
+                          calls.column('after_attr'), calls.column('duration_ns')):
+            self.add(*values)
+
+
+def print_churn(detector: ChurnDetector, top: int = 15):
+    """Print the signatures and sizes whose blocks are recycled most, with the RM time a cache would save"""
+    print(f"\n{'='*80}")
+    print(f"Allocation Churn (FREE then allocation of the same size/type/attr within {detector.window_lines} lines)")
+    print(f"{'='*80}")
+    allocations = detector.allocations
+    print(f"Allocations: {allocations}, served by a recently freed block: {detector.reuses} "
+          f"({detector.reuses * 100 // allocations if allocations else 0}%), "
+          f"avoidable RM time: {detector.avoidable_ns/1000:.2f} µs")
+    churning = [(signature, stats) for signature, stats in detector.signatures.items() if stats[1] or stats[2]]
+    if not churning:
+        return
+    churning.sort(key=lambda item: (item[1][3], item[1][1]), reverse=True)
+    
+    print(f"\n{'size':>12}  {'type':<16}{'location':<10}{'page_size':<10}{'allocs':>9}{'reused':>9}"
+          f"{'short':>9}{'avg life':>10}{'RM µs':>12}")
+    for (size, mem_type, attr), (count, reused, short, avoidable_ns, lifetimes) in churning[:top]:
+        decoded = decode_attr(attr)
+        average_life = f"{lifetimes / short:.0f}" if short else '-'
+        print(f"{format_size(size).split(' (')[0]:>12}  {decode_type(mem_type):<16}{decoded.get('location', '?'):<10}"
+              f"{decoded.get('page_size', '?'):<10}{count:>9}{reused:>9}{short:>9}{average_life:>10}"
+              f"{avoidable_ns/1000:>12.2f}")
+    if len(churning) > top:
+        print(f"... {len(churning) - top} more churning signatures")
+    
+    by_size: Dict[int, List[int]] = {}
+    for (size, _, _), (count, reused, _, avoidable_ns, _) in churning:
+        totals = by_size.setdefault(size, [0, 0, 0])
+        totals[0] += count
+        totals[1] += reused
+        totals[2] += avoidable_ns
+    print("\nHot sizes:")
+    for size, (count, reused, avoidable_ns) in sorted(by_size.items(), key=lambda item: item[1][2], reverse=True)[:top]:
+        print(f"  {format_size(size):<32}{reused:>9} reused of {count:<9} {avoidable_ns/1000:>12.2f} µs")
+
+
+class ClientStats:
+    """Calls, bytes, latency and live video memory of one RM client"""
+
+    def __init__(self):
+        self.vidheap = CallSummary()
+        self.vidheap_latency = LatencyHistogram()
+        self.mapmemory = CallSummary()
+        self.mapmemory_latency = LatencyHistogram()
+        self.dupobject_calls = 0
+        self.live: Dict[int, int] = {}
+        self.live_bytes = 0
+        self.peak_bytes = 0
+        self.peak_line = 0
+
+    def merge(self, other: 'ClientStats'):
+        """Add the calls of another partial; live memory is not mergeable and is left alone"""
+        self.vidheap.merge(other.vidheap)
+        self.vidheap_latency.merge(other.vidheap_latency)
+        self.mapmemory.merge(other.mapmemory)
+        self.mapmemory_latency.merge(other.mapmemory_latency)
+        self.dupobject_calls += other.dupobject_calls
+
+
+class ClientBreakdown:
+    """Per-client statistics: vidHeapControl calls by hRoot, mapMemoryDma and dupObject calls by hClient
+
+    Counts, bytes and latency histograms do not depend on call order, so
+    with --jobs every worker aggregates the calls of its chunk and the
+    partial breakdowns are merged as the chunks come back. Live memory
+    does: a FREE may sit in a later chunk than its allocation. It is
+    tracked in line order by track_live, once the chunks are merged or
+    while streaming, with the LifetimeTracker rules applied per client.
+    """
+
+    def __init__(self):
+        self.clients: Dict[int, ClientStats] = {}
+
+    def _stats(self, client: int) -> ClientStats:
+        stats = self.clients.get(client)
+        if stats is None:
+            stats = self.clients[client] = ClientStats()
+        return stats
+
+    def add_vidheap(self, client: int, status: int, size: int, duration_ns: int):
+        """Account one vidHeapControl call"""
+        stats = self._stats(client)
+        stats.vidheap.add(status, size, duration_ns)
+        stats.vidheap_latency.add(duration_ns)
+
+    def add_mapmemory(self, client: int, status: int, length: int, duration_ns: int):
+        """Account one mapMemoryDma call"""
+        stats = self._stats(client)
+        stats.mapmemory.add(status, length, duration_ns)
+        stats.mapmemory_latency.add(duration_ns)
+
+    def add_dupobject(self, client: int):
+        """Account one dupObject call"""
+        self._stats(client).dupobject_calls += 1
+
+    def track_live(self, client: int, line_number: int, function: int, status: int, h_memory: int, size: int):
+        """Account one vidHeapControl call against its client's live memory; calls must arrive in line order"""
+        if status != 0 or not h_memory:
+            return
+        if function in NVOS32_ALLOC_FUNCTIONS:
+            stats = self._stats(client)
+            # A handle reused without a FREE releases its previous allocation
+            stats.live_bytes += size - stats.live.get(h_memory, 0)
+            stats.live[h_memory] = size
+            if stats.live_bytes > stats.peak_bytes:
+                stats.peak_bytes = stats.live_bytes
+                stats.peak_line = line_number
+        elif function == NVOS32_FUNCTION_FREE:
+            stats = self.clients.get(client)
+            if stats is not None:
+                stats.live_bytes -= stats.live.pop(h_memory, 0)
+
+    def wrap_sinks(self, sinks: Dict[str, Callable]) -> Dict[str, Callable]:
+        """Return scanner sinks that account every call before passing it on to sinks"""
+        vidheap, mapmemory, dupobject = sinks['vidheap'], sinks['mapmemory'], sinks['dupobject']
+        
+        def add_vidheap(call: VidHeapControlCall):
+            self.add_vidheap(call.hRoot, call.status_after, call.alloc_size_after.size, call.duration_ns)
+            vidheap(call)
+        
+        def add_mapmemory(call: MapMemoryDmaCall):
+            self.add_mapmemory(call.hClient, call.status, call.length, call.duration_ns)
+            mapmemory(call)
+        
+        def add_dupobject(call: DupObjectCall):
+            self.add_dupobject(call.hClient)
+            dupobject(call)
+        
+        return {'vidheap': add_vidheap, 'mapmemory': add_mapmemory, 'dupobject': add_dupobject}
+
+    def add_columns(self, stores: Dict[str, CallStore]):
+        """Account every call of the stores from their columns, except for live memory"""
+        vidheap, mapmemory = stores['vidheap'], stores['mapmemory']
+        for values in zip(vidheap.column('hRoot'), vidheap.column('status_after'), vidheap.column('after_size'),
+                          vidheap.column('duration_ns')):
+            self.add_vidheap(*values)
+        for values in zip(mapmemory.column('hClient'), mapmemory.column('status'), mapmemory.column('length'),
+                          mapmemory.column('duration_ns')):
+            self.add_mapmemory(*values)
+        for client in stores['dupobject'].column('hClient'):
+            self.add_dupobject(client)
+
+    def track_live_columns(self, calls: VidHeapStore):
+        """Track live memory over every call of a store, which must be in line order"""
+        for values in zip(calls.column('hRoot'), calls.column('line_number'), calls.column('function'),
+                          calls.column('status_after'), calls.column('after_hMemory'), calls.column('after_size')):
+            self.track_live(*values)
+
+    def merge(self, other: 'ClientBreakdown'):
+        """Add the calls of another partial breakdown"""
+        for client, stats in other.clients.items():
+            self._stats(client).merge(stats)
+
+
+def print_client_breakdown(breakdown: ClientBreakdown, top: int = 20):
+    """Print the clients with the most live video memory, with their call counts, bytes and latency"""
+    print(f"\n{'='*80}")
+    print("Per-Client Breakdown (vidHeapControl by hRoot, mapMemoryDma/dupObject by hClient)")
+    print(f"{'='*80}")
+    clients = sorted(breakdown.clients.items(),
+                     key=lambda item: (item[1].peak_bytes, item[1].vidheap.total_bytes, item[1].mapmemory.total_bytes),
+                     reverse=True)
+    print(f"Clients: {len(clients)}")
+    if not clients:
+        return
+    
+    def size(value: int) -> str:
+        return format_size(value).split(' (')[0]
+    
+    def latency(histogram: LatencyHistogram, percent: float) -> str:
+        return f"{histogram.percentile(percent)/1000:.2f}" if histogram.count else '-'
+    
+    print(f"\n{'client':<12}{'vidheap':>9}{'failed':>8}{'allocated':>12}{'peak live':>12}{'p50 µs':>9}{'p99 µs':>9}"
+          f"{'maps':>9}{'failed':>8}{'mapped':>12}{'p50 µs':>9}{'p99 µs':>9}{'dups':>7}")
+    for client, stats in clients[:top]:
+        vidheap, mapmemory = stats.vidheap, stats.mapmemory
+        print(f"{hex(client):<12}{vidheap.calls:>9}{vidheap.failed:>8}{size(vidheap.total_bytes):>12}"
+              f"{size(stats.peak_bytes):>12}{latency(stats.vidheap_latency, 50):>9}{latency(stats.vidheap_latency, 99):>9}"
+              f"{mapmemory.calls:>9}{mapmemory.failed:>8}{size(mapmemory.total_bytes):>12}"
+              f"{latency(stats.mapmemory_latency, 50):>9}{latency(stats.mapmemory_latency, 99):>9}"
+              f"{stats.dupobject_calls:>7}")
+    if len(clients) > top:
+        print(f"... {len(clients) - top} more clients")
+    
+    print("\nPeak live memory:")
+    for client, stats in clients[:top]:
+        if stats.peak_line:
+            print(f"  {hex(client):<12}{format_size(stats.peak_bytes):<32} at line {stats.peak_line}, "
+                  f"{format_size(stats.live_bytes)} live at end of log")
+
+
+class SortedKeys:
+    """Sorted set of ints kept in blocks of at most 2 * LOAD keys
+
+    A flat sorted list costs a memmove of the whole list per insert, which
+    is quadratic over millions of mappings; with blocks an insert or
+    removal only moves the keys of one block.
+    """
+    LOAD = 512
+
+    def __init__(self):
+        self.blocks: List[List[int]] = []
+        self.maxes: List[int] = []
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    def add(self, key: int):
+        """Insert a key that is not in the set"""
+        self.size += 1
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+            return
+        b = bisect.bisect_left(self.maxes, key)
+        if b == len(self.blocks):
+            b -= 1
+            self.blocks[b].append(key)
+            self.maxes[b] = key
+        else:
+            bisect.insort(self.blocks[b], key)
+        block = self.blocks[b]
+        if len(block) > 2 * self.LOAD:
+            self.blocks[b:b + 1] = [block[:self.LOAD], block[self.LOAD:]]
+            self.maxes[b:b + 1] = [block[self.LOAD - 1], block[-1]]
+
+    def remove(self, key: int):
+        """Remove a key that is in the set"""
+        self.size -= 1
+        b = bisect.bisect_left(self.maxes, key)
+        block = self.blocks[b]
+        del block[bisect.bisect_left(block, key)]
+        if not block:
+            del self.blocks[b]
+            del self.maxes[b]
+        else:
+            self.maxes[b] = block[-1]
+
+    def ceiling(self, key: int) -> Optional[int]:
+        """Smallest key >= key"""
+        b = bisect.bisect_left(self.maxes, key)
+        if b == len(self.blocks):
+            return None
+        block = self.blocks[b]
+        return block[bisect.bisect_left(block, key)]
+
+    def lower(self, key: int) -> Optional[int]:
+        """Largest key < key"""
+        b = bisect.bisect_left(self.maxes, key)
+        if b < len(self.blocks):
+            block = self.blocks[b]
+            i = bisect.bisect_left(block, key)
+            if i:
+                return block[i - 1]
+        return self.maxes[b - 1] if b else None
+
+    def first(self) -> Optional[int]:
+        return self.blocks[0][0] if self.blocks else None
+
+    def last(self) -> Optional[int]:
+        return self.maxes[-1] if self.maxes else None
+
+
+class VASpaceIndex:
+    """Live GPU VA mappings of one hDma, kept as sorted non-overlapping intervals
+
+    Starts are kept in a SortedKeys; free gaps between neighbouring
+    mappings sit in a max-heap with lazy deletion, so the largest free span
+    is available after every insert or removal without walking the space.
+    """
+
+    def __init__(self):
+        self.starts = SortedKeys()
+        self.mappings: Dict[int, tuple[int, int, int, bool]] = {}
+        self.gaps: Dict[int, int] = {}
+        self.gap_heap: List[tuple[int, int, int]] = []
+        self.used = 0
+        self.mapped = 0
+        self.overlaps = 0
+        self.overlap_examples: List[tuple[int, int, int, int]] = []
+        self.failures = 0
+        self.min_largest_free = None
+        self.min_largest_free_line = 0
+        self.max_32bit_end = 0
+
+    def _set_gap(self, start: int, end: int):
+        if end > start:
+            self.gaps[start] = end
+            heapq.heappush(self.gap_heap, (start - end, start, end))
+
+    def _clear_gap(self, start: int):
+        self.gaps.pop(start, None)
+
+    def largest_free(self) -> int:
+        """Size of the largest gap between live mappings"""
+        heap = self.gap_heap
+        while heap and self.gaps.get(heap[0][1]) != heap[0][2]:
+            heapq.heappop(heap)
+        # Rebuild once stale entries dominate, so the heap follows the live gaps
+        if len(heap) > 4 * len(self.gaps) + 1024:
+            heap[:] = [(start - end, start, end) for start, end in self.gaps.items()]
+            heapq.heapify(heap)
+        return -heap[0][0] if heap else 0
+
+    def total_free(self) -> int:
+        """Unmapped bytes between the lowest and highest live mapping"""
+        if not self.starts:
+            return 0
+        return self.mappings[self.starts.last()][0] - self.starts.first() - self.used
+
+    def fragmentation(self) -> float:
+        """1 - largest gap / free bytes: 0 when all free VA is one span, towards 1 when scattered"""
+        total = self.total_free()
+        return 1 - self.largest_free() / total if total else 0.0
+
+    def remove(self, start: int):
+        """Drop the live mapping starting at start"""
+        end = self.mappings.pop(start)[0]
+        self.starts.remove(start)
+        self.used -= end - start
+        self._clear_gap(end)
+        previous = self.starts.lower(start)
+        if previous is not None:
+            previous_end = self.mappings[previous][0]
+            self._clear_gap(previous_end)
+            following = self.starts.ceiling(start)
+            if following is not None:
+                self._set_gap(previous_end, following)
+
+    def insert(self, start: int, end: int, line_number: int, h_memory: int, is_32bit: bool) -> List[int]:
+        """Add a live mapping; live mappings it overlaps are reported and replaced
+
+        The log does not show unmaps, so a mapping that lands on VA still held
+        by an older one means the older one is gone.
+
+        Returns:
+            the line numbers of the replaced mappings
+        """
+        starts = self.starts
+        overlapped = []
+        previous = starts.lower(start)
+        key = previous if previous is not None and self.mappings[previous][0] > start else starts.ceiling(start)
+        while key is not None and key < end:
+            old_end, old_line, _, _ = self.mappings[key]
+            overlapped.append(old_line)
+            self.overlaps += 1
+            if len(self.overlap_examples) < 10:
+                self.overlap_examples.append((line_number, old_line, max(start, key), min(end, old_end)))
+            self.remove(key)
+            key = starts.ceiling(start)
+        
+        previous = starts.lower(start)
+        if previous is not None:
+            previous_end = self.mappings[previous][0]
+            self._clear_gap(previous_end)
+            self._set_gap(previous_end, start)
+        if key is not None:
+            self._set_gap(end, key)
+        starts.add(start)
+        self.mappings[start] = (end, line_number, h_memory, is_32bit)
+        self.used += end - start
+        self.mapped += 1
+        if is_32bit:
+            self.max_32bit_end = max(self.max_32bit_end, end)
+        
+        largest = self.largest_free()
+        if len(starts) > 1 and (self.min_largest_free is None or largest < self.min_largest_free):
+            self.min_largest_free = largest
+            self.min_largest_free_line = line_number
+        return overlapped
+
+
+class VAAnalyzer:
+    """GPU VA layout per hDma from mapMemoryDma results, in line order
+
+    A successful mapping occupies [dmaOffset_after, dmaOffset_after + length)
+    of its hDma. Mappings leave the index when a successful NVOS32 FREE names
+    their hMemory or when a later mapping reuses their VA. A failed mapping
+    records a snapshot of its space: free VA, the largest free span and the
+    largest mappings live at that moment.
+    """
+
+    MAX_FAILURE_MAPPINGS = 10
+
+    def __init__(self):
+        self.spaces: Dict[int, VASpaceIndex] = {}
+        self.by_memory: Dict[int, List[tuple[int, int]]] = {}
+        self.failures: List[Dict] = []
+
+    def add_mapping(self, line_number: int, h_dma: int, h_memory: int, dma_offset: int, length: int,
+                    flags: int, status: int):
+        """Account one mapMemoryDma call"""
+        space = self.spaces.get(h_dma)
+        if space is None:
+            space = self.spaces[h_dma] = VASpaceIndex()
+        is_32bit = bool(extract_bitfield(flags, 2, 2))
+        if status != 0:
+            space.failures += 1
+            live = sorted(((end - start, start, mapped_line, mapped_memory)
+                           for start, (end, mapped_line, mapped_memory, _) in space.mappings.items()), reverse=True)
+            self.failures.append({
+                'line': line_number, 'hDma': h_dma, 'hMemory': h_memory, 'length': length,
+                'status': status, '32bit_pointer': is_32bit, 'live_mappings': len(space.starts),
+                'mapped_bytes': space.used, 'free_bytes': space.total_free(),
+                'largest_free': space.largest_free(),
+                'largest_live': live[:self.MAX_FAILURE_MAPPINGS],
+            })
+            return
+        if not length:
+            return
+        space.insert(dma_offset, dma_offset + length, line_number, h_memory, is_32bit)
+        self.by_memory.setdefault(h_memory, []).append((h_dma, dma_offset))
+
+    def free_memory(self, h_memory: int):
+        """Drop the mappings of a freed hMemory"""
+        for h_dma, start in self.by_memory.pop(h_memory, ()):
+            space = self.spaces[h_dma]
+            mapping = space.mappings.get(start)
+            # The VA may since have been reused by another mapping
+            if mapping is not None and mapping[2] == h_memory:
+                space.remove(start)
+
+    def add_vidheap(self, function: int, status: int, h_memory: int):
+        """Account one vidHeapControl call"""
+        if function == NVOS32_FUNCTION_FREE and status == 0:
+            self.free_memory(h_memory)
+
+    def add_columns(self, vidheap_calls: VidHeapStore, mapmemory_calls: MapMemoryStore):
+        """Account two stores in line order from their columns"""
+        functions, statuses, h_memories = (vidheap_calls.column(name) for name in ('function', 'status_after', 'after_hMemory'))
+        mapping_columns = [mapmemory_calls.column(name) for name in
+                           ('line_number', 'hDma', 'hMemory', 'dmaOffset_after', 'length', 'flags', 'status')]
+        for _, kind, row in iter_line_order({'vidheap': vidheap_calls, 'mapmemory': mapmemory_calls}):
+            if kind == 'vidheap':
+                self.add_vidheap(functions[row], statuses[row], h_memories[row])
+            else:
+                self.add_mapping(*(column[row] for column in mapping_columns))
+
+
+def print_va_analysis(analyzer: VAAnalyzer, top: int = 10):
+    """Print the VA layout of each hDma and the failed mappings"""
+    print(f"\n{'='*80}")
+    print("GPU VA Space Analysis (per hDma)")
+    print(f"{'='*80}")
+    spaces = sorted(analyzer.spaces.items(), key=lambda item: item[1].mapped, reverse=True)
+    for h_dma, space in spaces[:top]:
+        print(f"hDma={hex(h_dma)}: {space.mapped} mappings, {len(space.starts)} live "
+              f"({format_size(space.used)}), {space.failures} failed")
+        if space.starts:
+            low, high = space.starts.first(), space.mappings[space.starts.last()][0]
+            print(f"  Live range: {hex(low)}-{hex(high)}, {len(space.gaps)} gaps, "
+                  f"free {format_size(space.total_free())}, largest free span {format_size(space.largest_free())}, "
+                  f"fragmentation {space.fragmentation():.2f}")
+        if space.min_largest_free is not None:
+            print(f"  Smallest largest-free-span: {format_size(space.min_largest_free)} at line {space.min_largest_free_line}")
+        if space.max_32bit_end:
+            used = (f"{space.max_32bit_end * 100 / (1 << 32):.1f}% of the 4 GB range" if space.max_32bit_end <= 1 << 32
+                    else "beyond the 4 GB range")
+            print(f"  32bit_pointer mappings reach {hex(space.max_32bit_end)} ({used})")
+        if space.overlaps:
+            print(f"  Overlapping mappings: {space.overlaps}")
+            for line, old_line, start, end in space.overlap_examples[:3]:
+                print(f"    line {line} reuses {hex(start)}-{hex(end)} still held by line {old_line}")
+    if len(spaces) > top:
+        print(f"... {len(spaces) - top} more hDma spaces")
+    
+    if analyzer.failures:
+        print(f"\nFailed mappings: {len(analyzer.failures)}")
+        for failure in analyzer.failures[:top]:
+            print(f"  line {failure['line']}: hDma={hex(failure['hDma'])} hMemory={hex(failure['hMemory'])} "
+                  f"length={format_size(failure['length'])} status={hex(failure['status'])}"
+                  f"{' 32bit_pointer' if failure['32bit_pointer'] else ''}")
+            print(f"    {failure['live_mappings']} live mappings ({format_size(failure['mapped_bytes'])}), "
+                  f"free {format_size(failure['free_bytes'])}, largest free span {format_size(failure['largest_free'])}")
+            for size, start, line, h_memory in failure['largest_live'][:5]:
+                print(f"    live: {hex(start)} {format_size(size)} hMemory={hex(h_memory)} mapped at line {line}")
+
+
+class FailureForensics:
+    """Heap state at every failed vidHeapControl call, kept up to date in line order
+
+    Live allocations sit in a dict and in a SortedKeys ordered by size, so
+    the largest ones at a failure are read off the top of the index instead
+    of sorting the live set. The last free/total samples of each hVASpace
+    and the calls of the preceding window of lines are kept in bounded
+    deques, so a failure costs the same however many came before it.
+    """
+
+    TREND_SAMPLES = 8
+    TOP_ALLOCATIONS = 5
+
+    def __init__(self, window_lines: int = 10000):
+        self.window_lines = window_lines
+        self.live: Dict[int, tuple[int, int]] = {}
+        self.by_size = SortedKeys()
+        self.live_bytes = 0
+        self.samples: Dict[int, deque] = {}
+        self.recent = deque()
+        self.recent_ns = 0
+        self.failures: List[Dict] = []
+        self.by_status: Dict[int, List[int]] = {}
+
+    def _window(self, line_number: int, duration_ns: int) -> tuple[int, int]:
+        """Slide the call window to end before line_number, add the current call; return the calls and ns before it"""
+        recent = self.recent
+        while recent and recent[0][0] <= line_number - self.window_lines:
+            self.recent_ns -= recent.popleft()[1]
+        calls, elapsed_ns = len(recent), self.recent_ns
+        recent.append((line_number, duration_ns))
+        self.recent_ns += duration_ns
+        return calls, elapsed_ns
+
+    def _largest_live(self) -> List[tuple[int, int, int]]:
+        """(size, hMemory, allocating line) of the largest live allocations"""
+        largest = []
+        key = self.by_size.last()
+        while key is not None and len(largest) < self.TOP_ALLOCATIONS:
+            h_memory = key & _U64_MASK
+            largest.append((key >> 64, h_memory, self.live[h_memory][1]))
+            key = self.by_size.lower(key)
+        return largest
+
+    def _release(self, h_memory: int):
+        size, _ = self.live.pop(h_memory)
+        self.by_size.remove((size << 64) | h_memory)
+        self.live_bytes -= size
+
+    def add_vidheap(self, line_number: int, function: int, status: int, h_memory: int, size: int,
+                    duration_ns: int, h_vaspace: int, free: int, total: int, requested_size: int,
+                    requested_type: int, requested_attr: int):
+        """Account one vidHeapControl call; requested_* are the AllocSize fields the call was made with"""
+        window_calls, window_ns = self._window(line_number, duration_ns)
+        samples = self.samples.get(h_vaspace)
+        if samples is None:
+            samples = self.samples[h_vaspace] = deque(maxlen=self.TREND_SAMPLES)
+        samples.append((line_number, free, total))
+        if status != 0:
+            counts = self.by_status.setdefault(status, [0, 0])
+            counts[0] += 1
+            counts[1] += requested_size
+            self.failures.append({
+                'line': line_number, 'function': function, 'status': status, 'hVASpace': h_vaspace,
+                'size': requested_size, 'type': requested_type, 'attr': requested_attr,
+                'trend': list(samples), 'live_allocations': len(self.live), 'live_bytes': self.live_bytes,
+                'largest_live': self._largest_live(), 'window_calls': window_calls, 'window_ns': window_ns,
+            })
+            return
+        if not h_memory:
+            return
+        if function in NVOS32_ALLOC_FUNCTIONS:
+            if h_memory in self.live:
+                self._release(h_memory)
+            self.live[h_memory] = (size, line_number)
+            self.by_size.add((size << 64) | h_memory)
+            self.live_bytes += size
+        elif function == NVOS32_FUNCTION_FREE and h_memory in self.live:
+            self._release(h_memory)
+
+    def add_call(self, call: VidHeapControlCall):
+        """Account one parsed vidHeapControl call"""
+        before, after = call.alloc_size_before, call.alloc_size_after
+        self.add_vidheap(call.line_number, call.function, call.status_after, after.hMemory, after.size,
+                         call.duration_ns, call.hVASpace, call.free, call.total, before.size, before.type, before.attr)
+
+    def add_mapmemory(self, line_number: int, duration_ns: int):
+        """Account one mapMemoryDma call in the call window"""
+        self._window(line_number, duration_ns)
+
+    def add_columns(self, vidheap_calls: VidHeapStore, mapmemory_calls: MapMemoryStore):
+        """Account two stores in line order from their columns"""
+        vidheap_columns = [vidheap_calls.column(name) for name in
+                           ('line_number', 'function', 'status_after', 'after_hMemory', 'after_size', 'duration_ns',
+                            'hVASpace', 'free', 'total', 'before_size', 'before_type', 'before_attr')]
+        mapping_lines, mapping_durations = mapmemory_calls.column('line_number'), mapmemory_calls.column('duration_ns')
+        for _, kind, row in iter_line_order({'vidheap': vidheap_calls, 'mapmemory': mapmemory_calls}):
+            if kind == 'vidheap':
+                self.add_vidheap(*(column[row] for column in vidheap_columns))
+            else:
+                self.add_mapmemory(mapping_lines[row], mapping_durations[row])
+
+
+def print_failure_forensics(forensics: FailureForensics, top: int = 20):
+    """Print the failures by status and the heap state before each of the first top failures"""
+    print(f"\n{'='*80}")
+    print("Failed vidHeapControl Forensics")
+    print(f"{'='*80}")
+    failures = forensics.failures
+    print(f"Failed calls: {len(failures)}")
+    if not failures:
+        return
+    for status, (count, requested) in sorted(forensics.by_status.items(), key=lambda item: item[1][0], reverse=True):
+        print(f"  status={hex(status)}: {count} failures, {format_size(requested)} requested")
+    
+    for failure in failures[:top]:
+        attr = decode_attr(failure['attr'])
+        print(f"\nline {failure['line']}: {decode_function(failure['function'])} {decode_type(failure['type'])} "
+              f"{format_size(failure['size'])} location={attr.get('location', '?')} "
+              f"status={hex(failure['status'])} hVASpace={hex(failure['hVASpace'])}")
+        trend = failure['trend']
+        first_line, first_free, _ = trend[0]
+        _, last_free, last_total = trend[-1]
+        lowest_free = min(free for _, free, _ in trend)
+        print(f"  heap free {format_size(first_free).split(' (')[0]} -> {format_size(last_free).split(' (')[0]} "
+              f"of {format_size(last_total).split(' (')[0]} over the last {len(trend)} calls (from line {first_line}), "
+              f"lowest {format_size(lowest_free).split(' (')[0]}")
+        print(f"  live: {failure['live_allocations']} allocations, {format_size(failure['live_bytes'])}")
+        print(f"  preceding {forensics.window_lines} lines: {failure['window_calls']} calls, "
+              f"{failure['window_ns']/1000:.2f} µs in RM")
+        for size, h_memory, line_number in failure['largest_live']:
+            print(f"    live: hMemory={hex(h_memory)} {format_size(size)} allocated at line {line_number}")
+    if len(failures) > top:
+        print(f"\n... {len(failures) - top} more failures")
 
 
-def print_interleaved_detailed(vidheap_calls: List[VidHeapControlCall], mapmemory_calls: List[MapMemoryDmaCall], dupobject_calls: List[DupObjectCall], max_calls: int = 10, alloc_map: Dict[str, VidHeapControlCall] = None, alias_map: Dict[str, str] = None, source_file: str = None):
-    """Print detailed information for all operations interleaved by line number"""
+def print_detailed_header(max_calls: int, source_file: str = None, selection: str = None):
+    """Print the banner of the detailed operations view; selection describes an indexed --lines/--handle view"""
     print(f"\n{'='*80}")
+    shown = f"{selection}, showing first {max_calls}" if selection else f"interleaved, showing first {max_calls}"
     if source_file:
-        print(f"Detailed Operations from {source_file} (interleaved, showing first {max_calls})")
+        print(f"Detailed Operations from {source_file} ({shown})")
     else:
-        print(f"Detailed Operations (interleaved, showing first {max_calls})")
+        print(f"Detailed Operations ({shown})")
     print(f"{'='*80}")
+
+
+def print_interleaved_detailed(vidheap_calls: Optional[VidHeapStore], mapmemory_calls: Optional[MapMemoryStore], dupobject_calls: Optional[DupObjectStore], max_calls: int = 10, alloc_map: AllocationMap = None, alias_map: Dict[int, int] = None, source_file: str = None):
+    """Print detailed information for all operations interleaved by line number"""
+    print_detailed_header(max_calls, source_file)
+    
+    stores = {'vidheap': vidheap_calls, 'mapmemory': mapmemory_calls, 'dupobject': dupobject_calls}
     
+    # Print first N calls
+    for i, (line_num, call_type, row) in enumerate(islice(iter_line_order(stores), max_calls), 1):
+        print_detailed_call(i, call_type, stores[call_type][row], alloc_map, alias_map)
+
+
+def print_detailed_call(i: int, call_type: str, call, alloc_map: AllocationMap = None, alias_map: Dict[int, int] = None):
+    """Print the detailed view of one call; i is its position in the listing"""
     if alloc_map is None:
-        alloc_map = {}
+        alloc_map = AllocationMap(VidHeapStore())
     if alias_map is None:
         alias_map = {}
     
-    # Create a combined list with type tags
-    combined = []
-    for call in vidheap_calls:
-        combined.append(('vidheap', call.line_number, call))
-    for call in mapmemory_calls:
-        combined.append(('mapmemory', call.line_number, call))
-    for call in dupobject_calls:
-        combined.append(('dupobject', call.line_number, call))
-    
-    # Sort by line number
-    combined.sort(key=lambda x: x[1])
-    
-    # Print first N calls
-    for i, (call_type, line_num, call) in enumerate(combined[:max_calls], 1):
-        if call_type == 'vidheap':
-            print(f"\n{'='*80}")
-            print(f"║ 📋 VIDHEAPCONTROL Call #{i} (Line {line_num})")
-            print(f"{'='*80}")
-            print(f"  Function: {call.function}")
-            print(f"  hRoot: {call.hRoot}")
-            print(f"  hObjectParent: {call.hObjectParent}")
-            print(f"  hVASpace: {call.hVASpace}")
-            print(f"  Status: {call.status_after}")
-            print(f"  Duration: {call.duration_ns} ns ({call.duration_ns/1000:.2f} µs)")
-            print(f"  Alloc ptr: {call.alloc_ptr}")
-            print(f"  BL ptr: {call.bl_ptr}")
-            print()
-            
-            # Decode before values
-            before_type_val = parse_hex_or_int(call.alloc_size_before.type)
-            before_type_decoded = decode_type(before_type_val)
-            before_flags_val = parse_hex_or_int(call.alloc_size_before.flags)
-            before_flags_decoded = decode_flags(before_flags_val)
-            before_attr_val = parse_hex_or_int(call.alloc_size_before.attr)
-            before_attr_decoded = decode_attr(before_attr_val)
-            before_attr2_val = parse_hex_or_int(call.alloc_size_before.attr2)
-            before_attr2_decoded = decode_attr2(before_attr2_val)
-            
-            # Decode after values
-            after_type_val = parse_hex_or_int(call.alloc_size_after.type)
-            after_type_decoded = decode_type(after_type_val)
-            after_flags_val = parse_hex_or_int(call.alloc_size_after.flags)
-            after_flags_decoded = decode_flags(after_flags_val)
-            after_attr_val = parse_hex_or_int(call.alloc_size_after.attr)
-            after_attr_decoded = decode_attr(after_attr_val)
-            after_attr2_val = parse_hex_or_int(call.alloc_size_after.attr2)
-            after_attr2_decoded = decode_attr2(after_attr2_val)
-            
-            # Print table header
-            print(f"  {'Field':<20} │ {'Before':<35} │ {'After':<35}")
-            print(f"  {'─'*20}─┼─{'─'*35}─┼─{'─'*35}")
-            
-            # Basic fields
-            print(f"  {'hMemory':<20} │ {call.alloc_size_before.hMemory:<35} │ {call.alloc_size_after.hMemory:<35}")
-            before_type_str = f"{call.alloc_size_before.type} ({before_type_decoded})"
-            after_type_str = f"{call.alloc_size_after.type} ({after_type_decoded})"
-            print(f"  {'Type':<20} │ {before_type_str:<35} │ {after_type_str:<35}")
-            print(f"  {'Size':<20} │ {format_size(call.alloc_size_before.size):<35} │ {format_size(call.alloc_size_after.size):<35}")
-            print(f"  {'Alignment':<20} │ {call.alloc_size_before.alignment:<35} │ {call.alloc_size_after.alignment:<35}")
-            
-            # Flags
-            print(f"  {'Flags':<20} │ {call.alloc_size_before.flags:<35} │ {call.alloc_size_after.flags:<35}")
-            if before_flags_decoded or after_flags_decoded:
-                before_flags_str = ', '.join(before_flags_decoded) if before_flags_decoded else ''
-                after_flags_str = ', '.join(after_flags_decoded) if after_flags_decoded else ''
-                # Split long flag strings into multiple lines
-                if len(before_flags_str) > 33 or len(after_flags_str) > 33:
-                    before_parts = [before_flags_str[i:i+33] for i in range(0, len(before_flags_str), 33)] if before_flags_str else ['']
-                    after_parts = [after_flags_str[i:i+33] for i in range(0, len(after_flags_str), 33)] if after_flags_str else ['']
-                    max_parts = max(len(before_parts), len(after_parts))
-                    for idx in range(max_parts):
-                        b = before_parts[idx] if idx < len(before_parts) else ''
-                        a = after_parts[idx] if idx < len(after_parts) else ''
-                        print(f"  {'':<20} │ {b:<35} │ {a:<35}")
-                else:
-                    print(f"  {'':<20} │ {before_flags_str:<35} │ {after_flags_str:<35}")
-            
-            # Attr fields
-            print(f"  {'Attr':<20} │ {call.alloc_size_before.attr:<35} │ {call.alloc_size_after.attr:<35}")
-            # Key attr values in table
-            for key in ['location', 'format', 'page_size', 'physicality', 'coherency']:
-                before_val = before_attr_decoded.get(key, '')
-                after_val = after_attr_decoded.get(key, '')
-                print(f"  {'  '+key:<20} │ {before_val:<35} │ {after_val:<35}")
-            
-            # Attr2 fields
-            print(f"  {'Attr2':<20} │ {call.alloc_size_before.attr2:<35} │ {call.alloc_size_after.attr2:<35}")
-            # Key attr2 values in table
-            for key in ['zbc', 'gpu_cacheable', 'priority', 'memory_protection']:
-                before_val = before_attr2_decoded.get(key, '')
-                after_val = after_attr2_decoded.get(key, '')
-                print(f"  {'  '+key:<20} │ {before_val:<35} │ {after_val:<35}")
-            
-            # Final fields (only in after)
-            print(f"  {'Offset':<20} │ {'':<35} │ {call.alloc_size_after.offset:<35}")
-            print(f"  {'Limit':<20} │ {'':<35} │ {call.alloc_size_after.limit:<35}")
-            
-        elif call_type == 'mapmemory':
-            # Show related allocations
-            alloc_from_hmemory, alloc_from_hdma, resolved_hmemory, resolved_hdma = find_related_allocations(call, alloc_map, alias_map)
-            
-            # Highlight if missing allocations
-            missing_allocs = not alloc_from_hmemory and not alloc_from_hdma
-            print(f"\n{'='*80}")
-            if missing_allocs:
-                print(f"║ 🔗 MAPMEMORYDMA Call #{i} (Line {line_num}) ⚠️  *** MISSING ALLOCATIONS ***")
-            else:
-                print(f"║ 🔗 MAPMEMORYDMA Call #{i} (Line {line_num})")
-            print(f"{'='*80}")
-            
-            print(f"  hClient: {call.hClient}")
-            print(f"  hDevice: {call.hDevice}")
-            print(f"  hDma: {call.hDma}")
-            print(f"  hMemory: {call.hMemory}")
-            
-            if alloc_from_hmemory:
-                if resolved_hmemory:
-                    print(f"  → Related allocation (via hMemory={call.hMemory} → alias of {resolved_hmemory}):")
-                else:
-                    print(f"  → Related allocation (via hMemory={call.hMemory}):")
-                print(f"     Line: {alloc_from_hmemory.line_number}")
-                print(f"     Allocated size: {format_size(alloc_from_hmemory.alloc_size_after.size)}")
-                type_val = parse_hex_or_int(alloc_from_hmemory.alloc_size_after.type)
-                print(f"     Type: {decode_type(type_val)}")
-                attr_val = parse_hex_or_int(alloc_from_hmemory.alloc_size_after.attr)
-                attr_decoded = decode_attr(attr_val)
-                print(f"     Location: {attr_decoded.get('location', 'UNKNOWN')}")
+    line_num = call.line_number
+    if call_type == 'vidheap':
+        print(f"\n{'='*80}")
+        print(f"║ 📋 VIDHEAPCONTROL Call #{i} (Line {line_num})")
+        print(f"{'='*80}")
+        print(f"  Function: {hex(call.function)}")
+        print(f"  hRoot: {hex(call.hRoot)}")
+        print(f"  hObjectParent: {hex(call.hObjectParent)}")
+        print(f"  hVASpace: {hex(call.hVASpace)}")
+        print(f"  Status: {hex(call.status_after)}")
+        print(f"  Duration: {call.duration_ns} ns ({call.duration_ns/1000:.2f} µs)")
+        print(f"  Alloc ptr: {format_pointer(call.alloc_ptr)}")
+        print(f"  BL ptr: {format_pointer(call.bl_ptr)}")
+        print()
+        
+        before = call.alloc_size_before
+        after = call.alloc_size_after
+        
+        # Decode before values
+        before_type_decoded = decode_type(before.type)
+        before_flags_decoded = decode_flags(before.flags)
+        before_attr_decoded = decode_attr(before.attr)
+        before_attr2_decoded = decode_attr2(before.attr2)
+        
+        # Decode after values
+        after_type_decoded = decode_type(after.type)
+        after_flags_decoded = decode_flags(after.flags)
+        after_attr_decoded = decode_attr(after.attr)
+        after_attr2_decoded = decode_attr2(after.attr2)
+        
+        # Print table header
+        print(f"  {'Field':<20} │ {'Before':<35} │ {'After':<35}")
+        print(f"  {'─'*20}─┼─{'─'*35}─┼─{'─'*35}")
+        
+        # Basic fields
+        print(f"  {'hMemory':<20} │ {hex(before.hMemory):<35} │ {hex(after.hMemory):<35}")
+        before_type_str = f"{hex(before.type)} ({before_type_decoded})"
+        after_type_str = f"{hex(after.type)} ({after_type_decoded})"
+        print(f"  {'Type':<20} │ {before_type_str:<35} │ {after_type_str:<35}")
+        print(f"  {'Size':<20} │ {format_size(before.size):<35} │ {format_size(after.size):<35}")
+        print(f"  {'Alignment':<20} │ {hex(before.alignment):<35} │ {hex(after.alignment):<35}")
+        
+        # Flags
+        print(f"  {'Flags':<20} │ {hex(before.flags):<35} │ {hex(after.flags):<35}")
+        if before_flags_decoded or after_flags_decoded:
+            before_flags_str = ', '.join(before_flags_decoded) if before_flags_decoded else ''
+            after_flags_str = ', '.join(after_flags_decoded) if after_flags_decoded else ''
+            # Split long flag strings into multiple lines
+            if len(before_flags_str) > 33 or len(after_flags_str) > 33:
+                before_parts = [before_flags_str[i:i+33] for i in range(0, len(before_flags_str), 33)] if before_flags_str else ['']
+                after_parts = [after_flags_str[i:i+33] for i in range(0, len(after_flags_str), 33)] if after_flags_str else ['']
+                max_parts = max(len(before_parts), len(after_parts))
+                for idx in range(max_parts):
+                    b = before_parts[idx] if idx < len(before_parts) else ''
+                    a = after_parts[idx] if idx < len(after_parts) else ''
+                    print(f"  {'':<20} │ {b:<35} │ {a:<35}")
             else:
-                print(f"  ⚠️  No allocation found for hMemory={call.hMemory}")
-            
-            if alloc_from_hdma:
-                if resolved_hdma:
-                    print(f"  → Related allocation (via hDma={call.hDma} → alias of {resolved_hdma}):")
-                else:
-                    print(f"  → Related allocation (via hDma={call.hDma}):")
-                print(f"     Line: {alloc_from_hdma.line_number}")
-                print(f"     Allocated size: {format_size(alloc_from_hdma.alloc_size_after.size)}")
-                type_val = parse_hex_or_int(alloc_from_hdma.alloc_size_after.type)
-                print(f"     Type: {decode_type(type_val)}")
-                attr_val = parse_hex_or_int(alloc_from_hdma.alloc_size_after.attr)
-                attr_decoded = decode_attr(attr_val)
-                print(f"     Location: {attr_decoded.get('location', 'UNKNOWN')}")
+                print(f"  {'':<20} │ {before_flags_str:<35} │ {after_flags_str:<35}")
+        
+        # Attr fields
+        print(f"  {'Attr':<20} │ {hex(before.attr):<35} │ {hex(after.attr):<35}")
+        # Key attr values in table
+        for key in ['location', 'format', 'page_size', 'physicality', 'coherency']:
+            before_val = before_attr_decoded.get(key, '')
+            after_val = after_attr_decoded.get(key, '')
+            print(f"  {'  '+key:<20} │ {before_val:<35} │ {after_val:<35}")
+        
+        # Attr2 fields
+        print(f"  {'Attr2':<20} │ {hex(before.attr2):<35} │ {hex(after.attr2):<35}")
+        # Key attr2 values in table
+        for key in ['zbc', 'gpu_cacheable', 'priority', 'memory_protection']:
+            before_val = before_attr2_decoded.get(key, '')
+            after_val = after_attr2_decoded.get(key, '')
+            print(f"  {'  '+key:<20} │ {before_val:<35} │ {after_val:<35}")
+        
+        # Final fields (only in after)
+        print(f"  {'Offset':<20} │ {'':<35} │ {hex(after.offset):<35}")
+        print(f"  {'Limit':<20} │ {'':<35} │ {hex(after.limit):<35}")
+        
+    elif call_type == 'mapmemory':
+        # Show related allocations
+        alloc_from_hmemory, alloc_from_hdma, resolved_hmemory, resolved_hdma = find_related_allocations(call, alloc_map, alias_map)
+        
+        # Highlight if missing allocations
+        missing_allocs = not alloc_from_hmemory and not alloc_from_hdma
+        print(f"\n{'='*80}")
+        if missing_allocs:
+            print(f"║ 🔗 MAPMEMORYDMA Call #{i} (Line {line_num}) ⚠️  *** MISSING ALLOCATIONS ***")
+        else:
+            print(f"║ 🔗 MAPMEMORYDMA Call #{i} (Line {line_num})")
+        print(f"{'='*80}")
+        
+        print(f"  hClient: {hex(call.hClient)}")
+        print(f"  hDevice: {hex(call.hDevice)}")
+        print(f"  hDma: {hex(call.hDma)}")
+        print(f"  hMemory: {hex(call.hMemory)}")
+        
+        if alloc_from_hmemory:
+            if resolved_hmemory is not None:
+                print(f"  → Related allocation (via hMemory={hex(call.hMemory)} → alias of {hex(resolved_hmemory)}):")
             else:
-                print(f"  ⚠️  No allocation found for hDma={call.hDma}")
-            
-            print(f"  Offset: {call.offset}")
-            print(f"  Length: {format_size(call.length)}")
-            print(f"  Status: {call.status}")
-            print(f"  Duration: {call.duration_ns} ns ({call.duration_ns/1000:.2f} µs)")
-            
-            # Decode flags
-            flags_val = parse_hex_or_int(call.flags)
-            flags_decoded = decode_nvos46_flags(flags_val)
-            print(f"  Flags: {call.flags}")
-            for key, val in flags_decoded.items():
-                print(f"         {key}: {val}")
-            
-            # Decode flags2
-            flags2_val = parse_hex_or_int(call.flags2)
-            flags2_decoded = decode_nvos46_flags2(flags2_val)
-            print(f"  Flags2: {call.flags2}")
-            for key, val in flags2_decoded.items():
-                print(f"          {key}: {val}")
-            
-            print(f"  Kind Override: {call.kindOverride}")
-            print(f"  DMA Offset (before): {call.dmaOffset_before}")
-            print(f"  DMA Offset (after):  {call.dmaOffset_after}")
-            
-        elif call_type == 'dupobject':
-            print(f"\n{'='*80}")
-            print(f"║ 🔄 DUPOBJECT Call #{i} (Line {line_num})")
-            print(f"{'='*80}")
-            
-            print(f"  hClient: {call.hClient}")
-            print(f"  hParent: {call.hParent}")
-            print(f"  hClientSrc: {call.hClientSrc}")
-            print(f"  hObjectSrc: {call.hObjectSrc}")
-            print(f"  hObjectDest: {call.hObjectDest}")
-            print(f"  Flags: {call.flags}")
-            print(f"  Status: {call.status}")
-            print(f"  Duration: {call.duration_ns} ns ({call.duration_ns/1000:.2f} µs)")
-            
-            # Show source allocation if it exists
-            source_alloc = alloc_map.get(call.hObjectSrc)
-            if source_alloc:
-                print(f"  → Source allocation (hObjectSrc={call.hObjectSrc}):")
-                print(f"     Line: {source_alloc.line_number}")
-                print(f"     Allocated size: {format_size(source_alloc.alloc_size_after.size)}")
-                type_val = parse_hex_or_int(source_alloc.alloc_size_after.type)
-                print(f"     Type: {decode_type(type_val)}")
-                attr_val = parse_hex_or_int(source_alloc.alloc_size_after.attr)
-                attr_decoded = decode_attr(attr_val)
-                print(f"     Location: {attr_decoded.get('location', 'UNKNOWN')}")
+                print(f"  → Related allocation (via hMemory={hex(call.hMemory)}):")
+            print_allocation_brief(alloc_from_hmemory)
+        else:
+            print(f"  ⚠️  No allocation found for hMemory={hex(call.hMemory)}")
+        
+        if alloc_from_hdma:
+            if resolved_hdma is not None:
+                print(f"  → Related allocation (via hDma={hex(call.hDma)} → alias of {hex(resolved_hdma)}):")
             else:
-                print(f"  ⚠️  No allocation found for hObjectSrc={call.hObjectSrc}")
-            
-            print(f"  ➜ Creates alias: {call.hObjectDest} → {call.hObjectSrc}")
+                print(f"  → Related allocation (via hDma={hex(call.hDma)}):")
+            print_allocation_brief(alloc_from_hdma)
+        else:
+            print(f"  ⚠️  No allocation found for hDma={hex(call.hDma)}")
+        
+        print(f"  Offset: {hex(call.offset)}")
+        print(f"  Length: {format_size(call.length)}")
+        print(f"  Status: {hex(call.status)}")
+        print(f"  Duration: {call.duration_ns} ns ({call.duration_ns/1000:.2f} µs)")
+        
+        # Decode flags
+        flags_decoded = decode_nvos46_flags(call.flags)
+        print(f"  Flags: {hex(call.flags)}")
+        for key, val in flags_decoded.items():
+            print(f"         {key}: {val}")
+        
+        # Decode flags2
+        flags2_decoded = decode_nvos46_flags2(call.flags2)
+        print(f"  Flags2: {hex(call.flags2)}")
+        for key, val in flags2_decoded.items():
+            print(f"          {key}: {val}")
+        
+        print(f"  Kind Override: {hex(call.kindOverride)}")
+        print(f"  DMA Offset (before): {hex(call.dmaOffset_before)}")
+        print(f"  DMA Offset (after):  {hex(call.dmaOffset_after)}")
+        
+    elif call_type == 'dupobject':
+        print(f"\n{'='*80}")
+        print(f"║ 🔄 DUPOBJECT Call #{i} (Line {line_num})")
+        print(f"{'='*80}")
+        
+        print(f"  hClient: {hex(call.hClient)}")
+        print(f"  hParent: {hex(call.hParent)}")
+        print(f"  hClientSrc: {hex(call.hClientSrc)}")
+        print(f"  hObjectSrc: {hex(call.hObjectSrc)}")
+        print(f"  hObjectDest: {hex(call.hObjectDest)}")
+        print(f"  Flags: {hex(call.flags)}")
+        print(f"  Status: {hex(call.status)}")
+        print(f"  Duration: {call.duration_ns} ns ({call.duration_ns/1000:.2f} µs)")
+        
+        # Show source allocation if it exists
+        source_alloc = lookup_allocation(alloc_map, call.hObjectSrc, call.line_number)
+        if source_alloc:
+            print(f"  → Source allocation (hObjectSrc={hex(call.hObjectSrc)}):")
+            print_allocation_brief(source_alloc)
+        else:
+            print(f"  ⚠️  No allocation found for hObjectSrc={hex(call.hObjectSrc)}")
+        
+        print(f"  ➜ Creates alias: {hex(call.hObjectDest)} → {hex(call.hObjectSrc)}")
+
+
+def format_pointer(value: Optional[int]) -> str:
+    """Format an optional pointer the way the detailed view prints it"""
+    return hex(value) if value is not None else 'None'
+
+
+def print_allocation_brief(alloc: VidHeapControlCall):
+    """Print the line, size, type and location of a related allocation"""
+    print(f"     Line: {alloc.line_number}")
+    print(f"     Allocated size: {format_size(alloc.alloc_size_after.size)}")
+    print(f"     Type: {decode_type(alloc.alloc_size_after.type)}")
+    attr_decoded = decode_attr(alloc.alloc_size_after.attr)
+    print(f"     Location: {attr_decoded.get('location', 'UNKNOWN')}")
+
 
+# Fields exported as JSON numbers; all other integer fields are exported as
+# the hex strings the rmlog prints
+_JSON_NUMBER_FIELDS = frozenset(('line_number', 'duration_ns'))
+# Fields the rmlog prints in decimal
+_JSON_DECIMAL_FIELDS = frozenset(('numaNode',))
+# Pointer fields the rmlog prints as (nil) when zero
+_JSON_NIL_FIELDS = frozenset(('address',))
 
-def export_to_json(calls: List[VidHeapControlCall], filename: str):
+
+def record_to_dict(record) -> Dict:
+    """Convert a parsed call (or AllocSize) to a JSON-ready dict in the rmlog's notation"""
+    result = {}
+    for field in fields(record):
+        name = field.name
+        value = getattr(record, name)
+        if isinstance(value, AllocSize):
+            value = record_to_dict(value)
+        elif value is None or name in _JSON_NUMBER_FIELDS:
+            pass
+        elif name in _JSON_DECIMAL_FIELDS:
+            value = str(value)
+        elif name in _JSON_NIL_FIELDS and value == 0:
+            value = '(nil)'
+        else:
+            value = hex(value)
+        result[name] = value
+    return result
+
+
+def related_allocation_dict(source: str, alloc: Optional[VidHeapControlCall]) -> Optional[Dict]:
+    """Describe an allocation related to a mapping for JSON export"""
+    if not alloc:
+        return None
+    return {
+        'source': source,
+        'line': alloc.line_number,
+        'size': hex(alloc.alloc_size_after.size),
+        'type': hex(alloc.alloc_size_after.type),
+        'hMemory': hex(alloc.alloc_size_after.hMemory),
+        'attr': hex(alloc.alloc_size_after.attr),
+        'attr2': hex(alloc.alloc_size_after.attr2),
+    }
+
+
+def add_related_allocations(call_dict: Dict, call: MapMemoryDmaCall, alloc_map: AllocationMap) -> Dict:
+    """Add the allocations related to a mapMemoryDma call to its JSON dict"""
+    alloc_from_hmemory, alloc_from_hdma, _, _ = find_related_allocations(call, alloc_map)
+    call_dict['related_allocation_hmemory'] = related_allocation_dict('hMemory', alloc_from_hmemory)
+    call_dict['related_allocation_hdma'] = related_allocation_dict('hDma', alloc_from_hdma)
+    return call_dict
+
+
+def export_to_json(calls: VidHeapStore, filename: str):
     """Export vidHeapControl calls to JSON file"""
-    data = [asdict(call) for call in calls]
+    data = [record_to_dict(call) for call in calls]
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
     print(f"\nExported {len(calls)} vidHeapControl calls to {filename}")
 
 
-def export_mapmemory_to_json(calls: List[MapMemoryDmaCall], filename: str, alloc_map: Dict[str, VidHeapControlCall] = None):
+def export_mapmemory_to_json(calls: MapMemoryStore, filename: str, alloc_map: AllocationMap = None):
     """Export mapMemoryDma calls to JSON file with allocation relationships"""
     if alloc_map is None:
-        alloc_map = {}
+        alloc_map = AllocationMap(VidHeapStore())
     
-    data = []
-    for call in calls:
-        call_dict = asdict(call)
-        
-        # Add related allocation info from both hMemory and hDma
-        alloc_from_hmemory, alloc_from_hdma = find_related_allocations(call, alloc_map)
-        
-        if alloc_from_hmemory:
-            call_dict['related_allocation_hmemory'] = {
-                'source': 'hMemory',
-                'line': alloc_from_hmemory.line_number,
-                'size': alloc_from_hmemory.alloc_size_after.size,
-                'type': alloc_from_hmemory.alloc_size_after.type,
-                'hMemory': alloc_from_hmemory.alloc_size_after.hMemory,
-                'attr': alloc_from_hmemory.alloc_size_after.attr,
-                'attr2': alloc_from_hmemory.alloc_size_after.attr2,
-            }
-        else:
-            call_dict['related_allocation_hmemory'] = None
-        
-        if alloc_from_hdma:
-            call_dict['related_allocation_hdma'] = {
-                'source': 'hDma',
-                'line': alloc_from_hdma.line_number,
-                'size': alloc_from_hdma.alloc_size_after.size,
-                'type': alloc_from_hdma.alloc_size_after.type,
-                'hMemory': alloc_from_hdma.alloc_size_after.hMemory,
-                'attr': alloc_from_hdma.alloc_size_after.attr,
-                'attr2': alloc_from_hdma.alloc_size_after.attr2,
-            }
-        else:
-            call_dict['related_allocation_hdma'] = None
-        
-        data.append(call_dict)
+    data = [add_related_allocations(record_to_dict(call), call, alloc_map) for call in calls]
     
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
     print(f"\nExported {len(calls)} mapMemoryDma calls to {filename}")
 
 
-def export_combined_json(vidheap_calls: List[VidHeapControlCall], mapmemory_calls: List[MapMemoryDmaCall], 
-                         filename: str, alloc_map: Dict[str, VidHeapControlCall] = None, source_file: str = None):
-    """Export both vidHeapControl and mapMemoryDma calls to a single combined JSON file"""
+def open_export(filename: str):
+    """Open an export file for writing text, compressed when it ends in .gz or .zst"""
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'wt', compresslevel=6)
+    if filename.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"writing {filename} needs the zstandard package")
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(open(filename, 'wb')), encoding='utf-8')
+    return open(filename, 'w')
+
+
+def is_ndjson_name(filename: str) -> bool:
+    """Check for an .ndjson or .jsonl export name, before any compression suffix"""
+    for suffix in ('.gz', '.zst'):
+        if filename.endswith(suffix):
+            filename = filename[:-len(suffix)]
+    return filename.endswith(('.ndjson', '.jsonl'))
+
+
+def export_combined_json(vidheap_calls: VidHeapStore, mapmemory_calls: MapMemoryStore, 
+                         filename: str, alloc_map: AllocationMap = None, source_file: str = None,
+                         ndjson: bool = False, indent: int = None):
+    """Export both vidHeapControl and mapMemoryDma calls to a single combined JSON file
+
+    Both stores are already sorted by line number, so they are merged lazily
+    and written one call at a time by a CombinedJsonWriter.
+    """
     if alloc_map is None:
-        alloc_map = {}
+        alloc_map = AllocationMap(VidHeapStore())
     
-    # Prepare vidHeapControl data
-    vidheap_data = [asdict(call) for call in vidheap_calls]
-    for item in vidheap_data:
-        item['call_type'] = 'vidHeapControl'
-    
-    # Prepare mapMemoryDma data with relationships
-    mapmemory_data = []
-    for call in mapmemory_calls:
-        call_dict = asdict(call)
+    writer = CombinedJsonWriter(filename, source_file, ndjson, indent)
+    for _, call_type, row in iter_line_order({'vidheap': vidheap_calls, 'mapmemory': mapmemory_calls}):
+        if call_type == 'vidheap':
+            writer.write_vidheap(vidheap_calls[row])
+        else:
+            writer.write_mapmemory(mapmemory_calls[row], alloc_map)
+    writer.close(len(alloc_map))
+
+
+class CombinedJsonWriter:
+    """Write the combined JSON export one call at a time
+
+    The default document is {"calls": [...], "metadata": {...}} with one
+    compact call per line; indent pretty-prints it like json.dump(indent=N).
+    With ndjson every call is its own line and the last line is
+    {"metadata": {...}}. The metadata comes after the calls, once the
+    totals are known. Compression follows the file name (see open_export).
+    """
+
+    def __init__(self, filename: str, source_file: str = None, ndjson: bool = False, indent: int = None):
+        self.filename = filename
+        self.source_file = source_file
+        self.ndjson = ndjson
+        self.indent = indent
+        self.vidheap_calls = 0
+        self.mapmemory_calls = 0
+        self.encode = json.JSONEncoder(indent=indent).encode
+        self.f = open_export(filename)
+        if ndjson:
+            self._separator = self._next_separator = ''
+            self.encode = json.JSONEncoder().encode
+        elif indent is None:
+            self.f.write('{"calls": [')
+            self._separator = '\n'
+            self._next_separator = ',\n'
+        else:
+            pad = ' ' * indent
+            self.f.write(f'{{\n{pad}"calls": [')
+            self._separator = f'\n{pad * 2}'
+            self._next_separator = f',\n{pad * 2}'
+
+    def _write(self, call_dict: Dict):
+        text = self.encode(call_dict)
+        if self.indent is not None and not self.ndjson:
+            # Nest the pretty-printed call two levels deep, inside "calls"
+            text = text.replace('\n', '\n' + ' ' * (2 * self.indent))
+        self.f.write(self._separator)
+        self.f.write(text)
+        if self.ndjson:
+            self.f.write('\n')
+        self._separator = self._next_separator
+
+    def write_vidheap(self, call: VidHeapControlCall):
+        call_dict = record_to_dict(call)
+        call_dict['call_type'] = 'vidHeapControl'
+        self._write(call_dict)
+        self.vidheap_calls += 1
+
+    def write_mapmemory(self, call: MapMemoryDmaCall, alloc_map):
+        call_dict = record_to_dict(call)
         call_dict['call_type'] = 'mapMemoryDma'
-        
-        # Add related allocation info
-        alloc_from_hmemory, alloc_from_hdma, _, _ = find_related_allocations(call, alloc_map)
-        
-        if alloc_from_hmemory:
-            call_dict['related_allocation_hmemory'] = {
-                'source': 'hMemory',
-                'line': alloc_from_hmemory.line_number,
-                'size': alloc_from_hmemory.alloc_size_after.size,
-                'type': alloc_from_hmemory.alloc_size_after.type,
-                'hMemory': alloc_from_hmemory.alloc_size_after.hMemory,
-                'attr': alloc_from_hmemory.alloc_size_after.attr,
-                'attr2': alloc_from_hmemory.alloc_size_after.attr2,
-            }
+        add_related_allocations(call_dict, call, alloc_map)
+        self._write(call_dict)
+        self.mapmemory_calls += 1
+
+    def close(self, allocation_map_entries: int):
+        metadata = {
+            'source_file': self.source_file,
+            'total_calls': self.vidheap_calls + self.mapmemory_calls,
+            'vidheap_calls': self.vidheap_calls,
+            'mapmemory_calls': self.mapmemory_calls,
+            'allocation_map_entries': allocation_map_entries,
+        }
+        if self.ndjson:
+            self.f.write(json.dumps({'metadata': metadata}) + '\n')
+        elif self.indent is None:
+            self.f.write(f'\n], "metadata": {json.dumps(metadata)}}}\n')
         else:
-            call_dict['related_allocation_hmemory'] = None
-        
-        if alloc_from_hdma:
-            call_dict['related_allocation_hdma'] = {
-                'source': 'hDma',
-                'line': alloc_from_hdma.line_number,
-                'size': alloc_from_hdma.alloc_size_after.size,
-                'type': alloc_from_hdma.alloc_size_after.type,
-                'hMemory': alloc_from_hdma.alloc_size_after.hMemory,
-                'attr': alloc_from_hdma.alloc_size_after.attr,
-                'attr2': alloc_from_hdma.alloc_size_after.attr2,
-            }
+            pad = ' ' * self.indent
+            self.f.write(f'\n{pad}],\n{pad}"metadata": ')
+            self.f.write(json.dumps(metadata, indent=self.indent).replace('\n', '\n' + pad))
+            self.f.write('\n}\n')
+        self.f.close()
+        print(f"\nExported combined {self.vidheap_calls} vidHeapControl + {self.mapmemory_calls} mapMemoryDma calls to {self.filename}")
+
+
+# Columnar export: file format -> file suffix, and rows per written batch
+COLUMNAR_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+_COLUMNAR_BATCH_ROWS = 256 * 1024
+
+# Store column -> (BITFIELD_DECODERS key, prefix) of the decoded columns added to its table
+COLUMNAR_BITFIELD_COLUMNS = {
+    'vidheap': {'after_attr': ('attr', 'attr_'), 'after_attr2': ('attr2', 'attr2_')},
+    'mapmemory': {'flags': ('nvos46_flags', 'flags_'), 'flags2': ('nvos46_flags2', 'flags2_')},
+    'dupobject': {},
+}
+
+
+@functools.lru_cache(maxsize=None)
+def bitfield_labels(column: str, field: str) -> tuple[str, ...]:
+    """Return the label of every code of a field, indexed by code"""
+    high, low = BITFIELD_DECODERS[column][0][field]
+    return tuple(bitfield_label(column, field, code) for code in range(1 << (high - low + 1)))
+
+
+def columnar_batch(kind: str, store: CallStore, start: int, stop: int) -> tuple[Dict[str, object], Dict[str, tuple]]:
+    """Slice rows start:stop of a store into the columns of its columnar table
+
+    Every raw field stays an unsigned 64-bit integer column. The bitfields
+    in COLUMNAR_BITFIELD_COLUMNS add one code column per field, and
+    vidHeapControl tables one boolean column per allocation flag.
+
+    Returns:
+        (columns, labels) where labels maps each code column to the labels of its codes
+    """
+    columns = {}
+    labels = {}
+    for name in store.COLUMNS:
+        values = store.column(name)
+        columns[name] = _as_uint64(values)[start:stop] if np is not None else values[start:stop]
+    for name, (decoder, prefix) in COLUMNAR_BITFIELD_COLUMNS[kind].items():
+        for field, codes in decode_bitfield_columns(columns[name], BITFIELD_DECODERS[decoder][0]).items():
+            columns[prefix + field] = codes
+            labels[prefix + field] = bitfield_labels(decoder, field)
+    if kind == 'vidheap':
+        for name, values in decode_flag_columns(columns['after_flags']).items():
+            columns['flag_' + name.lower()] = values
+    return columns, labels
+
+
+class ColumnarWriter:
+    """Write the parsed calls as one table per call type in a directory
+
+    vidheap, mapmemory and dupobject tables are written in batches of
+    _COLUMNAR_BATCH_ROWS rows as Parquet or Arrow IPC files (with pyarrow)
+    or as CSV. Bitfield code columns become dictionary columns in Parquet
+    and Arrow, and carry their labels in CSV. Calls can be added one at a
+    time (--stream) or a whole store at once.
+    """
+
+    def __init__(self, directory: str, file_format: str, source_file: str = None):
+        self.directory = directory
+        self.file_format = file_format
+        self.source_file = source_file
+        self.pending = new_call_stores()
+        self.rows = dict.fromkeys(CALL_KINDS, 0)
+        self.writers = {}
+        self.files = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, kind: str) -> str:
+        return os.path.join(self.directory, kind + COLUMNAR_FORMATS[self.file_format])
+
+    def add(self, kind: str, call):
+        """Buffer one call, writing a batch once enough are pending"""
+        store = self.pending[kind]
+        store.append(call)
+        if len(store) >= _COLUMNAR_BATCH_ROWS:
+            self.write_store(kind, store)
+            self.pending[kind] = CALL_STORES[kind]()
+
+    def write_store(self, kind: str, store: CallStore):
+        """Write all calls of a store"""
+        for start in range(0, len(store), _COLUMNAR_BATCH_ROWS):
+            stop = min(start + _COLUMNAR_BATCH_ROWS, len(store))
+            self._write_batch(kind, *columnar_batch(kind, store, start, stop))
+            self.rows[kind] += stop - start
+
+    def _write_batch(self, kind: str, columns: Dict[str, object], labels: Dict[str, tuple]):
+        if self.file_format == 'csv':
+            self._write_csv(kind, columns, labels)
+            return
+        arrays = []
+        for name, values in columns.items():
+            if name in labels:
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(values, pa.int8()), pa.array(labels[name])))
+            else:
+                arrays.append(pa.array(values, pa.bool_() if name.startswith('flag_') else pa.uint64()))
+        batch = pa.RecordBatch.from_arrays(arrays, list(columns))
+        batch = batch.replace_schema_metadata({'source_file': self.source_file or '', 'call_type': kind})
+        writer = self.writers.get(kind)
+        if writer is None:
+            if self.file_format == 'parquet':
+                writer = pq.ParquetWriter(self.path(kind), batch.schema, compression='zstd')
+            else:
+                writer = pa.ipc.new_file(self.path(kind), batch.schema)
+            self.writers[kind] = writer
+        writer.write_batch(batch)
+
+    def _write_csv(self, kind: str, columns: Dict[str, object], labels: Dict[str, tuple]):
+        writer = self.writers.get(kind)
+        if writer is None:
+            self.files[kind] = open(self.path(kind), 'w', newline='')
+            writer = self.writers[kind] = csv.writer(self.files[kind])
+            writer.writerow(columns)
+        values = []
+        for name, column in columns.items():
+            if name in labels:
+                column = [labels[name][code] for code in column]
+            elif np is not None:
+                column = column.tolist()
+            values.append(column)
+        writer.writerows(zip(*values))
+
+    def close(self):
+        """Flush pending calls and finish every table, including empty ones"""
+        for kind in CALL_KINDS:
+            store = self.pending[kind]
+            if store or kind not in self.writers:
+                self._write_batch(kind, *columnar_batch(kind, store, 0, len(store)))
+                self.rows[kind] += len(store)
+            self.pending[kind] = CALL_STORES[kind]()
+        for kind, writer in self.writers.items():
+            if self.file_format != 'csv':
+                writer.close()
+        for f in self.files.values():
+            f.close()
+        print(f"\nExported {self.rows['vidheap']} vidHeapControl, {self.rows['mapmemory']} mapMemoryDma and "
+              f"{self.rows['dupobject']} dupObject calls as {self.file_format} tables to {self.directory}")
+
+
+class StreamProcessor:
+    """Consume calls in line order while holding state only for live handles
+
+    Summaries, the alias map, the allocation map and the JSON export are
+    updated as each call arrives. Allocations leave the maps again when a
+    successful NVOS32 FREE names their handle, so memory use follows the
+    number of live handles rather than the length of the log.
+    """
+
+    def __init__(self, json_writer: CombinedJsonWriter = None, detailed_kinds=(), max_detailed: int = 0,
+                 keep_timeline: bool = False, group_by: 'GroupByAggregator' = None, va_analyzer: 'VAAnalyzer' = None,
+                 failures: 'FailureForensics' = None, heap_series: HeapSeriesCollector = None,
+                 churn: ChurnDetector = None, clients: ClientBreakdown = None):
+        self.vidheap_summary = CallSummary()
+        self.churn = churn
+        self.clients = clients
+        self.heap_series = heap_series
+        self.group_by = group_by
+        self.va_analyzer = va_analyzer
+        self.failures = failures
+        self.lifetimes = LifetimeTracker(keep_timeline)
+        self.vidheap_latency = LatencyBreakdown(VIDHEAP_LATENCY_GROUPS)
+        self.allocations = AllocationBreakdown()
+        self.mapmemory_latency = LatencyBreakdown(MAPMEMORY_LATENCY_GROUPS)
+        self.mapmemory_summary = CallSummary()
+        self.dupobject_calls = 0
+        self.successful_aliases = 0
+        self.mappings_with_hmemory = 0
+        self.mappings_with_hdma = 0
+        self.mappings_with_any = 0
+        self.alias_map = AliasMap()
+        self.alloc_map: Dict[int, VidHeapControlCall] = {}
+        self.json_writer = json_writer
+        self.detailed_kinds = frozenset(detailed_kinds)
+        self.max_detailed = max_detailed
+        self.detailed_printed = 0
+
+    def sinks(self) -> Dict[str, Callable]:
+        return {'vidheap': self.add_vidheap, 'mapmemory': self.add_mapmemory, 'dupobject': self.add_dupobject}
+
+    def _print_detailed(self, call_type: str, call):
+        """Print a call in the detailed view while it is among the first N shown"""
+        if self.detailed_printed < self.max_detailed and call_type in self.detailed_kinds:
+            self.detailed_printed += 1
+            print_detailed_call(self.detailed_printed, call_type, call, self.alloc_map, self.alias_map)
+
+    def add_vidheap(self, call: VidHeapControlCall):
+        self.vidheap_summary.add(call.status_after, call.alloc_size_after.size, call.duration_ns)
+        h_memory = call.alloc_size_after.hMemory
+        self.lifetimes.add(call.line_number, call.function, call.status_after, h_memory,
+                           call.alloc_size_after.size, call.duration_ns)
+        self.vidheap_latency.add(call.duration_ns, {'function': call.function, 'after_type': call.alloc_size_after.type,
+                                                    'after_attr': call.alloc_size_after.attr})
+        self.allocations.add(call.function, call.status_after, call.alloc_size_after.attr, call.alloc_size_after.size)
+        if self.group_by:
+            self.group_by.add(call)
+        if self.va_analyzer:
+            self.va_analyzer.add_vidheap(call.function, call.status_after, h_memory)
+        if self.failures:
+            self.failures.add_call(call)
+        if self.heap_series:
+            self.heap_series.add(call.line_number, call.hVASpace, call.free, call.total)
+        if self.churn:
+            after = call.alloc_size_after
+            self.churn.add(call.line_number, call.function, call.status_after, after.hMemory, after.size,
+                           after.type, after.attr, call.duration_ns)
+        if self.clients:
+            self.clients.add_vidheap(call.hRoot, call.status_after, call.alloc_size_after.size, call.duration_ns)
+            self.clients.track_live(call.hRoot, call.line_number, call.function, call.status_after, h_memory,
+                                    call.alloc_size_after.size)
+        if call.status_after == 0 and h_memory:
+            if call.function == NVOS32_FUNCTION_FREE:
+                self.alloc_map.pop(h_memory, None)
+                self.alias_map.discard(h_memory)
+            elif call.function in NVOS32_ALLOC_FUNCTIONS:
+                self.alloc_map[h_memory] = call
+                self.alias_map.discard(h_memory)
+        self._print_detailed('vidheap', call)
+        if self.json_writer:
+            self.json_writer.write_vidheap(call)
+
+    def add_mapmemory(self, call: MapMemoryDmaCall):
+        self.mapmemory_summary.add(call.status, call.length, call.duration_ns)
+        self.mapmemory_latency.add(call.duration_ns, {'flags': call.flags})
+        if self.va_analyzer:
+            self.va_analyzer.add_mapping(call.line_number, call.hDma, call.hMemory, call.dmaOffset_after,
+                                         call.length, call.flags, call.status)
+        if self.failures:
+            self.failures.add_mapmemory(call.line_number, call.duration_ns)
+        if self.clients:
+            self.clients.add_mapmemory(call.hClient, call.status, call.length, call.duration_ns)
+        has_hmemory = call.hMemory in self.alloc_map
+        has_hdma = call.hDma in self.alloc_map
+        self.mappings_with_hmemory += has_hmemory
+        self.mappings_with_hdma += has_hdma
+        self.mappings_with_any += has_hmemory or has_hdma
+        self._print_detailed('mapmemory', call)
+        if self.json_writer:
+            self.json_writer.write_mapmemory(call, self.alloc_map)
+
+    def add_dupobject(self, call: DupObjectCall):
+        self.dupobject_calls += 1
+        if self.clients:
+            self.clients.add_dupobject(call.hClient)
+        if call.status == 0:
+            self.successful_aliases += 1
+            self.alias_map.add(call.hObjectDest, call.hObjectSrc)
+            # alloc_map holds aliases too, so the source stays valid after the handle it was duped from is freed
+            alloc = self.alloc_map.get(call.hObjectSrc)
+            if alloc is None:
+                alloc = self.alloc_map.get(self.alias_map.resolve(call.hObjectSrc))
+            if alloc:
+                self.alloc_map[call.hObjectDest] = alloc
+        self._print_detailed('dupobject', call)
+
+
+def run_stream(args, jobs: int, show_vidheap: bool, show_mapmemory: bool, show_dupobject: bool,
+               group_by: GroupByAggregator = None) -> int:
+    """Process the rmlog in --stream mode"""
+    json_writer = CombinedJsonWriter(args.json, args.rmlog_file, args.ndjson, args.json_indent) if args.json else None
+    columnar = ColumnarWriter(args.columnar, args.columnar_format, args.rmlog_file) if args.columnar else None
+    detailed_kinds = [kind for kind, shown in (('vidheap', show_vidheap), ('mapmemory', show_mapmemory),
+                                               ('dupobject', show_dupobject)) if shown]
+    processor = StreamProcessor(json_writer, detailed_kinds, 0 if args.no_detailed else args.detailed,
+                                keep_timeline=bool(args.timeline), group_by=group_by,
+                                va_analyzer=VAAnalyzer() if args.va_analysis else None,
+                                failures=FailureForensics(args.failure_window) if args.failures else None,
+                                heap_series=HeapSeriesCollector(args.heap_series_points) if args.heap_series else None,
+                                churn=ChurnDetector(args.churn_window) if args.churn else None,
+                                clients=ClientBreakdown() if args.by_client else None)
+    sinks = processor.sinks()
+    
+    print(f"Processing {args.rmlog_file} (streaming)...")
+    if not args.no_detailed:
+        print_detailed_header(args.detailed, args.rmlog_file)
+    for kind, call in iter_rmlog_calls(args.rmlog_file, jobs, args.where):
+        sinks[kind](call)
+        if columnar:
+            columnar.add(kind, call)
+    
+    print(f"\nFound {processor.dupobject_calls} dupObject calls ({processor.successful_aliases} successful aliases)")
+    print(f"Live allocation map has {len(processor.alloc_map)} entries at end of log")
+    
+    vidheap_summary = processor.vidheap_summary
+    mapmemory_summary = processor.mapmemory_summary
+    if show_vidheap:
+        if not vidheap_summary.calls:
+            print("No vidHeapControl calls found!")
         else:
-            call_dict['related_allocation_hdma'] = None
-        
-        mapmemory_data.append(call_dict)
-    
-    # Combine both lists and sort by line number
-    combined_data = vidheap_data + mapmemory_data
-    combined_data.sort(key=lambda x: x['line_number'])
-    
-    # Create final structure
-    output = {
-        'metadata': {
-            'source_file': source_file,
-            'total_calls': len(combined_data),
-            'vidheap_calls': len(vidheap_calls),
-            'mapmemory_calls': len(mapmemory_calls),
-            'allocation_map_entries': len(alloc_map),
-        },
-        'calls': combined_data
-    }
+            print(f"Found {vidheap_summary.calls} vidHeapControl calls")
+            if not args.no_summary:
+                print_call_summary('VidHeapControl', vidheap_summary, 'allocations', 'allocated')
+                print_allocation_breakdown(processor.allocations.result())
+                print_latency_breakdown('VidHeapControl', processor.vidheap_latency)
+                print_lifetime_summary(processor.lifetimes)
     
-    with open(filename, 'w') as f:
-        json.dump(output, f, indent=2)
-    print(f"\nExported combined {len(vidheap_calls)} vidHeapControl + {len(mapmemory_calls)} mapMemoryDma calls to {filename}")
+    if show_mapmemory:
+        if not mapmemory_summary.calls:
+            print("No mapMemoryDma calls found!")
+        else:
+            total = mapmemory_summary.calls
+            print(f"Found {total} mapMemoryDma calls")
+            print(f"  → {processor.mappings_with_hmemory} mappings had a live hMemory allocation ({processor.mappings_with_hmemory*100//total}%)")
+            print(f"  → {processor.mappings_with_hdma} mappings had a live hDma allocation ({processor.mappings_with_hdma*100//total}%)")
+            print(f"  → {processor.mappings_with_any} mappings had at least one live allocation ({processor.mappings_with_any*100//total}%)")
+            if not args.no_summary:
+                print_call_summary('MapMemoryDma', mapmemory_summary, 'mappings', 'mapped')
+                print_latency_breakdown('MapMemoryDma', processor.mapmemory_latency)
+    
+    if group_by:
+        print_group_by(group_by)
+    if processor.va_analyzer:
+        print_va_analysis(processor.va_analyzer)
+    if processor.failures:
+        print_failure_forensics(processor.failures, args.failures)
+    if processor.churn:
+        print_churn(processor.churn)
+    if processor.clients:
+        print_client_breakdown(processor.clients)
+    if json_writer:
+        json_writer.close(len(processor.alloc_map))
+    if columnar:
+        columnar.close()
+    if args.timeline:
+        export_lifetime_timeline(processor.lifetimes, args.timeline, args.rmlog_file)
+    if args.heap_series:
+        export_heap_series(processor.heap_series, args.heap_series, args.heap_series_method, args.rmlog_file)
+    
+    return 0
+
+
+def print_rolling_summary(processor: StreamProcessor, lines: int, new_lines: int, previous: Dict[str, int]):
+    """Print one refresh of --follow: running totals plus calls since the last refresh"""
+    print(f"\n[{time.strftime('%H:%M:%S')}] {lines} lines (+{new_lines})")
+    for title, summary, latency, verb in (
+            ('vidHeapControl', processor.vidheap_summary, processor.vidheap_latency.overall, 'allocated'),
+            ('mapMemoryDma', processor.mapmemory_summary, processor.mapmemory_latency.overall, 'mapped')):
+        new_calls = summary.calls - previous.get(title, 0)
+        previous[title] = summary.calls
+        if not summary.calls:
+            print(f"  {title:<15} no calls yet")
+            continue
+        print(f"  {title:<15} {summary.calls} calls (+{new_calls}), {summary.failed} failed, "
+              f"{format_size(summary.total_bytes)} {verb}, "
+              f"latency min/avg/max {summary.duration_min/1000:.2f}/{summary.duration_avg/1000:.2f}/"
+              f"{summary.duration_max/1000:.2f} µs, p99 {latency.percentile(99)/1000:.2f} µs")
+    lifetimes = processor.lifetimes
+    print(f"  {'live memory':<15} {format_size(lifetimes.live_bytes)} in {len(lifetimes.live)} allocations, "
+          f"peak {format_size(lifetimes.peak_bytes)} at line {lifetimes.peak_line}")
+    print(f"  {'live handles':<15} {len(processor.alloc_map)}")
+
+
+def run_follow(args) -> int:
+    """Process the rmlog in --follow mode: parse appended lines and refresh rolling summaries
+
+    Only complete lines past the last parsed offset are scanned on each
+    poll, so the cost of a refresh follows the amount of new data.
+    """
+    record_filter = compile_record_filter(args.where) if args.where else None
+    processor = StreamProcessor()
+    sinks = processor.sinks() if record_filter is None else record_filter.wrap_sinks(processor.sinks())
+    offset = 0
+    lines = 0
+    reported_lines = 0
+    previous = {}
+    
+    print(f"Following {args.rmlog_file} (refresh every {args.interval:g} s, Ctrl+C to stop)...")
+    try:
+        while True:
+            try:
+                file_size = os.path.getsize(args.rmlog_file)
+            except FileNotFoundError:
+                file_size = 0
+            if file_size < offset:
+                print(f"\n{args.rmlog_file} was truncated; starting over")
+                processor = StreamProcessor()
+                sinks = processor.sinks() if record_filter is None else record_filter.wrap_sinks(processor.sinks())
+                offset = lines = reported_lines = 0
+                previous = {}
+            
+            if file_size > offset:
+                with open(args.rmlog_file, 'rb') as f:
+                    mm = _open_rmlog_mmap(f)
+                    if mm is not None:
+                        with mm:
+                            # Leave a partially written last line for the next poll
+                            end = mm.rfind(b'\n', offset, len(mm)) + 1
+                            if end > offset:
+                                lines += _scan_rmlog_range(mm, offset, end, sinks, lines)
+                                offset = end
+            
+            print_rolling_summary(processor, lines, lines - reported_lines, previous)
+            reported_lines = lines
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    
+    if not args.no_summary:
+        print_call_summary('VidHeapControl', processor.vidheap_summary, 'allocations', 'allocated')
+        print_latency_breakdown('VidHeapControl', processor.vidheap_latency)
+        print_call_summary('MapMemoryDma', processor.mapmemory_summary, 'mappings', 'mapped')
+        print_latency_breakdown('MapMemoryDma', processor.mapmemory_latency)
+    return 0
+
+
+@dataclass
+class LogProfile:
+    """The numbers --compare puts side by side for one rmlog
+
+    by_type and by_location map a label to (successful allocations, bytes);
+    the latency dicts map 'p50'... and 'max' to ns.
+    """
+    filename: str
+    vidheap_calls: int
+    allocations: int
+    allocated_bytes: int
+    frees: int
+    failed_vidheap: int
+    mapmemory_calls: int
+    mapped_bytes: int
+    failed_mapmemory: int
+    peak_bytes: int
+    peak_line: int
+    by_type: Dict[str, tuple[int, int]]
+    by_location: Dict[str, tuple[int, int]]
+    vidheap_latency: Dict[str, Optional[int]]
+    mapmemory_latency: Dict[str, Optional[int]]
+
+
+def latency_percentiles(histogram: LatencyHistogram) -> Dict[str, Optional[int]]:
+    """Return {'p50': ns, ..., 'max': ns} for a histogram"""
+    values = {'p' + format(p, 'g'): histogram.percentile(p) for p in LatencyHistogram.PERCENTILES}
+    values['max'] = histogram.max
+    return values
+
+
+def _group_totals(aggregator: GroupByAggregator) -> Dict[str, tuple[int, int]]:
+    """Return {label: (allocations, bytes)} for a single-field GroupByAggregator"""
+    label_of = aggregator.fields[0][2]
+    return {label_of(key[0]): (allocations, total)
+            for key, (_, allocations, total, _) in aggregator.groups.items() if allocations}
+
+
+def profile_rmlog(filename: str, where: str = None) -> LogProfile:
+    """Parse one rmlog chunk by chunk and reduce it to a LogProfile
+
+    Only one chunk of calls is held at a time, and the result is small
+    enough to send back from a --compare worker process. With where, only
+    calls matching that --where expression are profiled.
+    """
+    vidheap = CallSummary()
+    mapmemory = CallSummary()
+    vidheap_latency = LatencyHistogram()
+    mapmemory_latency = LatencyHistogram()
+    by_type = GroupByAggregator(['type'])
+    by_location = GroupByAggregator(['location'])
+    lifetimes = LifetimeTracker()
+    frees = 0
+    for stores, line_base in iter_rmlog_chunks(filename, where=where):
+        calls = stores['vidheap']
+        vidheap.add_columns(calls.column('status_after'), calls.column('after_size'), calls.column('duration_ns'))
+        by_type.add_columns(calls)
+        by_location.add_columns(calls)
+        for line_number, function, status, h_memory, size, duration_ns in zip(
+                calls.column('line_number'), calls.column('function'), calls.column('status_after'),
+                calls.column('after_hMemory'), calls.column('after_size'), calls.column('duration_ns')):
+            lifetimes.add(line_number + line_base, function, status, h_memory, size, duration_ns)
+            vidheap_latency.add(duration_ns)
+            frees += status == 0 and function == NVOS32_FUNCTION_FREE
+        mappings = stores['mapmemory']
+        mapmemory.add_columns(mappings.column('status'), mappings.column('length'), mappings.column('duration_ns'))
+        for duration_ns in mappings.column('duration_ns'):
+            mapmemory_latency.add(duration_ns)
+    
+    by_type = _group_totals(by_type)
+    by_location = _group_totals(by_location)
+    return LogProfile(
+        filename=filename,
+        vidheap_calls=vidheap.calls,
+        allocations=sum(count for count, _ in by_type.values()),
+        allocated_bytes=sum(total for _, total in by_type.values()),
+        frees=frees,
+        failed_vidheap=vidheap.failed,
+        mapmemory_calls=mapmemory.calls,
+        mapped_bytes=mapmemory.total_bytes,
+        failed_mapmemory=mapmemory.failed,
+        peak_bytes=lifetimes.peak_bytes,
+        peak_line=lifetimes.peak_line,
+        by_type=by_type,
+        by_location=by_location,
+        vidheap_latency=latency_percentiles(vidheap_latency),
+        mapmemory_latency=latency_percentiles(mapmemory_latency),
+    )
+
+
+def _format_delta(value: Optional[float], baseline: Optional[float]) -> str:
+    """Relative change of value against baseline, e.g. '+12.5%'"""
+    if value is None or baseline is None or value == baseline:
+        return ''
+    if not baseline:
+        return ' (new)'
+    return f" ({(value - baseline) * 100 / baseline:+.1f}%)"
+
+
+def print_comparison(profiles: List[LogProfile]):
+    """Print every profile next to the first (the baseline), with relative changes"""
+    baseline = profiles[0]
+    print(f"\n{'='*80}")
+    print(f"Comparison against baseline {baseline.filename}")
+    print(f"{'='*80}")
+    names = [os.path.basename(profile.filename) for profile in profiles]
+    
+    def size(value: Optional[int]) -> str:
+        return format_size(value).split(' (')[0] if value is not None else '-'
+    
+    def usec(value: Optional[int]) -> str:
+        return f"{value/1000:.2f}" if value is not None else '-'
+    
+    def table(title: str, metrics: List[tuple[str, Callable[[LogProfile], Optional[int]], Callable[[int], str]]]):
+        rows = [[title] + names]
+        for label, value_of, fmt in metrics:
+            values = [value_of(profile) for profile in profiles]
+            rows.append(['  ' + label, fmt(values[0]) if values[0] is not None else '-']
+                        + [(fmt(value) if value is not None else '-') + _format_delta(value, values[0])
+                           for value in values[1:]])
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        print()
+        for row in rows:
+            print('  '.join(cell.ljust(width) if i == 0 else cell.rjust(width)
+                            for i, (cell, width) in enumerate(zip(row, widths))))
+    
+    table('Calls', [
+        ('vidHeapControl calls', lambda profile: profile.vidheap_calls, str),
+        ('successful allocations', lambda profile: profile.allocations, str),
+        ('successful frees', lambda profile: profile.frees, str),
+        ('failed vidHeapControl', lambda profile: profile.failed_vidheap, str),
+        ('bytes allocated', lambda profile: profile.allocated_bytes, size),
+        ('mapMemoryDma calls', lambda profile: profile.mapmemory_calls, str),
+        ('failed mapMemoryDma', lambda profile: profile.failed_mapmemory, str),
+        ('bytes mapped', lambda profile: profile.mapped_bytes, size),
+        ('peak live memory', lambda profile: profile.peak_bytes, size),
+    ])
+    for title, groups_of in (('Allocations by type', lambda profile: profile.by_type),
+                             ('Allocations by location', lambda profile: profile.by_location)):
+        labels = sorted({label for profile in profiles for label in groups_of(profile)},
+                        key=lambda label: groups_of(baseline).get(label, (0, 0))[1], reverse=True)
+        metrics = []
+        for label in labels:
+            metrics.append((f"{label} allocations", lambda profile, label=label: groups_of(profile).get(label, (0, 0))[0], str))
+            metrics.append((f"{label} bytes", lambda profile, label=label: groups_of(profile).get(label, (0, 0))[1], size))
+        table(title, metrics)
+    for title, latency_of in (('vidHeapControl latency (µs)', lambda profile: profile.vidheap_latency),
+                              ('mapMemoryDma latency (µs)', lambda profile: profile.mapmemory_latency)):
+        table(title, [(name, lambda profile, name=name: latency_of(profile)[name], usec)
+                      for name in latency_of(baseline)])
+
+
+def run_compare(args) -> int:
+    """Process --compare: profile the baseline and test rmlogs in parallel and print the differences"""
+    filenames = [args.rmlog_file] + args.compare
+    processes = min(len(filenames), mp.cpu_count())
+    print(f"Comparing {args.rmlog_file} (baseline) with {', '.join(args.compare)}...")
+    if processes > 1:
+        with mp.Pool(processes=processes) as pool:
+            profiles = pool.map(functools.partial(profile_rmlog, where=args.where), filenames)
+    else:
+        profiles = [profile_rmlog(filename, args.where) for filename in filenames]
+    print_comparison(profiles)
+    return 0
+
+
+def parse_line_range(text: str) -> tuple[Optional[int], Optional[int]]:
+    """Parse --lines: FIRST:LAST with either end optional, or a single LINE"""
+    first, separator, last = text.partition(':')
+    first = int(first) if first.strip() else None
+    if not separator:
+        return first, first
+    return first, int(last) if last.strip() else None
+
+
+def run_indexed_detailed(args, jobs: int, kinds) -> int:
+    """Print the detailed view of the calls selected by --lines/--handle through the sidecar index
+
+    Only the selected calls (and the allocations they refer to) are parsed
+    from the rmlog; the index is built on the first use.
+    """
+    try:
+        index = open_rmlog_index(args.rmlog_file, jobs)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    with index:
+        return _print_indexed_detailed(args, index, kinds)
+
+
+def _print_indexed_detailed(args, index: RmlogIndex, kinds) -> int:
+    selection = []
+    rows = None
+    if args.lines:
+        first, last = args.lines
+        rows = index.rows_in_lines(first, last)
+        selection.append(f"lines {'' if first is None else first}-{'' if last is None else last}")
+    if args.handle is not None:
+        handle_rows = index.rows_for_handle(args.handle)
+        if rows is not None:
+            handle_rows = [row for row in handle_rows if row in rows]
+        rows = handle_rows
+        selection.append(f"handle {hex(args.handle)}")
+    
+    kind_codes = {CALL_KINDS.index(kind) for kind in kinds}
+    call_kinds = index.sections['call_kind']
+    record_filter = compile_record_filter(args.where) if args.where else None
+    print_detailed_header(args.detailed, args.rmlog_file, ', '.join(selection))
+    shown = 0
+    for row in rows:
+        if shown == args.detailed:
+            break
+        if call_kinds[row] not in kind_codes:
+            continue
+        kind, call = index.kind(row), index.call(row)
+        if record_filter and not record_filter.matches(kind, call):
+            continue
+        shown += 1
+        print_detailed_call(shown, kind, call, index.alloc_map, index.alias_map)
+    if not shown:
+        print("No matching calls")
+    return 0
 
 
 def main():
@@ -1272,8 +4699,25 @@ def main():
                         help='Path to rmlog file (default: rmlog)')
     parser.add_argument('--json', metavar='FILE',
                         help='Export both call types to a combined JSON file (sorted by line number)')
+    parser.add_argument('--ndjson', action='store_true',
+                        help='Write --json as newline-delimited JSON, one call per line and the metadata last '
+                             '(implied by a .ndjson or .jsonl name)')
+    parser.add_argument('--json-indent', type=int, metavar='N',
+                        help='Pretty-print --json with N-space indentation (default: compact, one call per line)')
+    parser.add_argument('--columnar', metavar='DIR',
+                        help='Export each call type as an integer-typed table with decoded attr/flags columns '
+                             'to DIR/vidheap, DIR/mapmemory and DIR/dupobject')
+    parser.add_argument('--columnar-format', choices=['auto'] + list(COLUMNAR_FORMATS), default='auto',
+                        help='Table format for --columnar (default: parquet with pyarrow installed, csv otherwise)')
     parser.add_argument('--detailed', type=int, metavar='N', default=10,
                         help='Show detailed info for first N calls (default: 10)')
+    parser.add_argument('--lines', type=parse_line_range, metavar='FIRST:LAST',
+                        help='Only show the detailed calls on lines FIRST..LAST (either end optional, or one LINE), '
+                             f'read through the sidecar index <rmlog_file>{RMLOG_INDEX_SUFFIX} instead of parsing '
+                             'the whole log; the index is built on first use. Skips the summaries')
+    parser.add_argument('--handle', type=lambda value: int(value, 0), metavar='HANDLE',
+                        help='Only show the detailed calls naming HANDLE (hMemory, hDma or a dupObject handle), '
+                             'read through the sidecar index like --lines')
     parser.add_argument('--no-summary', action='store_true',
                         help='Skip summary output')
     parser.add_argument('--no-detailed', action='store_true',
@@ -1285,19 +4729,79 @@ def main():
     parser.add_argument('--filter-type', nargs='+', 
                         choices=['vidheap', 'mapmemory', 'dupobject'],
                         help='Filter to show only specific call types (can specify multiple)')
+    parser.add_argument('--where', metavar='EXPR',
+                        help='Only keep calls matching EXPR, dropped while parsing, e.g. '
+                             '"size >= 64MiB and location == VIDMEM and status != 0x0" or "duration > 1ms". '
+                             'Comparisons (== != < <= > >=) of call fields (--group-by fields, raw columns, size, '
+                             'duration, mapMemoryDma flags fields) joined by and/or/not; a comparison on a field '
+                             'a call type lacks never matches, not even under not')
+    parser.add_argument('--jobs', '-j', type=int, metavar='N', default=1,
+                        help='Parse the rmlog with N worker processes (default: 1, 0 = all CPUs)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Update summaries, maps and the JSON export while parsing, keeping only live handles in memory')
+    parser.add_argument('--group-by', metavar='FIELDS',
+                        help='Aggregate vidHeapControl calls by comma-separated fields, e.g. type,location,page_size,hVASpace '
+                             '(function, type, flags, attr/attr2 field names, or any raw call/AllocSize field)')
+    parser.add_argument('--va-analysis', action='store_true',
+                        help='Analyze the GPU VA layout per hDma: overlaps, gaps, fragmentation, largest free span '
+                             'and the mappings live when a mapping failed')
+    parser.add_argument('--failures', type=int, nargs='?', const=20, metavar='N',
+                        help='Report the heap state before failed vidHeapControl calls: free/total trend, live '
+                             'allocations, the largest of them and the preceding call rate (first N failures, default 20)')
+    parser.add_argument('--failure-window', type=int, metavar='LINES', default=10000,
+                        help='Lines before a failure counted for its call rate (default: 10000)')
+    parser.add_argument('--churn', action='store_true',
+                        help='Report allocation churn: blocks of the same size, type and attr freed and allocated '
+                             'again within --churn-window lines, and the RM time a driver-side cache would save')
+    parser.add_argument('--churn-window', type=int, metavar='LINES', default=1000,
+                        help='Lines a freed block stays reusable for --churn (default: 1000)')
+    parser.add_argument('--by-client', action='store_true',
+                        help='Break calls, bytes, latency and peak live memory down per RM client (hRoot/hClient); '
+                             'with --jobs every worker aggregates its chunk and the partials are merged')
+    parser.add_argument('--timeline', metavar='FILE',
+                        help='Export the live-memory timeline (every allocation and FREE with the live bytes after it) '
+                             'to FILE, as CSV if it ends in .csv and JSON otherwise')
+    parser.add_argument('--heap-series', metavar='FILE',
+                        help='Export the free/total heap size reported by vidHeapControl per hVASpace over log lines, '
+                             'downsampled for plotting, to FILE (CSV if it ends in .csv, JSON otherwise)')
+    parser.add_argument('--heap-series-points', type=int, metavar='N', default=1000,
+                        help='Maximum points per hVASpace in --heap-series (default: 1000)')
+    parser.add_argument('--heap-series-method', choices=['lttb', 'minmax'], default='lttb',
+                        help='Downsampling for --heap-series: Largest-Triangle-Three-Buckets or per-range min/max '
+                             '(default: lttb)')
+    parser.add_argument('--cache', action='store_true',
+                        help=f'Reuse (or create) a cache of the parsed calls in <rmlog_file>{RMLOG_CACHE_SUFFIX}; '
+                             'an appended log only parses the new lines')
+    parser.add_argument('--compare', nargs='+', metavar='TEST_RMLOG',
+                        help='Compare rmlog_file (the baseline) with one or more test rmlogs: call and allocation '
+                             'counts, bytes per type and location, latency percentiles and peak live memory. '
+                             'Each log is parsed in its own process')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep parsing lines appended to the rmlog and print rolling summaries until interrupted')
+    parser.add_argument('--interval', type=float, metavar='SECONDS', default=2.0,
+                        help='Refresh interval for --follow (default: 2)')
     
     args = parser.parse_args()
-    
-    print(f"Processing {args.rmlog_file}...")
-    vidheap_calls, mapmemory_calls, dupobject_calls = process_rmlog(args.rmlog_file)
-    
-    # Build alias map from dupObject calls
-    alias_map = build_alias_map(dupobject_calls)
-    print(f"Found {len(dupobject_calls)} dupObject calls ({len(alias_map)} successful aliases)")
-    
-    # Build allocation map for connecting calls (including aliases)
-    alloc_map = build_allocation_map(vidheap_calls, alias_map)
-    print(f"Built allocation map with {len(alloc_map)} entries")
+    jobs = args.jobs if args.jobs > 0 else mp.cpu_count()
+    if args.json:
+        args.ndjson = args.ndjson or is_ndjson_name(args.json)
+        if args.json.endswith('.zst') and zstandard is None:
+            parser.error(f"writing {args.json} needs the zstandard package")
+    if args.columnar_format == 'auto':
+        args.columnar_format = 'parquet' if pa is not None else 'csv'
+    elif args.columnar_format != 'csv' and pa is None:
+        parser.error(f"--columnar-format {args.columnar_format} needs the pyarrow package")
+    if args.where:
+        try:
+            record_filter = compile_record_filter(args.where)
+        except ValueError as e:
+            parser.error(str(e))
+    group_by = None
+    if args.group_by:
+        try:
+            group_by = GroupByAggregator([name.strip() for name in args.group_by.split(',') if name.strip()])
+        except ValueError as e:
+            parser.error(str(e))
     
     # Determine what to show
     if args.filter_type:
@@ -1311,6 +4815,38 @@ def main():
         show_mapmemory = not args.only_vidheap
         show_dupobject = True  # Show dupobject by default unless filtered
     
+    if args.follow:
+        return run_follow(args)
+    if args.compare:
+        return run_compare(args)
+    if args.lines or args.handle is not None:
+        kinds = [kind for kind, shown in (('vidheap', show_vidheap), ('mapmemory', show_mapmemory),
+                                          ('dupobject', show_dupobject)) if shown]
+        return run_indexed_detailed(args, jobs, kinds)
+    if args.stream:
+        return run_stream(args, jobs, show_vidheap, show_mapmemory, show_dupobject, group_by)
+    
+    print(f"Processing {args.rmlog_file}...")
+    clients = ClientBreakdown() if args.by_client else None
+    if args.cache:
+        vidheap_calls, mapmemory_calls, dupobject_calls = process_rmlog_cached(args.rmlog_file, jobs)
+        if args.where:
+            # The cache holds every call; filter the loaded stores column-wise
+            filtered = record_filter.apply(dict(zip(CALL_KINDS, (vidheap_calls, mapmemory_calls, dupobject_calls))))
+            vidheap_calls, mapmemory_calls, dupobject_calls = (filtered[kind] for kind in CALL_KINDS)
+        if clients:
+            clients.add_columns(dict(zip(CALL_KINDS, (vidheap_calls, mapmemory_calls, dupobject_calls))))
+    else:
+        vidheap_calls, mapmemory_calls, dupobject_calls = process_rmlog(args.rmlog_file, jobs, args.where, clients)
+    
+    # Build alias map from dupObject calls
+    alias_map = build_alias_map(dupobject_calls, vidheap_calls)
+    print(f"Found {len(dupobject_calls)} dupObject calls ({alias_map.added} successful aliases)")
+    
+    # Build allocation map for connecting calls (including aliases)
+    alloc_map = build_allocation_map(vidheap_calls, dupobject_calls)
+    print(f"Built allocation map with {len(alloc_map)} entries")
+    
     # Print summaries
     if show_vidheap:
         if not vidheap_calls:
@@ -1320,6 +4856,16 @@ def main():
             if not args.no_summary:
                 print_summary(vidheap_calls)
     
+    if args.timeline or (show_vidheap and vidheap_calls and not args.no_summary):
+        lifetimes = LifetimeTracker(keep_timeline=bool(args.timeline))
+        lifetimes.add_columns(vidheap_calls)
+        if show_vidheap and vidheap_calls and not args.no_summary:
+            print_lifetime_summary(lifetimes)
+    
+    if group_by:
+        group_by.add_columns(vidheap_calls)
+        print_group_by(group_by)
+    
     if show_mapmemory:
         if not mapmemory_calls:
             print("No mapMemoryDma calls found!")
@@ -1327,9 +4873,15 @@ def main():
             print(f"Found {len(mapmemory_calls)} mapMemoryDma calls")
             
             # Calculate how many mappings have related allocations
-            mappings_with_hmemory = sum(1 for call in mapmemory_calls if call.hMemory in alloc_map)
-            mappings_with_hdma = sum(1 for call in mapmemory_calls if call.hDma in alloc_map)
-            mappings_with_any = sum(1 for call in mapmemory_calls if call.hMemory in alloc_map or call.hDma in alloc_map)
+            mappings_with_hmemory = mappings_with_hdma = mappings_with_any = 0
+            for line_number, h_memory, h_dma in zip(mapmemory_calls.column('line_number'),
+                                                    mapmemory_calls.column('hMemory'),
+                                                    mapmemory_calls.column('hDma')):
+                has_hmemory = alloc_map.row(h_memory, line_number) is not None
+                has_hdma = alloc_map.row(h_dma, line_number) is not None
+                mappings_with_hmemory += has_hmemory
+                mappings_with_hdma += has_hdma
+                mappings_with_any += has_hmemory or has_hdma
             print(f"  → {mappings_with_hmemory} mappings have hMemory allocations ({mappings_with_hmemory*100//len(mapmemory_calls)}%)")
             print(f"  → {mappings_with_hdma} mappings have hDma allocations ({mappings_with_hdma*100//len(mapmemory_calls)}%)")
             print(f"  → {mappings_with_any} mappings have at least one allocation ({mappings_with_any*100//len(mapmemory_calls)}%)")
@@ -1337,17 +4889,48 @@ def main():
             if not args.no_summary:
                 print_mapmemory_summary(mapmemory_calls)
     
+    if args.va_analysis:
+        va_analyzer = VAAnalyzer()
+        va_analyzer.add_columns(vidheap_calls, mapmemory_calls)
+        print_va_analysis(va_analyzer)
+    
+    if args.failures:
+        forensics = FailureForensics(args.failure_window)
+        forensics.add_columns(vidheap_calls, mapmemory_calls)
+        print_failure_forensics(forensics, args.failures)
+    
+    if args.churn:
+        churn = ChurnDetector(args.churn_window)
+        churn.add_columns(vidheap_calls)
+        print_churn(churn)
+    
+    if clients:
+        clients.track_live_columns(vidheap_calls)
+        print_client_breakdown(clients)
+    
     # Print detailed calls (interleaved)
     if not args.no_detailed:
         # Filter calls based on what should be shown
-        vidheap_to_show = vidheap_calls if show_vidheap else []
-        mapmemory_to_show = mapmemory_calls if show_mapmemory else []
-        dupobject_to_show = dupobject_calls if show_dupobject else []
+        vidheap_to_show = vidheap_calls if show_vidheap else None
+        mapmemory_to_show = mapmemory_calls if show_mapmemory else None
+        dupobject_to_show = dupobject_calls if show_dupobject else None
         print_interleaved_detailed(vidheap_to_show, mapmemory_to_show, dupobject_to_show, args.detailed, alloc_map, alias_map, args.rmlog_file)
     
     # Export combined JSON if requested
     if args.json:
-        export_combined_json(vidheap_calls, mapmemory_calls, args.json, alloc_map, args.rmlog_file)
+        export_combined_json(vidheap_calls, mapmemory_calls, args.json, alloc_map, args.rmlog_file,
+                             args.ndjson, args.json_indent)
+    if args.columnar:
+        columnar = ColumnarWriter(args.columnar, args.columnar_format, args.rmlog_file)
+        for kind, store in zip(CALL_KINDS, (vidheap_calls, mapmemory_calls, dupobject_calls)):
+            columnar.write_store(kind, store)
+        columnar.close()
+    if args.timeline:
+        export_lifetime_timeline(lifetimes, args.timeline, args.rmlog_file)
+    if args.heap_series:
+        heap_series = HeapSeriesCollector(args.heap_series_points)
+        heap_series.add_columns(vidheap_calls)
+        export_heap_series(heap_series, args.heap_series, args.heap_series_method, args.rmlog_file)
     
     return 0
 